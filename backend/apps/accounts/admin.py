@@ -2,11 +2,13 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.translation import gettext_lazy as _
 
+from apps.common.admin import LargeTableAdminMixin
+
 from .models import CustomUser
 
 
 @admin.register(CustomUser)
-class CustomUserAdmin(BaseUserAdmin):
+class CustomUserAdmin(LargeTableAdminMixin, BaseUserAdmin):
     """
     Admin customizado para CustomUser com login por email.
     """
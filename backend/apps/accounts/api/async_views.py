@@ -0,0 +1,23 @@
+"""
+Versão assíncrona de ``CurrentUserView.get`` (ver apps.common.async_views).
+"""
+from apps.common.async_views import AsyncReadView
+from .serializers import UserSerializer, get_user_company_serializer
+
+
+class CurrentUserAsyncView(AsyncReadView):
+    """
+    Usuário autenticado com as empresas lidas via ``async for`` pelo leitor
+    compilado; o ``UserSerializer`` só monta o restante dos campos.
+    """
+
+    async def get(self, request):
+        serializer = UserSerializer(request.user, context={'request': request})
+        reader = get_user_company_serializer().compiled_reader
+        rows = [
+            row async for row in reader.values_list(serializer.get_active_memberships(request.user))
+        ]
+        serializer.context['prefetched_companies'] = reader.serialize_rows(
+            rows, serializer.get_child_context('companies'),
+        )
+        return serializer.data
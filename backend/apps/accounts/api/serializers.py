@@ -1,7 +1,11 @@
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from django.conf import settings
 from django.contrib.auth import get_user_model
 
+from apps.common.serializers import DynamicFieldsMixin
+from apps.common.tracing import start_span
+
 User = get_user_model()
 
 
@@ -19,7 +23,8 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 
     @classmethod
     def get_token(cls, user):
-        token = super().get_token(user)
+        with start_span('auth.issue_token'):
+            token = super().get_token(user)
 
         # Adicionar claims customizados ao token
         token['email'] = user.email
@@ -28,7 +33,10 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         return token
 
     def validate(self, attrs):
-        data = super().validate(attrs)
+        # Spans: auth.credentials (authenticate + hash, tokens, last_login) e
+        # serializer UserSerializer (empresas e temas)
+        with start_span('auth.credentials'):
+            data = super().validate(attrs)
 
         # Adicionar informações completas do usuário (com empresas e temas)
         user_serializer = UserSerializer(self.user, context={'request': self.context.get('request')})
@@ -37,14 +45,17 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         return data
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para visualização de dados do usuário.
     Inclui empresas que o usuário gerencia com roles e temas.
+    Aceita ?fields=, ?omit= e ?expand= (ver apps.common.serializers).
     """
     full_name = serializers.CharField(source='get_full_name', read_only=True)
     companies = serializers.SerializerMethodField()
 
+    expandable_fields = ('companies',)
+
     class Meta:
         model = User
         fields = [
@@ -72,20 +83,45 @@ class UserSerializer(serializers.ModelSerializer):
         Retorna todas as empresas que o usuário gerencia (através de CompanyMember).
         Inclui: dados da empresa, role do usuário e tema da empresa.
         """
-        UserCompanySerializer = get_user_company_serializer()
+        # Já carregadas pela view assíncrona (apps.accounts.api.async_views)
+        if 'prefetched_companies' in self.context:
+            return self.context['prefetched_companies']
 
-        # Buscar apenas memberships ativos
-        memberships = obj.company_memberships.filter(
-            is_active=True,
-            deleted_at__isnull=True
-        ).select_related('company').order_by('company__trade_name')
+        UserCompanySerializer = get_user_company_serializer()
+        context = self.get_child_context('companies')
+
+        # Caminho rápido (sem seleção de campos): leitor compilado sobre values_list()
+        if settings.COMPILED_READ_SERIALIZERS and context['field_filter'] is None:
+            return UserCompanySerializer.compiled_reader.serialize(
+                self.get_active_memberships(obj),
+                context,
+            )
+
+        # Buscar apenas memberships ativos, carregando só as colunas pedidas
+        memberships = UserCompanySerializer.optimize_queryset(
+            self.get_active_memberships(obj),
+            context['field_filter'],
+            extra_fields=['user'],
+        )
 
         return UserCompanySerializer(
             memberships,
             many=True,
-            context=self.context
+            context=context
         ).data
 
+    def get_companies_ref(self, obj):
+        """
+        Forma compacta (apenas UUIDs das empresas), usada quando não expandido.
+        """
+        return list(self.get_active_memberships(obj).values_list('company__uuid', flat=True))
+
+    def get_active_memberships(self, obj):
+        return obj.company_memberships.filter(
+            is_active=True,
+            deleted_at__isnull=True
+        ).order_by('company__trade_name')
+
     def update(self, instance, validated_data):
         """
         Limita atualização do perfil a campos básicos.
@@ -2,6 +2,8 @@ from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
 from drf_spectacular.utils import extend_schema
 
+from apps.common.async_views import async_read_view
+
 from .views import (
     CustomTokenObtainPairView,
     UserRegistrationView,
@@ -9,6 +11,7 @@ from .views import (
     ChangePasswordView,
     logout_view,
 )
+from .async_views import CurrentUserAsyncView
 
 # Adicionar documentação ao TokenRefreshView padrão
 TokenRefreshView = extend_schema(
@@ -27,6 +30,6 @@ urlpatterns = [
     path('register/', UserRegistrationView.as_view(), name='register'),
 
     # Usuário atual
-    path('me/', CurrentUserView.as_view(), name='current_user'),
+    path('me/', async_read_view(CurrentUserView.as_view(), CurrentUserAsyncView), name='current_user'),
     path('me/password/', ChangePasswordView.as_view(), name='change_password'),
 ]
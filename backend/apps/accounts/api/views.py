@@ -27,6 +27,7 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     empresas que gerencia e seus respectivos temas visuais.
     """
     serializer_class = CustomTokenObtainPairSerializer
+    query_budget = 6
 
 
 @extend_schema(
@@ -84,6 +85,7 @@ class CurrentUserView(generics.RetrieveUpdateAPIView):
     """
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 4
 
     def get_object(self):
         return self.request.user
@@ -0,0 +1,22 @@
+import time
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+from apps.common.metrics import PASSWORD_HASH_TIME
+from apps.common.tracing import start_span
+
+
+class TimedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 padrão do Django, medindo o tempo de verificação de senha (login)
+    na métrica ``auth_password_hash_duration_seconds`` e no span
+    ``auth.password_verify``.
+    """
+
+    def verify(self, password, encoded):
+        start = time.perf_counter()
+        try:
+            with start_span('auth.password_verify', **{'auth.hasher': self.algorithm}):
+                return super().verify(password, encoded)
+        finally:
+            PASSWORD_HASH_TIME.observe(time.perf_counter() - start)
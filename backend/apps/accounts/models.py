@@ -1,5 +1,7 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils.translation import gettext_lazy as _
 
 
@@ -86,6 +88,14 @@ class CustomUser(AbstractUser):
         verbose_name = _('usuário')
         verbose_name_plural = _('usuários')
         ordering = ['-date_joined']
+        indexes = [
+            models.Index(fields=['date_joined']),
+            # Busca do admin (icontains vira UPPER(col) LIKE UPPER('%termo%')): pg_trgm
+            GinIndex(OpClass(Upper('email'), name='gin_trgm_ops'), name='user_email_trgm'),
+            GinIndex(OpClass(Upper('first_name'), name='gin_trgm_ops'), name='user_first_name_trgm'),
+            GinIndex(OpClass(Upper('last_name'), name='gin_trgm_ops'), name='user_last_name_trgm'),
+            GinIndex(OpClass(Upper('phone'), name='gin_trgm_ops'), name='user_phone_trgm'),
+        ]
 
     def __str__(self):
         return self.email
@@ -1,3 +1,181 @@
-from django.test import TestCase
+from decimal import Decimal
 
-# Create your tests here.
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.companies.api.serializers import UserCompanySerializer
+from apps.companies.models import Company, CompanyMember, CompanyTheme
+
+User = get_user_model()
+
+
+class MembershipsTestMixin:
+    def setUp(self):
+        self.user = User.objects.create_user(email='gerente@example.com', password=None, first_name='Gerente')
+        with_theme = Company.objects.create(
+            trade_name='Alfa', legal_name='Alfa Ltda', cnpj='00.000.000/0001-00', email='alfa@example.com',
+            points_per_real=Decimal('1.5'), logo='companies/logos/alfa.png',
+        )
+        CompanyTheme.objects.create(company=with_theme, logo_light='companies/themes/logos/alfa.png')
+        # Sem tema (LEFT JOIN nulo), sem logo e taxa inteira
+        without_theme = Company.objects.create(
+            trade_name='Beta', legal_name='Beta Ltda', cnpj='00.000.000/0002-00', email='beta@example.com',
+            points_per_real=Decimal('2'),
+        )
+        inactive = Company.objects.create(
+            trade_name='Gama', legal_name='Gama Ltda', cnpj='00.000.000/0003-00', email='gama@example.com',
+        )
+        CompanyMember.objects.create(company=with_theme, user=self.user, role=CompanyMember.Role.OWNER)
+        CompanyMember.objects.create(company=without_theme, user=self.user, role=CompanyMember.Role.ATTENDANT)
+        CompanyMember.objects.create(company=inactive, user=self.user, is_active=False)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class CompiledCompaniesTests(MembershipsTestMixin, TestCase):
+    """
+    Paridade de ``companies`` em /me com o leitor compilado
+    (COMPILED_READ_SERIALIZERS) e com o serializer DRF.
+    """
+
+    def companies(self, compiled):
+        with override_settings(COMPILED_READ_SERIALIZERS=compiled):
+            response = self.client.get(reverse('current_user'))
+        self.assertEqual(response.status_code, 200)
+        return response.json()['companies']
+
+    def test_matches_serializer(self):
+        expected = self.companies(False)
+        self.assertEqual(self.companies(True), expected)
+
+        alfa, beta = expected
+        self.assertEqual(alfa['company']['logo'], 'http://testserver/media/companies/logos/alfa.png')
+        self.assertEqual(alfa['company']['points_per_real'], '1.50')
+        self.assertEqual(alfa['role_display'], 'Proprietário')
+        self.assertEqual(alfa['theme']['logos'], {
+            'light': 'http://testserver/media/companies/themes/logos/alfa.png', 'dark': None, 'favicon': None,
+        })
+        self.assertIsNone(beta['company']['logo'])
+        self.assertEqual(beta['company']['points_per_real'], '2.00')
+        self.assertIsNone(beta['theme'])
+
+    @override_settings(TIME_ZONE='UTC', LANGUAGE_CODE='en')
+    def test_matches_serializer_in_other_locale(self):
+        self.assertEqual(self.companies(True), self.companies(False))
+
+
+class FieldSelectionTests(MembershipsTestMixin, TestCase):
+    """
+    ``?fields=``, ``?omit=`` e ``?expand=`` em /me (ver apps.common.serializers).
+    """
+
+    def get(self, **params):
+        response = self.client.get(reverse('current_user'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def company_uuids(self):
+        return [str(uuid) for uuid in Company.objects.filter(trade_name__in=['Alfa', 'Beta'])
+                .order_by('trade_name').values_list('uuid', flat=True)]
+
+    def test_fields(self):
+        self.assertEqual(self.get(fields='id,email'), {'id': self.user.id, 'email': 'gerente@example.com'})
+
+    def test_fields_nested_path(self):
+        data = self.get(fields='email,companies.role,companies.company.trade_name')
+        self.assertEqual(data, {'email': 'gerente@example.com', 'companies': [
+            {'company': {'trade_name': 'Alfa'}, 'role': 'owner'},
+            {'company': {'trade_name': 'Beta'}, 'role': 'attendant'},
+        ]})
+
+    def test_fields_without_subpath_keeps_whole_object(self):
+        full = self.get()['companies'][0]['theme']
+        data = self.get(fields='companies.theme')
+        self.assertEqual(data['companies'][0], {'theme': full})
+        self.assertEqual(data['companies'][1], {'theme': None})
+
+    def test_omit(self):
+        full = self.get()
+        data = self.get(omit='phone,companies.theme,companies.company.logo')
+        self.assertNotIn('phone', data)
+        self.assertEqual(data['email'], full['email'])
+        for membership, expected in zip(data['companies'], full['companies']):
+            self.assertNotIn('theme', membership)
+            self.assertNotIn('logo', membership['company'])
+            self.assertEqual(membership['role_display'], expected['role_display'])
+            self.assertEqual(membership['company']['trade_name'], expected['company']['trade_name'])
+
+    def test_omit_subpath_keeps_parent(self):
+        data = self.get(omit='companies.company.cnpj')
+        self.assertEqual(len(data['companies']), 2)
+        self.assertNotIn('cnpj', data['companies'][0]['company'])
+        self.assertIn('uuid', data['companies'][0]['company'])
+
+    def test_expand(self):
+        alfa, beta = self.company_uuids()
+        theme_uuid = str(CompanyTheme.objects.get().uuid)
+
+        # Lista vazia: tudo que é expansível vira referência
+        self.assertEqual(self.get(expand='')['companies'], [alfa, beta])
+
+        companies = self.get(expand='companies')['companies']
+        self.assertEqual([(m['company'], m['theme']) for m in companies], [(alfa, theme_uuid), (beta, None)])
+
+        companies = self.get(expand='companies.company')['companies']
+        self.assertEqual(companies[0]['company']['trade_name'], 'Alfa')
+        self.assertEqual(companies[0]['theme'], theme_uuid)
+
+        companies = self.get(expand='companies.theme', fields='companies.theme.colors')['companies']
+        self.assertEqual(list(companies[0]['theme']), ['colors'])
+
+    def test_unknown_fields_are_ignored(self):
+        self.assertEqual(self.get(fields='id,nope'), {'id': self.user.id})
+        self.assertEqual(self.get(omit='nope,companies.nope'), self.get())
+        self.assertEqual(self.get(fields='companies.nope')['companies'], [{}, {}])
+        self.assertEqual(self.get(expand='nope')['companies'], self.company_uuids())
+
+    def count_queries(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            self.get(**params)
+        return len(queries)
+
+    def add_membership(self):
+        index = Company.all_objects.count() + 1
+        company = Company.objects.create(
+            trade_name=f'Empresa {index}', legal_name=f'Empresa {index} Ltda',
+            cnpj=f'00.000.000/{index:04d}-00', email=f'empresa{index}@example.com',
+        )
+        CompanyTheme.objects.create(company=company)
+        CompanyMember.objects.create(company=company, user=self.user)
+
+    def test_optimize_queryset_avoids_n_plus_one(self):
+        selections = [
+            {'fields': 'companies'},
+            {'fields': 'companies.company.trade_name,companies.theme.colors'},
+            {'fields': 'companies.role_display,companies.created_at'},
+            {'omit': 'companies.theme.logos'},
+            {'expand': 'companies'},
+        ]
+        for params in selections:
+            before = self.count_queries(**params)
+            self.add_membership()
+            self.add_membership()
+            self.assertEqual(self.count_queries(**params), before, params)
+
+    def test_without_optimize_queryset_queries_grow(self):
+        # Garante que o teste acima mede algo: sem select_related/only, cada
+        # membership busca empresa e tema separadamente
+        params = {'fields': 'companies.company.trade_name,companies.theme.colors'}
+        unoptimized = classmethod(lambda cls, queryset, *args, **kwargs: queryset)
+        with override_settings(QUERY_BUDGET_RAISE=False), \
+                mock.patch.object(UserCompanySerializer, 'optimize_queryset', unoptimized), \
+                self.assertLogs('apps.common.middleware', 'WARNING'):
+            before = self.count_queries(**params)
+            self.add_membership()
+            self.assertEqual(self.count_queries(**params), before + 2)
@@ -1,3 +1,113 @@
-from django.contrib import admin
+"""
+Utilitários do Django Admin para tabelas grandes.
 
-# Register your models here.
+O changelist padrão faz ``COUNT(*)`` da consulta filtrada (e outro da tabela
+inteira para o "N de M"); no PostgreSQL, com milhões de linhas, essas
+contagens custam mais que a página em si. ``EstimatedCountPaginator`` usa a
+estimativa do planner acima de ``ADMIN_ESTIMATED_COUNT_THRESHOLD`` linhas.
+
+``bulk_action_confirmation`` é a página de confirmação das actions em massa:
+ao contrário da do ``delete_selected``, não carrega a seleção inteira.
+"""
+import json
+
+from django.conf import settings
+from django.contrib.admin import helpers
+from django.core.paginator import Paginator
+from django.db import connections
+from django.template.response import TemplateResponse
+from django.utils.functional import cached_property
+
+# Objetos listados na página de confirmação das actions em massa
+CONFIRMATION_SAMPLE_SIZE = 20
+
+
+def table_estimate(connection, table):
+    """
+    ``pg_class.reltuples`` da tabela (atualizado pelo autovacuum/ANALYZE) ou
+    ``None`` se a tabela nunca foi analisada.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)', [table])
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+def plan_estimate(queryset):
+    """
+    Linhas estimadas pelo planner (``EXPLAIN``, sem executar) para o queryset.
+    """
+    queryset = queryset.order_by().values('pk')
+    compiler = queryset.query.get_compiler(using=queryset.db)
+    sql, params = compiler.as_sql()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator com contagem estimada no PostgreSQL: ``reltuples`` sem filtros e
+    o plano do ``EXPLAIN`` com filtros/busca. Abaixo do limite (ou em outros
+    bancos) faz o ``COUNT(*)`` exato.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        threshold = settings.ADMIN_ESTIMATED_COUNT_THRESHOLD
+        if connection.vendor != 'postgresql' or not threshold:
+            return super().count
+
+        if queryset.query.has_filters():
+            estimate = plan_estimate(queryset)
+        else:
+            estimate = table_estimate(connection, queryset.model._meta.db_table)
+        if estimate is None or estimate < threshold:
+            return super().count
+        return estimate
+
+
+class LargeTableAdminMixin:
+    """
+    Changelist sem contagens exatas: paginator estimado e sem o
+    "N resultados (M total)", que faria um segundo ``COUNT(*)``.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+def bulk_action_confirmation(model_admin, request, queryset, action, title, form=None):
+    """
+    Confirmação de uma action em massa com a contagem (pelo paginator do
+    admin, estimada em tabelas grandes) e uma amostra da seleção. Reenvia os
+    campos do POST original, inclusive "selecionar todos", mais ``post=yes``;
+    a action confirmada recebe o mesmo queryset.
+    """
+    opts = model_admin.model._meta
+    media = model_admin.media
+    if form is not None:
+        media += form.media
+    context = {
+        **model_admin.admin_site.each_context(request),
+        'title': title,
+        'subtitle': None,
+        'opts': opts,
+        'app_label': opts.app_label,
+        'action': action,
+        'form': form,
+        'count': model_admin.get_paginator(request, queryset, CONFIRMATION_SAMPLE_SIZE).count,
+        'sample': queryset[:CONFIRMATION_SAMPLE_SIZE],
+        'select_across': request.POST.get('select_across', '0'),
+        'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+        'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        'media': media,
+    }
+    request.current_app = model_admin.admin_site.name
+    return TemplateResponse(request, 'admin/bulk_action_confirmation.html', context)
@@ -1,6 +1,41 @@
 from django.apps import AppConfig
+from django.contrib.admin import apps as admin_apps
 
 
 class CommonConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.common'
+
+    def ready(self):
+        from django.core import checks
+        from django.db.backends.signals import connection_created
+
+        from .checks import admin_middleware_check, replica_pin_cache_check
+        from .instrumentation import install_db_instrumentation
+        from .metrics import record_connection
+
+        connection_created.connect(install_db_instrumentation, dispatch_uid='common_db_instrumentation')
+        connection_created.connect(record_connection, dispatch_uid='common_db_connection_metrics')
+        checks.register(replica_pin_cache_check)
+        checks.register(admin_middleware_check, checks.Tags.admin)
+
+
+class AdminConfig(admin_apps.AdminConfig):
+    """
+    Admin com as verificações de middleware feitas na pilha de /admin/
+    (apps.common.checks.admin_middleware_check): sessão, autenticação e
+    mensagens rodam dentro do PathMiddlewareStack, não direto em ``MIDDLEWARE``.
+    """
+    # Só via INSTALLED_APPS; o padrão de apps.common é o CommonConfig
+    default = False
+
+    def ready(self):
+        from django.contrib.admin.checks import check_admin_app
+        from django.core import checks
+
+        from .checks import admin_dependencies_check
+
+        # Mesmo registro do SimpleAdminConfig, trocando check_dependencies
+        checks.register(admin_dependencies_check, checks.Tags.admin)
+        checks.register(check_admin_app, checks.Tags.admin)
+        self.module.autodiscover()
@@ -0,0 +1,222 @@
+"""
+Views assíncronas para as leituras mais acessadas (``ASYNC_READ_VIEWS``).
+
+Sob ASGI cada view síncrona do DRF ocupa uma thread do ``sync_to_async``
+durante toda a requisição. ``async_read_view`` coloca na frente da view DRF uma
+``AsyncReadView`` que atende os GETs comuns com o ORM e o cache assíncronos; o
+resto (escritas, ``?fields=``, ``?format=``, API navegável...) segue para a view
+DRF original.
+
+A ``AsyncReadView`` reproduz a autenticação (JWT e sessão), as permissões, a
+paginação e o formato de erro do DRF; o JSON sai pelo mesmo ``ORJSONRenderer``.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import PermissionDenied as DjangoPermissionDenied
+from django.core.paginator import InvalidPage, Page
+from django.http import Http404, HttpResponse
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .renderers import ORJSONRenderer
+from .serializers import FieldFilter
+
+JSON_MEDIA_TYPES = {'application/json', 'application/*', '*/*'}
+
+
+def accepts_json(request):
+    """
+    O DRF negociaria o ``ORJSONRenderer`` (sem API navegável nem ``indent``).
+    """
+    accept = request.headers.get('Accept', '')
+    if not accept:
+        return True
+    media_types = [part.strip() for part in accept.split(',')]
+    if any(';' in media_type and 'indent=' in media_type for media_type in media_types):
+        return False
+    media_types = {media_type.split(';', 1)[0].strip() for media_type in media_types}
+    return 'text/html' not in media_types and bool(media_types & JSON_MEDIA_TYPES)
+
+
+def allowed_methods(drf_view):
+    """
+    Valor do header ``Allow`` da view DRF (ViewSets expõem só as ações mapeadas).
+    """
+    view = drf_view.cls(**drf_view.initkwargs)
+    for method, action in (getattr(drf_view, 'actions', None) or {}).items():
+        setattr(view, method, getattr(view, action))
+    if hasattr(view, 'get') and not hasattr(view, 'head'):
+        view.head = view.get
+    return ', '.join(view.allowed_methods)
+
+
+class AsyncReadView:
+    """
+    GET assíncrono no formato de uma ``APIView`` do DRF. Subclasses implementam
+    ``get(request, **kwargs)`` retornando os dados da resposta e podem ampliar
+    ``fallback_params`` (parâmetros que só a view DRF trata).
+    """
+    permission_classes = [IsAuthenticated]
+    pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+    fallback_params = (api_settings.URL_FORMAT_OVERRIDE, *FieldFilter.query_params)
+
+    def __init__(self, request, args, kwargs, allow):
+        self.request = request
+        self.args = args
+        self.kwargs = kwargs
+        self.allow = allow
+
+    @classmethod
+    def accepts(cls, request):
+        return accepts_json(request) and not any(name in request.GET for name in cls.fallback_params)
+
+    async def dispatch(self):
+        try:
+            self.request.user = await self.authenticate()
+            await self.check_permissions()
+            data = await self.get(self.request, *self.args, **self.kwargs)
+        except (exceptions.APIException, Http404, DjangoPermissionDenied) as exc:
+            return self.handle_exception(exc)
+        return self.render(data)
+
+    async def get(self, request, *args, **kwargs):
+        raise NotImplementedError
+
+    # -------------------------------------------------------------------------
+    # Autenticação: mesma ordem de REST_FRAMEWORK (JWT, depois sessão)
+    # -------------------------------------------------------------------------
+
+    async def authenticate(self):
+        authenticator = JWTAuthentication()
+        header = authenticator.get_header(self.request)
+        raw_token = authenticator.get_raw_token(header) if header is not None else None
+        if raw_token is not None:
+            return await self.get_jwt_user(authenticator, authenticator.get_validated_token(raw_token))
+
+        # Sessão só existe fora de LEAN_MIDDLEWARE_PATHS (PathMiddlewareStack)
+        if hasattr(self.request, 'auser'):
+            user = await self.request.auser()
+            if user.is_authenticated and user.is_active:
+                return user
+        raise exceptions.NotAuthenticated()
+
+    async def get_jwt_user(self, authenticator, validated_token):
+        """
+        ``JWTAuthentication.get_user`` com ``aget`` (mesmas mensagens e códigos).
+        """
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError as exc:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from exc
+
+        try:
+            user = await authenticator.user_model.objects.aget(**{jwt_settings.USER_ID_FIELD: user_id})
+        except authenticator.user_model.DoesNotExist as exc:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found') from exc
+
+        if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if jwt_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            jwt_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return user
+
+    # -------------------------------------------------------------------------
+    # Permissões: ``ahas_permission``/``ahas_object_permission`` quando a classe
+    # as define; senão a versão síncrona (que não pode consultar o banco)
+    # -------------------------------------------------------------------------
+
+    async def check_permissions(self):
+        for permission in (cls() for cls in self.permission_classes):
+            check = getattr(permission, 'ahas_permission', None)
+            allowed = await check(self.request, self) if check else permission.has_permission(self.request, self)
+            if not allowed:
+                raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+
+    async def check_object_permissions(self, obj):
+        for permission in (cls() for cls in self.permission_classes):
+            check = getattr(permission, 'ahas_object_permission', None)
+            if check:
+                allowed = await check(self.request, self, obj)
+            else:
+                allowed = permission.has_object_permission(self.request, self, obj)
+            if not allowed:
+                raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+
+    # -------------------------------------------------------------------------
+    # Paginação e resposta
+    # -------------------------------------------------------------------------
+
+    async def paginate(self, queryset, serialize):
+        """
+        ``PageNumberPagination`` com ``acount()`` e a página lida via ``async for``.
+        ``serialize`` converte a lista de linhas da página nos resultados.
+        """
+        pagination = self.pagination_class()
+        paginator = pagination.django_paginator_class(queryset, pagination.page_size)
+        paginator.count = await queryset.acount()
+
+        page_number = self.request.GET.get(pagination.page_query_param) or 1
+        if page_number in pagination.last_page_strings:
+            page_number = paginator.num_pages
+        try:
+            number = paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            raise exceptions.NotFound(pagination.invalid_page_message.format(
+                page_number=page_number, message=str(exc),
+            ))
+
+        bottom = (number - 1) * paginator.per_page
+        rows = [row async for row in queryset[bottom:bottom + paginator.per_page]]
+        pagination.page = Page(rows, number, paginator)
+        pagination.request = self.request
+        return pagination.get_paginated_response(serialize(rows)).data
+
+    def render(self, data, status=200, headers=None):
+        response = HttpResponse(ORJSONRenderer().render(data), status=status, content_type='application/json')
+        response['Vary'] = 'Accept'
+        response['Allow'] = self.allow
+        for name, value in (headers or {}).items():
+            response[name] = value
+        return response
+
+    def handle_exception(self, exc):
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            exc.auth_header = JWTAuthentication().authenticate_header(self.request)
+        response = exception_handler(exc, {'view': self, 'request': self.request})
+        headers = {name: response[name] for name in ('WWW-Authenticate', 'Retry-After') if response.has_header(name)}
+        return self.render(response.data, response.status_code, headers)
+
+
+def async_read_view(drf_view, view_class):
+    """
+    Atende os GETs aceitos por ``view_class`` (``AsyncReadView``) e repassa o
+    resto à view DRF. Com ``ASYNC_READ_VIEWS`` desligado retorna a própria view
+    DRF. Os atributos da view DRF (``cls``, ``actions``...) são mantidos para o
+    drf-spectacular e o ``QueryBudgetMiddleware``.
+    """
+    if not settings.ASYNC_READ_VIEWS:
+        return drf_view
+
+    fallback = sync_to_async(drf_view)
+    allow = allowed_methods(drf_view)
+
+    @wraps(drf_view)
+    async def view(request, *args, **kwargs):
+        # Sufixo de formato (themes/<uuid>.json) fica com a view DRF
+        if (request.method == 'GET' and api_settings.FORMAT_SUFFIX_KWARG not in kwargs
+                and view_class.accepts(request)):
+            return await view_class(request, args, kwargs, allow).dispatch()
+        return await fallback(request, *args, **kwargs)
+
+    return view
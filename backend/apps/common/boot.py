@@ -0,0 +1,96 @@
+"""
+Atalhos do boot do container (``python manage.py boot``).
+
+- Migrações: as migrações em disco (nomes dos módulos, sem importá-los) são
+  comparadas com ``django_migrations`` em uma única query; sem pendências o
+  ``migrate`` não roda.
+- Arquivos estáticos: hash do conteúdo de tudo que o ``collectstatic``
+  copiaria, gravado em ``STATIC_ROOT`` após a coleta; hash igual pula a coleta.
+"""
+import hashlib
+import importlib.util
+import pkgutil
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles.finders import get_finders
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.recorder import MigrationRecorder
+
+STATIC_FINGERPRINT_FILE = '.boot-fingerprint'
+# Padrões ignorados por padrão pelo collectstatic
+STATIC_IGNORE_PATTERNS = ['CVS', '.*', '*~']
+
+
+def disk_migrations():
+    """
+    ``{(app_label, nome)}`` das migrações em disco, como o ``MigrationLoader``
+    as descobre, mas sem importar os módulos.
+    """
+    nodes = set()
+    for app_config in apps.get_app_configs():
+        module_name, _ = MigrationLoader.migrations_module(app_config.label)
+        if module_name is None:
+            continue
+        try:
+            spec = importlib.util.find_spec(module_name)
+        except ModuleNotFoundError:
+            continue
+        if spec is None or not spec.submodule_search_locations:
+            continue
+        for _, name, is_pkg in pkgutil.iter_modules(spec.submodule_search_locations):
+            if not is_pkg and name[0] not in '_~':
+                nodes.add((app_config.label, name))
+    return nodes
+
+
+def pending_migrations(database=DEFAULT_DB_ALIAS):
+    """
+    Migrações em disco ainda não registradas no banco. Em caso de dúvida
+    (squash ainda não registrado, tabela inexistente) reporta pendência e o
+    ``migrate`` roda normalmente.
+    """
+    applied = MigrationRecorder(connections[database]).applied_migrations()
+    return sorted(disk_migrations() - set(applied))
+
+
+def static_fingerprint():
+    """
+    SHA-256 dos caminhos e do conteúdo dos arquivos encontrados pelos finders,
+    mais o storage e o destino da coleta.
+    """
+    digest = hashlib.sha256()
+    backend = settings.STORAGES['staticfiles']['BACKEND']
+    digest.update(f'{backend}\0{settings.STATIC_ROOT}\0{settings.STATIC_URL}\0'.encode())
+    files = {}
+    for finder in get_finders():
+        for path, storage in finder.list(STATIC_IGNORE_PATTERNS):
+            prefixed = str(Path(getattr(storage, 'prefix', None) or '') / path)
+            # Como o collectstatic, o primeiro finder que encontra o caminho vence
+            files.setdefault(prefixed, (storage, path))
+    for prefixed in sorted(files):
+        storage, path = files[prefixed]
+        digest.update(prefixed.encode() + b'\0')
+        with storage.open(path) as fp:
+            for chunk in iter(lambda: fp.read(1024 * 1024), b''):
+                digest.update(chunk)
+    return digest.hexdigest(), len(files)
+
+
+def static_fingerprint_path():
+    return Path(settings.STATIC_ROOT) / STATIC_FINGERPRINT_FILE
+
+
+def read_static_fingerprint():
+    try:
+        return static_fingerprint_path().read_text(encoding='ascii').strip()
+    except OSError:
+        return None
+
+
+def write_static_fingerprint(fingerprint):
+    path = static_fingerprint_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(fingerprint + '\n', encoding='ascii')
@@ -0,0 +1,65 @@
+"""
+Backends de cache que contabilizam hits/misses na instrumentação da requisição
+e abrem spans de tracing (apps.common.tracing).
+"""
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+from .instrumentation import record_cache
+from .tracing import SPAN_KIND_CLIENT, start_span
+
+_MISSING = object()
+
+
+class InstrumentedCacheMixin:
+    def get(self, key, default=None, version=None):
+        with start_span('cache.get', SPAN_KIND_CLIENT) as span:
+            value = super().get(key, _MISSING, version=version)
+            span.set_attribute('cache.hit', value is not _MISSING)
+        if value is _MISSING:
+            record_cache(hit=False)
+            return default
+        record_cache(hit=True)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with start_span('cache.set', SPAN_KIND_CLIENT):
+            return super().set(key, value, timeout=timeout, version=version)
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    # get_many do BaseCache já passa por get()
+    pass
+
+
+class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        with start_span('cache.get_many', SPAN_KIND_CLIENT, **{'cache.keys': len(keys)}):
+            values = super().get_many(keys, version=version)
+        record_cache(hit=True, count=len(values))
+        record_cache(hit=False, count=len(keys) - len(values))
+        return values
+
+
+def is_shared_cache(alias=DEFAULT_CACHE_ALIAS):
+    """
+    Cache visto por todos os workers (Redis, Memcached, banco). LocMem e
+    Dummy ficam em cada processo: travas e invalidações não chegam aos outros.
+    """
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
+def invalidated_timeout(seconds, alias=DEFAULT_CACHE_ALIAS):
+    """
+    TTL de um item invalidado ao salvar. Em cache local ao processo a
+    invalidação só limpa o worker que salvou: o TTL vira o atraso máximo dos
+    outros e fica limitado a ``LOCAL_CACHE_MAX_SECONDS``.
+    """
+    if is_shared_cache(alias):
+        return seconds
+    return min(seconds, settings.LOCAL_CACHE_MAX_SECONDS)
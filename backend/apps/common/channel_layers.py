@@ -0,0 +1,28 @@
+"""
+Channel layer com contagem de mensagens para as métricas Prometheus e spans
+de envio (apps.common.tracing).
+"""
+from channels_redis.core import RedisChannelLayer
+
+from .metrics import CHANNEL_MESSAGES
+from .tracing import SPAN_KIND_PRODUCER, start_span
+
+
+class InstrumentedRedisChannelLayer(RedisChannelLayer):
+    async def send(self, channel, message):
+        CHANNEL_MESSAGES.labels('send').inc()
+        with start_span('channels.send', SPAN_KIND_PRODUCER, **{'messaging.destination.name': channel}):
+            return await super().send(channel, message)
+
+    async def group_send(self, group, message):
+        CHANNEL_MESSAGES.labels('group_send').inc()
+        with start_span('channels.group_send', SPAN_KIND_PRODUCER, **{
+            'messaging.destination.name': group,
+            'messaging.message.type': message.get('type'),
+        }):
+            return await super().group_send(group, message)
+
+    async def receive(self, channel):
+        message = await super().receive(channel)
+        CHANNEL_MESSAGES.labels('receive').inc()
+        return message
@@ -0,0 +1,86 @@
+"""
+Verificações de configuração (``manage.py check``).
+"""
+from django.conf import settings
+from django.core.checks import Error, Warning
+from django.urls import NoReverseMatch, reverse
+from django.utils.module_loading import import_string
+
+from .cache import is_shared_cache
+
+# Exigidos pelo admin (admin.E408-E410); rodam dentro do PathMiddlewareStack
+ADMIN_MIDDLEWARE = (
+    ('django.contrib.sessions.middleware.SessionMiddleware', 'admin.E410'),
+    ('django.contrib.auth.middleware.AuthenticationMiddleware', 'admin.E408'),
+    ('django.contrib.messages.middleware.MessageMiddleware', 'admin.E409'),
+)
+
+
+def replica_pin_cache_check(app_configs, **kwargs):
+    """
+    O marcador read-your-writes das réplicas fica no cache: com cache local ao
+    processo, a requisição seguinte em outro worker não o vê e lê da réplica.
+    """
+    if settings.DATABASE_REPLICAS and not is_shared_cache():
+        return [Warning(
+            'DB_REPLICAS com cache local ao processo: leituras logo após uma escrita '
+            'podem ir para uma réplica atrasada em outro worker.',
+            hint='Use um cache compartilhado (CACHE_BACKEND=apps.common.cache.InstrumentedRedisCache).',
+            id='common.W001',
+        )]
+    return []
+
+
+def middleware_for_path(path):
+    """
+    ``MIDDLEWARE`` como roda para ``path``: o PathMiddlewareStack dá lugar a
+    ``LEAN_MIDDLEWARE`` ou ``FULL_MIDDLEWARE``.
+    """
+    from .middleware import PathMiddlewareStack
+
+    stack = []
+    for entry in settings.MIDDLEWARE:
+        if import_string(entry) is PathMiddlewareStack:
+            lean = path.startswith(tuple(settings.LEAN_MIDDLEWARE_PATHS))
+            stack.extend(settings.LEAN_MIDDLEWARE if lean else settings.FULL_MIDDLEWARE)
+        else:
+            stack.append(entry)
+    return stack
+
+
+def contains_subclass(class_path, paths):
+    base = import_string(class_path)
+    return any(issubclass(import_string(path), base) for path in paths)
+
+
+def admin_dependencies_check(app_configs, **kwargs):
+    """
+    ``check_dependencies`` do admin (ver apps.common.apps.AdminConfig) sem
+    admin.E408-E410, que procuram os middlewares só em ``MIDDLEWARE``.
+    """
+    from django.contrib.admin.checks import check_dependencies
+
+    middleware_ids = {error_id for _, error_id in ADMIN_MIDDLEWARE}
+    return [error for error in check_dependencies(**kwargs) if error.id not in middleware_ids]
+
+
+def admin_middleware_check(app_configs, **kwargs):
+    """
+    admin.E408-E410 na pilha que atende o admin de fato, com o
+    PathMiddlewareStack expandido: o admin fora de ``LEAN_MIDDLEWARE_PATHS`` e
+    sessão, autenticação e mensagens em ``FULL_MIDDLEWARE``.
+    """
+    try:
+        admin_path = reverse('admin:index')
+    except NoReverseMatch:
+        return []
+    stack = middleware_for_path(admin_path)
+    return [
+        Error(
+            f"'{middleware}' não roda para o admin ({admin_path}).",
+            hint='Inclua-o em FULL_MIDDLEWARE e deixe o admin fora de LEAN_MIDDLEWARE_PATHS.',
+            id=error_id,
+        )
+        for middleware, error_id in ADMIN_MIDDLEWARE
+        if not contains_subclass(middleware, stack)
+    ]
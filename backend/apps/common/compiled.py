@@ -0,0 +1,190 @@
+"""
+Serialização compilada para endpoints de leitura com alto volume.
+
+Um ``CompiledReader`` descreve a saída de um serializer DRF (mesmas chaves, na
+mesma ordem, com as mesmas conversões) e gera uma única função Python que monta
+o dicionário direto das tuplas de ``values_list()``, sem instanciar models nem
+passar pelo ``to_representation`` de cada campo.
+
+Exemplo::
+
+    reader = CompiledReader([
+        Field('uuid', convert=as_str),
+        Field('role'),
+        Field('role_display', 'role', convert=as_choice_display(Role.choices)),
+        Nested('user', 'user', [Field('id'), Field('email')]),
+    ])
+    rows = reader.serialize(queryset, context={'request': request})
+
+Conversores são *factories*: recebem o ``context`` uma vez por chamada e
+devolvem a função aplicada em cada valor (assim request/timezone/idioma são
+resolvidos fora do laço).
+"""
+from decimal import Decimal
+
+from django.utils import timezone
+
+from .instrumentation import serializer_timer
+
+
+# =============================================================================
+# Conversores (mesma saída dos campos DRF correspondentes)
+# =============================================================================
+
+def as_str(context):
+    """UUIDField / CharField."""
+    return str
+
+
+def as_datetime(context):
+    """DateTimeField em ISO 8601, no fuso atual, com sufixo ``Z`` para UTC."""
+    current_tz = timezone.get_current_timezone()
+
+    def convert(value):
+        value = value.astimezone(current_tz).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return convert
+
+
+def as_decimal(decimal_places):
+    """DecimalField com ``coerce_to_string`` (padrão do DRF)."""
+    quantum = Decimal('.1') ** decimal_places
+
+    def factory(context):
+        return lambda value: f'{value.quantize(quantum):f}'
+    return factory
+
+
+def as_choice_display(choices):
+    """Equivalente a ``get_<campo>_display``, resolvido no idioma ativo."""
+    def factory(context):
+        labels = {value: str(label) for value, label in choices}
+        return lambda value: labels.get(value, value)
+    return factory
+
+
+def as_absolute_file_url(model, field_name):
+    """
+    ImageField/FileField exposto como URL absoluta (ou ``None`` se vazio).
+    """
+    storage = model._meta.get_field(field_name).storage
+
+    def factory(context):
+        request = context.get('request')
+        build = request.build_absolute_uri if request is not None else (lambda url: url)
+        return lambda name: build(storage.url(name)) if name else None
+    return factory
+
+
+# =============================================================================
+# Especificação
+# =============================================================================
+
+class Field:
+    """
+    Chave de saída ligada a uma coluna. ``None`` é repassado sem conversão,
+    como faz o ``Serializer.to_representation`` do DRF.
+    """
+
+    def __init__(self, name, column=None, convert=None):
+        self.name = name
+        self.column = column or name
+        self.convert = convert
+
+
+class Computed:
+    """
+    Chave de saída calculada a partir de várias colunas
+    (equivalente a um ``SerializerMethodField``).
+    """
+
+    def __init__(self, name, columns, convert):
+        self.name = name
+        self.columns = columns
+        self.convert = convert
+
+
+class Nested:
+    """
+    Objeto aninhado. ``prefix`` é o caminho da relação (``''`` apenas agrupa
+    colunas do mesmo model). Com ``null_column``, o objeto vira ``None`` quando
+    essa coluna vier nula (relação opcional via LEFT JOIN).
+    """
+
+    def __init__(self, name, prefix, fields, null_column=None):
+        self.name = name
+        self.prefix = prefix
+        self.fields = fields
+        self.null_column = null_column
+
+
+class CompiledReader:
+    """
+    Gera (uma única vez) a função que converte uma tupla de ``values_list()``
+    no dicionário de saída.
+    """
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.columns = []
+        self.converters = []
+        self._column_index = {}
+        expression = self._compile_object(self.fields, '')
+
+        args = ''.join(f'_c{index}, ' for index in range(len(self.converters)))
+        source = f'def _build({args}):\n    return lambda row: {expression}\n'
+        namespace = {}
+        exec(compile(source, f'<compiled reader {id(self):x}>', 'exec'), namespace)
+        self._build = namespace['_build']
+
+    def _column(self, path):
+        if path not in self._column_index:
+            self._column_index[path] = len(self.columns)
+            self.columns.append(path)
+        return self._column_index[path]
+
+    def _converter(self, factory):
+        self.converters.append(factory)
+        return f'_c{len(self.converters) - 1}'
+
+    def _compile_object(self, fields, prefix):
+        items = []
+        for field in fields:
+            if isinstance(field, Nested):
+                nested_prefix = f'{prefix}{field.prefix}__' if field.prefix else prefix
+                expression = self._compile_object(field.fields, nested_prefix)
+                if field.null_column:
+                    index = self._column(nested_prefix + field.null_column)
+                    expression = f'(None if row[{index}] is None else {expression})'
+            elif isinstance(field, Computed):
+                args = ', '.join(f'row[{self._column(prefix + column)}]' for column in field.columns)
+                expression = f'{self._converter(field.convert)}({args})'
+            else:
+                index = self._column(prefix + field.column)
+                expression = f'row[{index}]'
+                if field.convert is not None:
+                    name = self._converter(field.convert)
+                    expression = f'(None if row[{index}] is None else {name}(row[{index}]))'
+            items.append(f'{field.name!r}: {expression}')
+        return '{' + ', '.join(items) + '}'
+
+    def bind(self, context=None):
+        """
+        Retorna a função ``row -> dict`` com os conversores resolvidos para o contexto.
+        """
+        context = context or {}
+        return self._build(*(factory(context) for factory in self.converters))
+
+    def values_list(self, queryset):
+        return queryset.values_list(*self.columns)
+
+    def serialize_rows(self, rows, context=None):
+        with serializer_timer('CompiledReader'):
+            build = self.bind(context)
+            return [build(row) for row in rows]
+
+    def serialize(self, queryset, context=None):
+        # Materializa antes para o tempo de banco não contar como serialização
+        return self.serialize_rows(list(self.values_list(queryset)), context)
@@ -0,0 +1,177 @@
+"""
+Roteamento de leituras para réplicas (``DATABASE_REPLICAS``).
+
+- Só requisições com método seguro (GET/HEAD/OPTIONS) leem das réplicas; fora
+  de requisições (commands, jobs) tudo vai para o ``default``.
+- Read-your-writes: depois de uma escrita o cliente fica fixado no primário por
+  ``REPLICA_PIN_SECONDS`` — pelo cookie ``REPLICA_PIN_COOKIE`` (navegador) e por
+  um marcador no cache por usuário (apps/clientes JWT que não guardam cookies).
+  Escritas e transações abertas no meio da requisição também fixam as leituras
+  seguintes no primário.
+- Réplicas com atraso acima de ``REPLICA_MAX_LAG_SECONDS`` (medido por
+  ``pg_last_xact_replay_timestamp``) ou fora do ar são descartadas até a próxima
+  verificação (``REPLICA_LAG_CHECK_INTERVAL``). A verificação roda em uma
+  thread de cada worker, nunca dentro de uma requisição.
+
+O estado da requisição fica em um ``ContextVar`` preenchido pelo
+``ReplicaRoutingMiddleware``.
+"""
+import logging
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from .instrumentation import current_request, get_request_user
+
+logger = logging.getLogger(__name__)
+
+routing_state = ContextVar('db_routing_state', default=None)
+
+LAG_SQL = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def pin_cache_key(user_id):
+    return f'db:primary-pin:{user_id}'
+
+
+class RoutingState:
+    """
+    Decisão de roteamento da requisição atual.
+    """
+    __slots__ = ('use_replica', 'wrote', 'user_checked')
+
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.wrote = False
+        self.user_checked = False
+
+    def pin_to_primary(self):
+        self.use_replica = False
+
+
+class ReplicaHealth:
+    """
+    Atraso das réplicas, medido a cada ``REPLICA_LAG_CHECK_INTERVAL`` segundos
+    por uma thread do processo (iniciada no primeiro ``choose()``, de novo
+    depois de um fork). Até a primeira medição as leituras ficam no primário.
+    A verificação usa o cursor do driver, com conexões próprias da thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.healthy = []
+        self.lag = {}
+
+    def measure(self, alias):
+        connection = connections[alias]
+        if connection.vendor != 'postgresql':
+            return 0.0
+        connection.ensure_connection()
+        with connection.connection.cursor() as cursor:
+            cursor.execute(LAG_SQL)
+            return float(cursor.fetchone()[0])
+
+    def refresh(self):
+        from .metrics import REPLICA_LAG
+
+        healthy = []
+        for alias in settings.DATABASE_REPLICAS:
+            try:
+                lag = self.measure(alias)
+            except DatabaseError as exc:
+                logger.warning('Réplica %s indisponível: %s', alias, exc)
+                connections[alias].close()
+                lag = None
+            self.lag[alias] = lag
+            REPLICA_LAG.labels(alias).set(-1 if lag is None else lag)
+            if lag is not None and lag <= settings.REPLICA_MAX_LAG_SECONDS:
+                healthy.append(alias)
+            elif lag is not None:
+                logger.warning('Réplica %s descartada: atraso de %.1fs', alias, lag)
+        self.healthy = healthy
+
+    def run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception('Falha ao verificar as réplicas.')
+            # Como no fim de uma requisição (com pool, a conexão volta ao pool)
+            for alias in settings.DATABASE_REPLICAS:
+                connections[alias].close_if_unusable_or_obsolete()
+            time.sleep(settings.REPLICA_LAG_CHECK_INTERVAL)
+
+    def start(self):
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self.healthy = []
+            self._thread = threading.Thread(target=self.run, name='replica-health', daemon=True)
+            self._thread.start()
+            self._pid = pid
+
+    def choose(self):
+        self.start()
+        healthy = self.healthy
+        return random.choice(healthy) if healthy else None
+
+
+replica_health = ReplicaHealth()
+
+
+def user_is_pinned(state):
+    """
+    Confere o marcador de escrita recente do usuário assim que ele é conhecido
+    (com JWT, só depois da autenticação do DRF).
+    """
+    if state.user_checked:
+        return False
+    request = current_request.get()
+    user = get_request_user(request) if request is not None else None
+    if user is None:
+        return False
+    state.user_checked = True
+    return bool(cache.get(pin_cache_key(user.pk)))
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        # Retorna sempre um alias: com None o Django usaria o banco da instância
+        # relacionada (hint), que pode ser uma réplica
+        state = routing_state.get()
+        if state is None or not state.use_replica:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block or user_is_pinned(state):
+            state.pin_to_primary()
+            return DEFAULT_DB_ALIAS
+        return replica_health.choose() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = routing_state.get()
+        if state is not None:
+            state.wrote = True
+            state.pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplicas têm os mesmos dados do primário
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
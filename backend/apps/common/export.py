@@ -0,0 +1,189 @@
+"""
+Utilitários para exportação em streaming (CSV / NDJSON).
+
+As linhas vêm de ``values_list()``, sem instanciar models, e o resultado nunca
+fica inteiro em memória:
+
+- WSGI e comandos: ``iterator(chunk_size=...)``, cursor do lado do servidor
+  no PostgreSQL;
+- ASGI: o ``StreamingHttpResponse`` transforma um iterador síncrono em lista
+  antes de enviar, então a resposta recebe um iterador assíncrono que busca
+  cada bloco por keyset (``pk > último``) em ``sync_to_async``.
+"""
+import csv
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+DEFAULT_CHUNK_SIZE = 2000
+
+# Início de célula que planilhas (Excel, LibreOffice, Sheets) interpretam como fórmula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class _EchoBuffer:
+    """
+    Pseudo-buffer para o ``csv.writer``: devolve a linha em vez de armazená-la.
+    """
+
+    def write(self, value):
+        return value
+
+
+def parse_columns(raw, allowed, default=None):
+    """
+    Converte ``"col_a,col_b"`` em lista validada contra ``allowed``.
+
+    Retorna ``default`` (ou todas as colunas permitidas) quando ``raw`` é vazio.
+    Lança ``ValueError`` com as colunas desconhecidas.
+    """
+    if not raw:
+        return list(default or allowed)
+
+    columns = [column.strip() for column in raw.split(',') if column.strip()]
+    unknown = [column for column in columns if column not in allowed]
+    if unknown:
+        raise ValueError(f'Colunas inválidas: {", ".join(unknown)}')
+    return columns
+
+
+def iter_rows(queryset, columns, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Itera tuplas cruas do banco sem instanciar models.
+    """
+    return queryset.values_list(*columns).iterator(chunk_size=chunk_size)
+
+
+def escape_formula(value):
+    """
+    Prefixa ``'`` em textos que seriam executados como fórmula ao abrir o CSV
+    (CSV injection). Números ficam como estão.
+    """
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+class CSVEncoder:
+    def __init__(self, columns):
+        self.columns = columns
+        self.writer = csv.writer(_EchoBuffer())
+
+    def header(self):
+        return self.writer.writerow(self.columns)
+
+    def encode(self, rows):
+        writerow = self.writer.writerow
+        return ''.join(writerow([escape_formula(value) for value in row]) for row in rows)
+
+
+class NDJSONEncoder:
+    """
+    Um objeto JSON por linha.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.encoder = DjangoJSONEncoder(ensure_ascii=False)
+
+    def header(self):
+        return ''
+
+    def encode(self, rows):
+        return ''.join(f'{self.encoder.encode(dict(zip(self.columns, row)))}\n' for row in rows)
+
+
+ENCODERS = {
+    'csv': CSVEncoder,
+    'ndjson': NDJSONEncoder,
+}
+
+
+def get_encoder(columns, export_format):
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f'Formato inválido: {export_format}')
+    return ENCODERS[export_format](columns)
+
+
+def iter_export(queryset, columns, export_format='csv', chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Gerador de blocos de texto no formato escolhido (cabeçalho incluso),
+    ``chunk_size`` linhas por bloco.
+    """
+    encoder = get_encoder(columns, export_format)
+
+    def chunks():
+        header = encoder.header()
+        if header:
+            yield header
+        batch = []
+        for row in iter_rows(queryset, columns, chunk_size=chunk_size):
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                yield encoder.encode(batch)
+                batch = []
+        if batch:
+            yield encoder.encode(batch)
+
+    return chunks()
+
+
+def fetch_chunk(queryset, columns, after, chunk_size):
+    """
+    Próximo bloco do keyset: tuplas ``(pk, *colunas)`` com pk depois de ``after``.
+    """
+    if after is not None:
+        queryset = queryset.filter(pk__gt=after)
+    return list(queryset.order_by('pk').values_list('pk', *columns)[:chunk_size])
+
+
+def aiter_export(queryset, columns, export_format='csv', chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Versão assíncrona do ``iter_export`` (ASGI): um SELECT por bloco, em ordem
+    de pk, sem cursor aberto entre um bloco e outro.
+    """
+    encoder = get_encoder(columns, export_format)
+
+    async def chunks():
+        header = encoder.header()
+        if header:
+            yield header
+        after = None
+        while True:
+            rows = await sync_to_async(fetch_chunk)(queryset, columns, after, chunk_size)
+            if not rows:
+                return
+            after = rows[-1][0]
+            yield encoder.encode(row[1:] for row in rows)
+            if len(rows) < chunk_size:
+                return
+
+    return chunks()
+
+
+def is_asgi_request(request):
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+def streaming_export_response(queryset, columns, export_format='csv', filename='export',
+                              chunk_size=DEFAULT_CHUNK_SIZE, asynchronous=False):
+    """
+    Monta um ``StreamingHttpResponse`` para o queryset informado. Sob ASGI
+    passe ``asynchronous=True`` (ver ``is_asgi_request``).
+    """
+    make_chunks = aiter_export if asynchronous else iter_export
+    response = StreamingHttpResponse(
+        make_chunks(queryset, columns, export_format, chunk_size=chunk_size),
+        content_type=EXPORT_FORMATS[export_format],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    # Evita que proxies (nginx/caddy) acumulem a resposta inteira
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,267 @@
+"""
+Suporte a ``Idempotency-Key`` em escritas da API (POST).
+
+O cliente manda um identificador único por operação no header
+``Idempotency-Key``; retentativas com a mesma chave recebem a resposta
+guardada da primeira execução, sem rodar a view de novo (header
+``Idempotent-Replayed: true``). A chave vale por usuário e endpoint e fica
+guardada por ``IDEMPOTENCY_TTL_SECONDS``.
+
+- mesma chave com outro corpo: 422;
+- mesma chave enquanto a original ainda executa: 409 (``Retry-After``);
+- respostas 5xx e exceções não ficam guardadas: a retentativa executa de novo.
+
+As respostas ficam no cache compartilhado (Redis): a retentativa custa uma
+leitura. Com ``IDEMPOTENCY_STORE=db``, com cache local ao processo (LocMem,
+que não vê a chave gravada por outro worker) ou se o cache falhar, vão para a
+tabela ``IdempotencyKey`` (limpa por ``manage.py purge_idempotency_keys``).
+
+Uso, no método da view DRF (depois da autenticação)::
+
+    @idempotent
+    def post(self, request, *args, **kwargs):
+        ...
+"""
+import functools
+import hashlib
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, router, transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache import is_shared_cache
+from .models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+# Queries do DatabaseStore em uma requisição nova (leitura, BEGIN e limpeza da
+# chave expirada, BEGIN e trava, resposta); somar ao ``query_budget`` das views
+# decoradas
+DATABASE_STORE_QUERIES = 6
+
+IDEMPOTENCY_KEY_PARAMETER = OpenApiParameter(
+    HEADER,
+    str,
+    OpenApiParameter.HEADER,
+    description=(
+        'Identificador único da operação (ex.: UUID). Retentativas com a mesma chave '
+        'devolvem a resposta original sem executar de novo.'
+    ),
+)
+
+
+def scope_key(request, key):
+    """
+    Chave guardada: usuário, método, endpoint e a chave do cliente.
+    """
+    user_id = getattr(request.user, 'id', None)
+    raw = f'{user_id}:{request.method}:{request.path}:{key}'
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def request_fingerprint(request):
+    digest = hashlib.sha256(f'{request.method}:{request.get_full_path()}:'.encode())
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+# =============================================================================
+# Armazenamento: tuplas (fingerprint, status, content-type, corpo); status
+# None marca a requisição original em andamento
+# =============================================================================
+
+class CacheStore:
+    """
+    Um único item por chave: ``add()`` trava (atômico no Redis) e ``set()``
+    troca a trava pela resposta.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def cache_key(self, key):
+        return f'common:idempotency:v1:{key}'
+
+    def get(self, key):
+        return self.backend.get(self.cache_key(key))
+
+    def lock(self, key, fingerprint):
+        return self.backend.add(self.cache_key(key), (fingerprint, None, '', b''), settings.IDEMPOTENCY_LOCK_SECONDS)
+
+    def save(self, key, stored):
+        self.backend.set(self.cache_key(key), stored, settings.IDEMPOTENCY_TTL_SECONDS)
+
+    def release(self, key):
+        self.backend.delete(self.cache_key(key))
+
+
+class DatabaseStore:
+    """
+    Tabela ``IdempotencyKey``; a trava é o INSERT na chave única. Tudo no
+    banco de escrita (uma réplica atrasada não veria a trava).
+    """
+
+    def queryset(self):
+        return IdempotencyKey.objects.using(router.db_for_write(IdempotencyKey))
+
+    def get(self, key):
+        row = self.queryset().filter(key=key, expires_at__gt=timezone.now()).values_list(
+            'fingerprint', 'status_code', 'content_type', 'body'
+        ).first()
+        if row is None:
+            return None
+        fingerprint, status_code, content_type, body = row
+        return fingerprint, status_code, content_type, bytes(body)
+
+    def lock(self, key, fingerprint):
+        now = timezone.now()
+        queryset = self.queryset()
+        queryset.filter(key=key, expires_at__lte=now).delete()
+        try:
+            with transaction.atomic(using=queryset.db):
+                queryset.create(
+                    key=key,
+                    fingerprint=fingerprint,
+                    expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+                )
+        except IntegrityError:
+            return False
+        return True
+
+    def save(self, key, stored):
+        # Cria a linha quando a trava ficou em outro armazenamento (cache que
+        # falhou depois de travar, ver FallbackStore)
+        fingerprint, status_code, content_type, body = stored
+        values = {
+            'fingerprint': fingerprint,
+            'status_code': status_code,
+            'content_type': content_type,
+            'body': body,
+            'expires_at': timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+        }
+        queryset = self.queryset()
+        if not queryset.filter(key=key).update(**values):
+            queryset.create(key=key, **values)
+
+    def release(self, key):
+        self.queryset().filter(key=key).delete()
+
+
+class FallbackStore:
+    """
+    Cache com o banco como reserva quando o cache falha (ex.: Redis fora).
+    """
+
+    def __init__(self, primary, fallback):
+        self.primary = primary
+        self.fallback = fallback
+
+    def call(self, name, *args):
+        try:
+            return getattr(self.primary, name)(*args)
+        except Exception:
+            logger.warning('Cache indisponível para Idempotency-Key (%s); usando o banco.', name, exc_info=True)
+            return getattr(self.fallback, name)(*args)
+
+    def get(self, key):
+        stored = self.call('get', key)
+        if stored is not None and stored[1] is None:
+            # Trava no cache sem resposta: se o cache falhou no save, a
+            # resposta foi para o banco
+            return self.fallback.get(key) or stored
+        return stored
+
+    def lock(self, key, fingerprint):
+        return self.call('lock', key, fingerprint)
+
+    def save(self, key, stored):
+        self.call('save', key, stored)
+
+    def release(self, key):
+        self.call('release', key)
+
+
+def get_store():
+    if settings.IDEMPOTENCY_STORE == 'db' or not is_shared_cache():
+        return DatabaseStore()
+    return FallbackStore(CacheStore(cache), DatabaseStore())
+
+
+# =============================================================================
+# Decorator
+# =============================================================================
+
+def replay(stored):
+    _, status_code, content_type, body = stored
+    response = HttpResponse(body, status=status_code, content_type=content_type)
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def idempotent(handler):
+    """
+    Decorator para métodos de views DRF (``post``/``create``). Sem o header,
+    a view roda normalmente.
+    """
+    @functools.wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return handler(view, request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {'detail': f'{HEADER} deve ter entre 1 e {MAX_KEY_LENGTH} caracteres.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        store = get_store()
+        scoped = scope_key(request, key)
+        fingerprint = request_fingerprint(request)
+        stored = store.get(scoped)
+        if stored is None:
+            if store.lock(scoped, fingerprint):
+                return execute(view, request, args, kwargs, handler, store, scoped, fingerprint)
+            # Outra requisição travou a chave entre a leitura e a trava
+            stored = store.get(scoped) or (fingerprint, None, '', b'')
+
+        if stored[0] != fingerprint:
+            return Response(
+                {'detail': f'{HEADER} já usada com outra requisição.'},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        if stored[1] is None:
+            return Response(
+                {'detail': f'Requisição com este {HEADER} ainda em processamento.'},
+                status=status.HTTP_409_CONFLICT,
+                headers={'Retry-After': '1'},
+            )
+        return replay(stored)
+
+    return wrapper
+
+
+def execute(view, request, args, kwargs, handler, store, scoped, fingerprint):
+    try:
+        response = handler(view, request, *args, **kwargs)
+    except Exception:
+        store.release(scoped)
+        raise
+    if response.status_code >= 500:
+        store.release(scoped)
+        return response
+
+    # Renderiza aqui para guardar os bytes; o DRF finaliza de novo sem efeito
+    response = view.finalize_response(request, response, *args, **kwargs)
+    response.render()
+    store.save(scoped, (fingerprint, response.status_code, response.get('Content-Type', ''), response.content))
+    return response
@@ -0,0 +1,172 @@
+"""
+Instrumentação por requisição: queries, tempo de banco, cache e serializers.
+
+As métricas da requisição atual ficam em um ``ContextVar`` (propaga entre o
+middleware assíncrono e as views síncronas executadas via ``sync_to_async``).
+O wrapper de execução do banco é instalado em cada nova conexão pelo sinal
+``connection_created`` (ver ``CommonConfig.ready``).
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject, empty
+
+from .tracing import NOOP_SPAN, SPAN_KIND_CLIENT, start_span
+
+current_metrics = ContextVar('current_request_metrics', default=None)
+current_request = ContextVar('current_request', default=None)
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """
+    Requisição executou mais queries do que o orçamento declarado pela view.
+    """
+
+
+class RequestMetrics:
+    """
+    Contadores de uma requisição.
+    """
+    __slots__ = (
+        'started_at', 'queries', 'db_time', 'cache_hits', 'cache_misses',
+        'serializer_time', '_serializer_depth',
+    )
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.serializer_time = 0.0
+        self._serializer_depth = 0
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started_at
+
+    def server_timing(self):
+        """
+        Valor do header ``Server-Timing`` (durações em milissegundos).
+        """
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries"',
+            f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            f'serializer;dur={self.serializer_time * 1000:.2f}',
+            f'total;dur={self.elapsed * 1000:.2f}',
+        ])
+
+
+def db_execute_wrapper(execute, sql, params, many, context):
+    """
+    Wrapper de ``connection.execute_wrappers`` que contabiliza cada query e
+    registra as lentas (ver apps.common.slow_queries).
+    """
+    span = start_span('db.query', SPAN_KIND_CLIENT)
+    if span is not NOOP_SPAN:
+        span.set_attribute('db.system', context['connection'].vendor)
+        span.set_attribute('db.operation', sql.lstrip().split(' ', 1)[0].upper())
+        span.set_attribute('db.statement', sql[:2000])
+        span.set_attribute('db.executemany', many)
+
+    start = time.perf_counter()
+    try:
+        with span:
+            result = execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        metrics = current_metrics.get()
+        if metrics is not None:
+            metrics.queries += 1
+            metrics.db_time += duration
+
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    if threshold and duration * 1000 >= threshold:
+        from .slow_queries import record_slow_query
+        record_slow_query(sql, params, many, context, duration)
+    return result
+
+
+def get_request_user(request):
+    """
+    Usuário autenticado da requisição, se já resolvido (sessão avaliada ou
+    autenticação do DRF, que repassa o usuário ao ``HttpRequest``). Nunca
+    dispara queries.
+    """
+    user = request.__dict__.get('user')
+    if isinstance(user, SimpleLazyObject):
+        user = None if user._wrapped is empty else user._wrapped
+    if user is None or not getattr(user, 'is_authenticated', False):
+        return None
+    return user
+
+
+def install_db_instrumentation(sender, connection, **kwargs):
+    """
+    Receptor de ``connection_created``: registra o wrapper uma vez por conexão.
+    """
+    if db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_execute_wrapper)
+
+
+def record_cache(hit, count=1):
+    metrics = current_metrics.get()
+    if metrics is None:
+        return
+    if hit:
+        metrics.cache_hits += count
+    else:
+        metrics.cache_misses += count
+
+
+@contextmanager
+def serializer_timer(name='serializer'):
+    """
+    Mede o tempo de serialização (e abre o span ``serializer``). Chamadas
+    aninhadas (serializer dentro de serializer) contam apenas uma vez.
+    """
+    metrics = current_metrics.get()
+    if metrics is None:
+        with start_span('serializer', **{'serializer.class': name}):
+            yield
+        return
+    if metrics._serializer_depth:
+        yield
+        return
+
+    metrics._serializer_depth += 1
+    start = time.perf_counter()
+    try:
+        with start_span('serializer', **{'serializer.class': name}):
+            yield
+    finally:
+        metrics._serializer_depth -= 1
+        metrics.serializer_time += time.perf_counter() - start
+
+
+def query_budget(max_queries):
+    """
+    Declara o número máximo de queries de uma view (classe ou função).
+
+        @query_budget(3)
+        class CurrentUserView(generics.RetrieveUpdateAPIView): ...
+
+    Em views de classe também é possível definir o atributo ``query_budget``.
+    """
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def get_view_query_budget(view_func):
+    """
+    Orçamento declarado na função da view ou na classe (``as_view()`` do DRF
+    expõe a classe em ``view_func.cls``).
+    """
+    budget = getattr(view_func, 'query_budget', None)
+    if budget is None:
+        budget = getattr(getattr(view_func, 'cls', None), 'query_budget', None)
+    return budget
@@ -0,0 +1,59 @@
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from apps.common.boot import (
+    disk_migrations, pending_migrations, read_static_fingerprint, static_fingerprint, write_static_fingerprint,
+)
+from apps.common.openapi import artifact_path, generate_schema, write_artifact
+
+
+class Command(BaseCommand):
+    help = (
+        'Prepara o container (entrypoint.sh): roda migrate, collectstatic e a geração '
+        'do schema OpenAPI só quando há migrações pendentes, os arquivos estáticos '
+        'mudaram ou o código da API mudou.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Roda todas as etapas sempre.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        force = options['force'] or not settings.BOOT_FAST_PATH
+        verbosity = options['verbosity']
+        started = time.perf_counter()
+
+        start = time.perf_counter()
+        pending = None if force else pending_migrations(options['database'])
+        if pending == []:
+            self.report('migrate', start, f'pulado, {len(disk_migrations())} migrações já aplicadas')
+        else:
+            call_command('migrate', interactive=False, database=options['database'], verbosity=verbosity)
+            self.report('migrate', start, 'forçado' if force else f'{len(pending)} pendentes')
+
+        start = time.perf_counter()
+        fingerprint, count = static_fingerprint()
+        if not force and fingerprint == read_static_fingerprint():
+            self.report('collectstatic', start, f'pulado, {count} arquivos sem mudança')
+        else:
+            call_command('collectstatic', interactive=False, verbosity=verbosity)
+            write_static_fingerprint(fingerprint)
+            self.report('collectstatic', start, f'{count} arquivos, fingerprint {fingerprint[:12]}')
+
+        # Schema OpenAPI da versão atual do código (apps.common.openapi)
+        start = time.perf_counter()
+        path = artifact_path()
+        if not force and path.exists():
+            self.report('openapi', start, f'pulado, {path.name} já gerado')
+        else:
+            write_artifact(generate_schema())
+            self.report('openapi', start, f'{path.name} gerado')
+
+        self.report('boot', started, 'total')
+
+    def report(self, step, start, detail):
+        self.stdout.write(f'{step}: {detail} ({(time.perf_counter() - start) * 1000:.0f} ms)')
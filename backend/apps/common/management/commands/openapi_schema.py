@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.common.openapi import artifact_path, dump_schema, generate_schema, schema_version, write_artifact
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera o schema OpenAPI pré-computado servido em /api/schema/. Com --check '
+        'compara o artefato com o gerador (falha se divergir, para CI).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Não grava; sai com erro se o artefato faltar ou divergir do gerador.')
+
+    def handle(self, *args, **options):
+        path = artifact_path()
+        schema = generate_schema()
+
+        if options['check']:
+            if not path.exists():
+                raise CommandError(f'Schema OpenAPI {schema_version()} não gerado ({path}).')
+            if path.read_bytes() != dump_schema(schema):
+                raise CommandError(f'{path} diverge do gerador; rode manage.py openapi_schema.')
+            self.stdout.write(self.style.SUCCESS(f'{path} em dia com o gerador.'))
+            return
+
+        write_artifact(schema)
+        self.stdout.write(f'Schema OpenAPI gravado em {path}')
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.common.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = 'Apaga as chaves de idempotência expiradas guardadas no banco (IDEMPOTENCY_STORE=db ou reserva).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        total = 0
+        while True:
+            ids = list(
+                IdempotencyKey.objects.filter(expires_at__lte=now).values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            total += IdempotencyKey.objects.filter(pk__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f'{total} chaves expiradas removidas.'))
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.common.db_router import replica_health
+
+
+class Command(BaseCommand):
+    help = 'Mostra o atraso de replicação de cada réplica e se ela recebe leituras.'
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            self.stdout.write('Nenhuma réplica configurada (DB_REPLICAS).')
+            return
+
+        replica_health.refresh()
+        for alias in settings.DATABASE_REPLICAS:
+            database = settings.DATABASES[alias]
+            lag = replica_health.lag.get(alias)
+            address = f'{database["HOST"]}:{database["PORT"]}'
+            if lag is None:
+                self.stdout.write(self.style.ERROR(f'{alias} ({address}): indisponível'))
+            elif alias in replica_health.healthy:
+                self.stdout.write(self.style.SUCCESS(f'{alias} ({address}): atraso {lag:.2f}s, recebendo leituras'))
+            else:
+                self.stdout.write(self.style.WARNING(
+                    f'{alias} ({address}): atraso {lag:.2f}s, acima de '
+                    f'{settings.REPLICA_MAX_LAG_SECONDS}s (descartada)'
+                ))
@@ -0,0 +1,79 @@
+import argparse
+import logging
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.common.server import Arbiter, Worker, available_cpus, logger, parse_bind
+
+
+class Command(BaseCommand):
+    help = (
+        'Servidor de produção: N workers daphne em um socket compartilhado, com '
+        'reciclagem por requisições/memória e reload sem downtime (SIGHUP).'
+    )
+    # As checagens rodam uma vez no boot do container (manage.py boot); repeti-las
+    # em cada worker custa ~0,3 s e importa o Pillow (ImageField)
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('application', nargs='?', default=settings.ASGI_APPLICATION)
+        parser.add_argument('--bind', default=settings.SERVER_BIND, help='host:porta (IPv4)')
+        parser.add_argument('--workers', type=int, default=settings.SERVER_WORKERS or available_cpus(),
+                            help='Padrão: CPUs disponíveis ao processo (afinidade e cota do cgroup).')
+        parser.add_argument('--backlog', type=int, default=settings.SERVER_BACKLOG)
+        parser.add_argument('--max-requests', type=int, default=settings.SERVER_MAX_REQUESTS,
+                            help='Recicla o worker após N requisições HTTP (0 desativa).')
+        parser.add_argument('--max-requests-jitter', type=int, default=settings.SERVER_MAX_REQUESTS_JITTER,
+                            help='Acréscimo aleatório a --max-requests para os workers não reciclarem juntos.')
+        parser.add_argument('--max-memory-mb', type=int, default=settings.SERVER_MAX_MEMORY_MB,
+                            help='Recicla o worker quando o RSS passa deste valor (0 desativa).')
+        parser.add_argument('--graceful-timeout', type=int, default=settings.SERVER_GRACEFUL_TIMEOUT,
+                            help='Segundos para terminar as requisições em andamento ao encerrar um worker.')
+        # Uso interno: processos iniciados pelo mestre
+        parser.add_argument('--worker-fd', type=int, help=argparse.SUPPRESS)
+        parser.add_argument('--control-fd', type=int, help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if not logger.handlers:
+            handler = logging.StreamHandler(sys.stderr)
+            handler.setFormatter(logging.Formatter('%(asctime)s [%(process)d] [%(levelname)s] %(message)s'))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+
+        if options['worker_fd'] is not None:
+            Worker(
+                options['application'], options['worker_fd'], options['control_fd'],
+                max_requests=options['max_requests'],
+                max_memory_mb=options['max_memory_mb'],
+                graceful_timeout=options['graceful_timeout'],
+                verbosity=options['verbosity'],
+            ).run()
+            return
+
+        if options['workers'] < 1:
+            raise CommandError('--workers deve ser pelo menos 1.')
+        try:
+            parse_bind(options['bind'])
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+        # Os workers recebem as mesmas opções; --max-requests (com jitter) é
+        # definido pelo mestre para cada worker
+        worker_argv = [
+            sys.executable, sys.argv[0], 'serve', options['application'],
+            '--max-memory-mb', str(options['max_memory_mb']),
+            '--graceful-timeout', str(options['graceful_timeout']),
+            '--verbosity', str(options['verbosity']),
+        ]
+        arbiter = Arbiter(
+            options['bind'], options['workers'], worker_argv,
+            backlog=options['backlog'],
+            max_requests=options['max_requests'],
+            max_requests_jitter=options['max_requests_jitter'],
+            graceful_timeout=options['graceful_timeout'],
+        )
+        arbiter.run()
+        if arbiter.exit_code:
+            raise CommandError('Workers não conseguiram subir; veja o log acima.', returncode=arbiter.exit_code)
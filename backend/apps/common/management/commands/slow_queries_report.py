@@ -0,0 +1,91 @@
+import json
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from apps.common.slow_queries import normalize_sql
+
+
+class Command(BaseCommand):
+    help = 'Agrupa o log de queries lentas por fingerprint e ordena pelo tempo total.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=None, help='Log JSONL (padrão: SLOW_QUERY_LOG_FILE).')
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--since', help='Considera apenas entradas a partir desta data (ISO 8601).')
+        parser.add_argument('--view', help='Filtra por nome da view.')
+        parser.add_argument('--json', action='store_true', help='Saída em JSON.')
+
+    def handle(self, *args, **options):
+        path = options['file'] or settings.SLOW_QUERY_LOG_FILE
+        since = parse_datetime(options['since']) if options['since'] else None
+        if options['since'] and since is None:
+            raise CommandError('Data inválida em --since.')
+
+        groups = defaultdict(lambda: {
+            'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+            'views': Counter(), 'sql': None, 'plan': None,
+        })
+        try:
+            fp = open(path, encoding='utf-8')
+        except FileNotFoundError:
+            raise CommandError(f'Arquivo não encontrado: {path}')
+
+        with fp:
+            for line in fp:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if since is not None and parse_datetime(entry['timestamp']) < since:
+                    continue
+                if options['view'] and entry.get('view') != options['view']:
+                    continue
+
+                group = groups[entry['fingerprint']]
+                group['count'] += 1
+                group['total_ms'] += entry['duration_ms']
+                if entry['duration_ms'] >= group['max_ms']:
+                    group['max_ms'] = entry['duration_ms']
+                    group['sql'] = entry['sql']
+                group['views'][entry.get('view') or '-'] += 1
+                if entry.get('plan') is not None:
+                    group['plan'] = entry['plan']
+
+        ranking = sorted(groups.items(), key=lambda item: item[1]['total_ms'], reverse=True)
+        ranking = ranking[:options['limit']]
+
+        if options['json']:
+            self.stdout.write(json.dumps([
+                {
+                    'fingerprint': key,
+                    'count': group['count'],
+                    'total_ms': round(group['total_ms'], 3),
+                    'mean_ms': round(group['total_ms'] / group['count'], 3),
+                    'max_ms': group['max_ms'],
+                    'views': dict(group['views'].most_common()),
+                    'query': normalize_sql(group['sql']),
+                    'plan': group['plan'],
+                }
+                for key, group in ranking
+            ], indent=2, ensure_ascii=False))
+            return
+
+        if not ranking:
+            self.stdout.write('Nenhuma query lenta registrada.')
+            return
+
+        for key, group in ranking:
+            mean = group['total_ms'] / group['count']
+            views = ', '.join(f'{view} ({count})' for view, count in group['views'].most_common(3))
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{key}  total={group["total_ms"]:.1f}ms  n={group["count"]}  '
+                f'média={mean:.1f}ms  máx={group["max_ms"]:.1f}ms'
+            ))
+            self.stdout.write(f'  views: {views}')
+            self.stdout.write(f'  {normalize_sql(group["sql"])[:500]}')
+            if group['plan'] is not None:
+                self.stdout.write('  plano: disponível (use --json)')
+            self.stdout.write('')
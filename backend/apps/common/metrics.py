@@ -0,0 +1,153 @@
+"""
+Métricas no formato Prometheus (exportadas em ``/metrics``).
+
+Os contadores ficam na memória do processo. Com vários workers, defina
+``PROMETHEUS_MULTIPROC_DIR`` (diretório vazio a cada boot, ver
+``entrypoint.sh``) para que o endpoint agregue os arquivos de todos os
+processos. As métricas do pool de conexões (``db_pool_*``) são lidas na hora da
+coleta e, nesse modo, refletem apenas o processo que respondeu.
+"""
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Latência das requisições HTTP por rota.',
+    ['route', 'method', 'status'],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    'http_requests_in_progress',
+    'Requisições HTTP em andamento.',
+    multiprocess_mode='livesum',
+)
+DB_QUERY_TIME = Histogram(
+    'db_query_duration_seconds',
+    'Tempo total de banco por requisição, por rota.',
+    ['route'],
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERIES = Counter(
+    'db_queries',
+    'Queries executadas, por rota.',
+    ['route'],
+)
+CACHE_REQUESTS = Counter(
+    'cache_requests',
+    'Leituras de cache por resultado (hit/miss).',
+    ['result'],
+)
+PASSWORD_HASH_TIME = Histogram(
+    'auth_password_hash_duration_seconds',
+    'Tempo de verificação de senha no login.',
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+DB_CONNECTIONS = Counter(
+    'db_connections_opened',
+    'Conexões abertas pelo Django (com pool: conexões retiradas do pool).',
+    ['alias'],
+)
+REPLICA_LAG = Gauge(
+    'db_replica_lag_seconds',
+    'Atraso de replicação medido por réplica (-1 = indisponível).',
+    ['alias'],
+    multiprocess_mode='max',
+)
+CHANNEL_MESSAGES = Counter(
+    'channel_layer_messages',
+    'Mensagens enviadas/recebidas pela channel layer.',
+    ['operation'],
+)
+
+
+def observe_request(route, method, status, elapsed, metrics=None):
+    """
+    Registra uma requisição finalizada (``metrics`` é o ``RequestMetrics`` dela).
+    """
+    REQUEST_LATENCY.labels(route, method, status).observe(elapsed)
+    if metrics is None:
+        return
+    DB_QUERY_TIME.labels(route).observe(metrics.db_time)
+    if metrics.queries:
+        DB_QUERIES.labels(route).inc(metrics.queries)
+    if metrics.cache_hits:
+        CACHE_REQUESTS.labels('hit').inc(metrics.cache_hits)
+    if metrics.cache_misses:
+        CACHE_REQUESTS.labels('miss').inc(metrics.cache_misses)
+
+
+class DatabasePoolCollector:
+    """
+    Estatísticas do ``psycopg_pool`` de cada banco configurado com ``pool``.
+    """
+    GAUGES = (
+        ('pool_size', 'db_pool_size', 'Conexões abertas no pool.'),
+        ('pool_available', 'db_pool_available', 'Conexões livres no pool.'),
+        ('pool_max', 'db_pool_max_size', 'Tamanho máximo do pool.'),
+        ('requests_waiting', 'db_pool_requests_waiting', 'Requisições aguardando conexão.'),
+    )
+    COUNTERS = (
+        ('connections_num', 'db_pool_connections_opened', 'Conexões físicas abertas pelo pool.'),
+        ('connections_lost', 'db_pool_connections_lost', 'Conexões descartadas na verificação.'),
+        ('requests_num', 'db_pool_requests', 'Conexões retiradas do pool.'),
+        ('requests_queued', 'db_pool_requests_queued', 'Retiradas que precisaram esperar.'),
+        ('requests_errors', 'db_pool_requests_errors', 'Retiradas com erro (timeout).'),
+    )
+
+    def collect(self):
+        from django.db import connections
+
+        gauges = {key: GaugeMetricFamily(name, doc, labels=['alias']) for key, name, doc in self.GAUGES}
+        counters = {key: CounterMetricFamily(name, doc, labels=['alias']) for key, name, doc in self.COUNTERS}
+        wait = CounterMetricFamily(
+            'db_pool_wait_seconds', 'Tempo total de espera por conexão.', labels=['alias'],
+        )
+
+        for alias in connections:
+            pool = getattr(connections[alias], 'pool', None)
+            if pool is None:
+                continue
+            stats = pool.get_stats()
+            for key, family in (*gauges.items(), *counters.items()):
+                family.add_metric([alias], stats.get(key, 0))
+            wait.add_metric([alias], stats.get('requests_wait_ms', 0) / 1000)
+
+        yield from gauges.values()
+        yield from counters.values()
+        yield wait
+
+
+REGISTRY.register(DatabasePoolCollector())
+
+
+def record_connection(sender, connection, **kwargs):
+    """
+    Receptor de ``connection_created`` (ver ``CommonConfig.ready``).
+    """
+    DB_CONNECTIONS.labels(connection.alias).inc()
+
+
+def render_latest():
+    """
+    Retorna ``(conteúdo, content_type)`` com as métricas de todos os processos.
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(DatabasePoolCollector())
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,500 @@
+import logging
+import random
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.core.handlers.exception import convert_exception_to_response
+from django.http import HttpResponseBadRequest
+from django.urls import Resolver404, resolve
+from django.utils.module_loading import import_string
+
+from . import metrics as prometheus
+from .instrumentation import (
+    QueryBudgetExceeded,
+    RequestMetrics,
+    current_metrics,
+    current_request,
+    get_request_user,
+    get_view_query_budget,
+)
+from .db_router import RoutingState, pin_cache_key, routing_state
+from .tracing import SPAN_KIND_SERVER, inject, trace_context
+from .profiling import (
+    DeterministicProfiler,
+    SamplingProfiler,
+    SlowestProfiles,
+    save_profile,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class TracingMiddleware:
+    """
+    Abre o span raiz da requisição (apps.common.tracing), continuando o trace do
+    header ``traceparent`` quando enviado, e devolve o ``traceparent`` na resposta
+    para correlacionar logs do cliente.
+
+    Fica em primeiro lugar para que o span cubra todos os middlewares.
+    Desativado sem ``TRACING_ENABLED``: nenhum trace por requisição nem
+    ``traceparent`` na resposta.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.TRACING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def start(self, request):
+        return trace_context(
+            f'{request.method} {request.path}',
+            traceparent=request.headers.get('traceparent'),
+            kind=SPAN_KIND_SERVER,
+            **{'http.request.method': request.method, 'url.path': request.path},
+        )
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        with self.start(request) as span:
+            response = self.get_response(request)
+            return self.finish(request, response, span)
+
+    async def __acall__(self, request):
+        with self.start(request) as span:
+            response = await self.get_response(request)
+            return self.finish(request, response, span)
+
+    def finish(self, request, response, span):
+        resolver_match = getattr(request, 'resolver_match', None)
+        if resolver_match is not None:
+            span.set_name(f'{request.method} {resolver_match.route}')
+            span.set_attribute('http.route', resolver_match.route)
+            span.set_attribute('django.view', resolver_match.view_name)
+        span.set_attribute('http.response.status_code', response.status_code)
+        if response.status_code >= 500:
+            span.set_error(f'HTTP {response.status_code}')
+        response['traceparent'] = inject()
+        return response
+
+
+class QueryBudgetMiddleware:
+    """
+    Mede queries, tempo de banco, cache e serialização de cada requisição.
+
+    - Envia as medições no header ``Server-Timing`` (a todos com
+      ``SERVER_TIMING_HEADER``, senão só a usuários staff).
+    - Compara o número de queries com o orçamento da view (``query_budget``)
+      ou ``QUERY_BUDGET_DEFAULT``. Acima do orçamento: exceção quando
+      ``QUERY_BUDGET_RAISE`` (padrão nos testes), senão log de aviso.
+
+    Deve ser o primeiro middleware para contabilizar a requisição inteira.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        request_token = current_request.set(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(request_token)
+            current_metrics.reset(token)
+        return self.finalize(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        request_token = current_request.set(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request.reset(request_token)
+            current_metrics.reset(token)
+        return self.finalize(request, response, metrics)
+
+    def get_budget(self, request):
+        resolver_match = getattr(request, 'resolver_match', None)
+        budget = get_view_query_budget(resolver_match.func) if resolver_match else None
+        return budget if budget is not None else settings.QUERY_BUDGET_DEFAULT
+
+    def show_timing(self, request):
+        if settings.SERVER_TIMING_HEADER:
+            return True
+        user = get_request_user(request)
+        return user is not None and user.is_staff
+
+    def finalize(self, request, response, metrics):
+        if self.show_timing(request):
+            response['Server-Timing'] = metrics.server_timing()
+
+        budget = self.get_budget(request)
+        if budget is not None and metrics.queries > budget:
+            message = (
+                f'{request.method} {request.path} executou {metrics.queries} queries '
+                f'(orçamento: {budget}, banco: {metrics.db_time * 1000:.1f}ms)'
+            )
+            if settings.QUERY_BUDGET_RAISE:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Alimenta as métricas Prometheus (apps.common.metrics): latência por rota,
+    requisições em andamento, tempo de banco e cache.
+
+    Fica logo após o ``QueryBudgetMiddleware`` para reaproveitar as medições
+    da requisição.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        start = time.perf_counter()
+        prometheus.REQUESTS_IN_PROGRESS.inc()
+        try:
+            response = self.get_response(request)
+        finally:
+            prometheus.REQUESTS_IN_PROGRESS.dec()
+        self.observe(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        prometheus.REQUESTS_IN_PROGRESS.inc()
+        try:
+            response = await self.get_response(request)
+        finally:
+            prometheus.REQUESTS_IN_PROGRESS.dec()
+        self.observe(request, response, time.perf_counter() - start)
+        return response
+
+    def observe(self, request, response, elapsed):
+        resolver_match = getattr(request, 'resolver_match', None)
+        route = resolver_match.view_name if resolver_match else '<unresolved>'
+        prometheus.observe_request(
+            route,
+            request.method,
+            response.status_code,
+            elapsed,
+            current_metrics.get(),
+        )
+
+
+class MiddlewareChain:
+    """
+    Cadeia de middlewares montada como o ``BaseHandler.load_middleware`` do
+    Django, com os hooks ``process_view``/``process_exception`` coletados na
+    mesma ordem. Os middlewares precisam suportar o modo (sync/async) do handler.
+    """
+
+    def __init__(self, paths, get_response, async_mode):
+        self.view_hooks = []
+        self.exception_hooks = []
+        handler = get_response
+        for path in reversed(paths):
+            middleware = import_string(path)
+            capable = 'async_capable' if async_mode else 'sync_capable'
+            if not getattr(middleware, capable, not async_mode):
+                raise ImproperlyConfigured(f'{path} não suporta o modo {"async" if async_mode else "sync"}.')
+            try:
+                instance = middleware(handler)
+            except MiddlewareNotUsed:
+                continue
+            if hasattr(instance, 'process_template_response'):
+                raise ImproperlyConfigured(f'{path}: process_template_response não é suportado.')
+            if hasattr(instance, 'process_view'):
+                self.view_hooks.insert(0, instance.process_view)
+            if hasattr(instance, 'process_exception'):
+                self.exception_hooks.append(instance.process_exception)
+            handler = convert_exception_to_response(instance)
+        self.handler = handler
+
+
+class PathMiddlewareStack:
+    """
+    Escolhe o pipeline de middlewares pelo caminho da requisição.
+
+    - Caminhos em ``LEAN_MIDDLEWARE_PATHS`` (API com JWT) passam só por
+      ``LEAN_MIDDLEWARE``: sem sessão, CSRF, ``request.user`` nem mensagens —
+      o ``SessionAuthentication`` do DRF deixa de carregar a sessão.
+    - Os demais (admin, páginas com sessão) passam por ``FULL_MIDDLEWARE``.
+
+    Ocupa, em ``MIDDLEWARE``, o lugar dos middlewares que substitui.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        self.lean_paths = tuple(settings.LEAN_MIDDLEWARE_PATHS)
+        self.full = MiddlewareChain(settings.FULL_MIDDLEWARE, get_response, self.async_mode)
+        self.lean = MiddlewareChain(settings.LEAN_MIDDLEWARE, get_response, self.async_mode)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # Assíncrono para o Django não pagar sync_to_async no caminho enxuto
+            self.process_view = self.aprocess_view
+
+    def chain(self, request):
+        return self.lean if request.path_info.startswith(self.lean_paths) else self.full
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.chain(request).handler(request)
+
+    async def __acall__(self, request):
+        return await self.chain(request).handler(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        for hook in self.chain(request).view_hooks:
+            response = hook(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+        return None
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        for hook in self.chain(request).view_hooks:
+            if iscoroutinefunction(hook):
+                response = await hook(request, view_func, view_args, view_kwargs)
+            else:
+                response = await sync_to_async(hook, thread_sensitive=True)(
+                    request, view_func, view_args, view_kwargs,
+                )
+            if response is not None:
+                return response
+        return None
+
+    def process_exception(self, request, exception):
+        for hook in self.chain(request).exception_hooks:
+            response = hook(request, exception)
+            if response is not None:
+                return response
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Libera leituras em réplicas para métodos seguros (apps.common.db_router) e,
+    depois de uma escrita, fixa o cliente no primário por ``REPLICA_PIN_SECONDS``
+    via cookie e marcador no cache do usuário.
+
+    Desativado quando não há ``DATABASE_REPLICAS``.
+    """
+    sync_capable = True
+    async_capable = True
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def start(self, request):
+        pinned_until = request.COOKIES.get(settings.REPLICA_PIN_COOKIE, '')
+        pinned = pinned_until.isdigit() and int(pinned_until) > time.time()
+        return RoutingState(use_replica=request.method in self.safe_methods and not pinned)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        state = self.start(request)
+        token = routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        return self.finish(request, response, state)
+
+    async def __acall__(self, request):
+        state = self.start(request)
+        token = routing_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        return self.finish(request, response, state)
+
+    def finish(self, request, response, state):
+        if request.method in self.safe_methods and not state.wrote:
+            return response
+
+        seconds = settings.REPLICA_PIN_SECONDS
+        response.set_cookie(
+            settings.REPLICA_PIN_COOKIE,
+            str(int(time.time() + seconds)),
+            max_age=seconds,
+            httponly=True,
+            samesite='Lax',
+            secure=request.is_secure(),
+        )
+        user = get_request_user(request)
+        if user is not None:
+            cache.set(pin_cache_key(user.pk), True, seconds)
+        return response
+
+
+def _jwt_user(request):
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except (InvalidToken, TokenError):
+        return None
+    return result[0] if result else None
+
+
+class ProfilerMiddleware:
+    """
+    Profiling sob demanda de requisições individuais.
+
+    - Staff (sessão ou JWT) envia ``X-Profile: 1`` (amostragem) ou
+      ``X-Profile: cprofile`` — ou ``?_profile=1|cprofile`` — e o perfil é salvo em
+      ``PROFILER_DIR``; o nome do arquivo volta no header ``X-Profile-Id``.
+    - Com ``PROFILER_SAMPLE_RATE`` > 0, uma fração aleatória das requisições é
+      amostrada e apenas as ``PROFILER_KEEP_SLOWEST`` mais lentas são mantidas.
+
+    Sob ASGI a view síncrona roda na thread do ``sync_to_async`` exclusiva da
+    requisição: os dois modos perfilam só essa thread. Views assíncronas dividem
+    a thread do event loop com as outras requisições: a amostragem pode incluir
+    pilhas delas e o ``cprofile`` é recusado (400).
+
+    Fica no fim da lista de middlewares (usa ``request.user`` quando existe; no
+    pipeline enxuto da API só o JWT).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slowest = SlowestProfiles(settings.PROFILER_KEEP_SLOWEST)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def requested_mode(self, request):
+        flag = request.headers.get('X-Profile') or request.GET.get('_profile')
+        if not flag or not settings.PROFILER_ENABLED:
+            return None
+        return 'cprofile' if flag.lower() == 'cprofile' else 'sampling'
+
+    def is_staff(self, user):
+        return user is not None and user.is_authenticated and user.is_staff
+
+    def should_sample(self):
+        rate = settings.PROFILER_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        mode = self.requested_mode(request)
+        if mode and not (self.is_staff(getattr(request, 'user', None)) or self.is_staff(_jwt_user(request))):
+            mode = None
+        sampled = mode is None and self.should_sample()
+        if not mode and not sampled:
+            return self.get_response(request)
+
+        if mode == 'cprofile':
+            profiler = DeterministicProfiler()
+        else:
+            profiler = SamplingProfiler(thread_ids=[threading.get_ident()])
+
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.stop()
+        return self.finish(request, response, profiler, time.perf_counter() - start, sampled)
+
+    def is_async_view(self, request):
+        try:
+            match = resolve(request.path_info, getattr(request, 'urlconf', None))
+        except Resolver404:
+            return False
+        return iscoroutinefunction(match.func)
+
+    async def __acall__(self, request):
+        mode = self.requested_mode(request)
+        if mode and not (
+            (hasattr(request, 'auser') and self.is_staff(await request.auser()))
+            or self.is_staff(await sync_to_async(_jwt_user)(request))
+        ):
+            mode = None
+        sampled = mode is None and self.should_sample()
+        if not mode and not sampled:
+            return await self.get_response(request)
+
+        if self.is_async_view(request):
+            if mode == 'cprofile':
+                return HttpResponseBadRequest(
+                    'X-Profile: cprofile não é suportado em views assíncronas; use X-Profile: 1.'
+                )
+            thread_id = threading.get_ident()
+        else:
+            # Mesma thread em que a view síncrona vai rodar (ThreadSensitiveContext da requisição)
+            thread_id = await sync_to_async(threading.get_ident)()
+
+        if mode == 'cprofile':
+            profiler = DeterministicProfiler()
+        else:
+            profiler = SamplingProfiler(thread_ids=[thread_id])
+
+        start = time.perf_counter()
+        # O cProfile perfila a thread que chama enable(): a mesma da view
+        await sync_to_async(profiler.start)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(profiler.stop)()
+        elapsed = time.perf_counter() - start
+        # Gravação em disco fora do event loop
+        return await sync_to_async(self.finish, thread_sensitive=False)(request, response, profiler, elapsed, sampled)
+
+    def finish(self, request, response, profiler, elapsed, sampled):
+        if sampled:
+            self.slowest.offer(profiler, request, elapsed)
+        else:
+            response['X-Profile-Id'] = save_profile(profiler, request, elapsed)
+        return response
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True, verbose_name='Chave')),
+                ('fingerprint', models.CharField(max_length=64, verbose_name='Assinatura da requisição')),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Status')),
+                ('content_type', models.CharField(blank=True, max_length=100, verbose_name='Content-Type')),
+                ('body', models.BinaryField(blank=True, default=b'', verbose_name='Corpo')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='Expira em')),
+            ],
+            options={
+                'verbose_name': 'chave de idempotência',
+                'verbose_name_plural': 'chaves de idempotência',
+            },
+        ),
+    ]
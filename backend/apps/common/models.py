@@ -37,7 +37,28 @@ class TimeStampedMixin(models.Model):
         abstract = True
 
 
-class SoftDeleteManager(models.Manager):
+class SoftDeleteQuerySet(models.QuerySet):
+    """
+    Soft delete e restauração em massa: um único UPDATE, sem ``save()`` nem signals.
+    """
+
+    def touch_update(self, when=None, **values):
+        """
+        ``update()`` que também atualiza ``updated_at`` (o ``auto_now`` só vale no ``save()``).
+        """
+        if any(field.name == 'updated_at' for field in self.model._meta.concrete_fields):
+            values['updated_at'] = when or timezone.now()
+        return self.update(**values)
+
+    def soft_delete(self, when=None):
+        when = when or timezone.now()
+        return self.filter(deleted_at__isnull=True).touch_update(when, deleted_at=when)
+
+    def restore(self):
+        return self.filter(deleted_at__isnull=False).touch_update(deleted_at=None)
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
     """
     Manager customizado que filtra registros soft-deleted por padrão.
     """
@@ -57,7 +78,7 @@ class SoftDeleteMixin(models.Model):
     )
 
     objects = SoftDeleteManager()
-    all_objects = models.Manager()
+    all_objects = SoftDeleteQuerySet.as_manager()
 
     class Meta:
         abstract = True
@@ -112,3 +133,24 @@ class BaseModel(UUIDMixin, TimeStampedMixin, SoftDeleteMixin):
     """
     class Meta:
         abstract = True
+
+
+class IdempotencyKey(models.Model):
+    """
+    Resposta guardada para um ``Idempotency-Key`` quando o cache não está
+    disponível (apps.common.idempotency). ``status_code`` nulo: requisição
+    original ainda em andamento.
+    """
+    key = models.CharField(max_length=64, unique=True, verbose_name="Chave")
+    fingerprint = models.CharField(max_length=64, verbose_name="Assinatura da requisição")
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name="Status")
+    content_type = models.CharField(max_length=100, blank=True, verbose_name="Content-Type")
+    body = models.BinaryField(blank=True, default=b'', verbose_name="Corpo")
+    expires_at = models.DateTimeField(db_index=True, verbose_name="Expira em")
+
+    class Meta:
+        verbose_name = "chave de idempotência"
+        verbose_name_plural = "chaves de idempotência"
+
+    def __str__(self):
+        return self.key
@@ -0,0 +1,167 @@
+"""
+Schema OpenAPI pré-gerado.
+
+O drf-spectacular percorre todas as views a cada GET em /api/schema/. Aqui o
+schema é gerado uma vez (``manage.py boot`` ou ``manage.py openapi_schema``) em
+``OPENAPI_SCHEMA_DIR/schema-<versão>.json`` e servido da memória com ETag.
+
+A versão é um hash do código da API (``apps/`` e ``core/``), das versões de
+Django, DRF e drf-spectacular e de ``SPECTACULAR_SETTINGS``: código novo sem
+artefato novo nunca serve schema velho (o worker gera o schema na hora, uma vez).
+A URL versionada (``?v=<versão>``, usada pelo Swagger UI e pelo Redoc) recebe
+cache longo e ``immutable``; a URL sem versão é revalidada pelo ETag.
+"""
+import hashlib
+import logging
+import os
+from functools import cache
+from importlib.metadata import version as package_version
+from pathlib import Path
+
+import orjson
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from drf_spectacular.plumbing import set_query_parameters
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
+
+logger = logging.getLogger(__name__)
+
+SOURCE_DIRS = ('apps', 'core')
+PACKAGES = ('django', 'djangorestframework', 'drf-spectacular')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'public, no-cache'
+
+
+@cache
+def schema_version():
+    digest = hashlib.sha256()
+    for package in PACKAGES:
+        digest.update(f'{package}=={package_version(package)}\0'.encode())
+    digest.update(repr(sorted(settings.SPECTACULAR_SETTINGS.items())).encode())
+    for directory in SOURCE_DIRS:
+        for path in sorted((Path(settings.BASE_DIR) / directory).rglob('*.py')):
+            digest.update(str(path.relative_to(settings.BASE_DIR)).encode() + b'\0')
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def artifact_path(version=None):
+    return Path(settings.OPENAPI_SCHEMA_DIR) / f'schema-{version or schema_version()}.json'
+
+
+def generate_schema():
+    """
+    Schema da URLconf padrão, como ``manage.py spectacular`` o gera.
+    """
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    return generator.get_schema(request=None, public=spectacular_settings.SERVE_PUBLIC)
+
+
+def dump_schema(schema):
+    # Sem ordenar as chaves: a ordem do gerador é a mesma que o YAML reproduz
+    return orjson.dumps(schema, option=orjson.OPT_INDENT_2)
+
+
+def write_artifact(schema):
+    """
+    Grava o artefato da versão atual (escrita atômica) e remove os de outras versões.
+    """
+    path = artifact_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_suffix(f'.{os.getpid()}.tmp')
+    temporary.write_bytes(dump_schema(schema))
+    os.replace(temporary, path)
+    for old in path.parent.glob('schema-*.json'):
+        if old != path:
+            old.unlink(missing_ok=True)
+    return path
+
+
+class PrecomputedSchema:
+    """
+    Schema de uma versão com os corpos já renderizados por renderer.
+    """
+
+    def __init__(self, version, data):
+        self.version = version
+        self.data = data
+        self.bodies = {}
+
+    def render(self, renderer):
+        body = self.bodies.get(type(renderer))
+        if body is None:
+            body = self.bodies[type(renderer)] = renderer.render(self.data, renderer_context={})
+        return body
+
+    def etag(self, renderer):
+        return f'"{self.version}-{renderer.format}"'
+
+
+@cache
+def load_schema():
+    """
+    Artefato da versão atual; sem ele, gera o schema (uma vez por processo) e
+    tenta gravá-lo para os próximos workers.
+    """
+    version = schema_version()
+    try:
+        data = orjson.loads(artifact_path(version).read_bytes())
+    except FileNotFoundError:
+        logger.warning('Schema OpenAPI %s não pré-gerado; gerando na hora (rode manage.py openapi_schema).', version)
+        data = generate_schema()
+        try:
+            write_artifact(data)
+        except OSError:
+            logger.exception('Não foi possível gravar o schema OpenAPI em %s', settings.OPENAPI_SCHEMA_DIR)
+    return PrecomputedSchema(version, data)
+
+
+class PrecomputedSchemaView(SpectacularAPIView):
+    """
+    ``SpectacularAPIView`` servindo o artefato. ``?lang=``/``?version=`` (que
+    mudam o schema) continuam no gerador.
+    """
+
+    def get(self, request, *args, **kwargs):
+        if set(request.GET) - {'format', 'v'}:
+            return super().get(request, *args, **kwargs)
+
+        schema = load_schema()
+        renderer = request.accepted_renderer
+        etag = schema.etag(renderer)
+        if request.GET.get('v') == schema.version:
+            cache_control = IMMUTABLE_CACHE_CONTROL
+        else:
+            cache_control = REVALIDATE_CACHE_CONTROL
+
+        if etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponseNotModified()
+        else:
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type = f'{content_type}; charset={renderer.charset}'
+            response = HttpResponse(schema.render(renderer), content_type=content_type)
+            response['Content-Disposition'] = f'inline; filename="{self._get_filename(request, None)}"'
+        response['ETag'] = etag
+        response['Cache-Control'] = cache_control
+        patch_vary_headers(response, ['Accept'])
+        return response
+
+
+class VersionedSchemaUrlMixin:
+    """
+    Swagger UI e Redoc apontam para a URL versionada do schema (cache longo).
+    """
+
+    def _get_schema_url(self, request):
+        return set_query_parameters(super()._get_schema_url(request), v=schema_version())
+
+
+class PrecomputedSwaggerView(VersionedSchemaUrlMixin, SpectacularSwaggerView):
+    pass
+
+
+class PrecomputedRedocView(VersionedSchemaUrlMixin, SpectacularRedocView):
+    pass
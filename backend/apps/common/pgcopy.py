@@ -0,0 +1,46 @@
+"""
+Inserção em massa com ``COPY ... FROM STDIN`` no PostgreSQL (psycopg 2 ou 3).
+"""
+import io
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def csv_value(value):
+    """
+    Valor no CSV do ``COPY``: NULL é o campo vazio sem aspas e todo o resto
+    vai entre aspas, então ``""`` ou ``\\N`` vindos do PDV continuam texto.
+    """
+    if value is None:
+        return ''
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def copy_instances(model, objs, batch_size=20000, using=DEFAULT_DB_ALIAS):
+    """
+    Insere instâncias (não salvas) com ``COPY ... FROM STDIN`` no PostgreSQL.
+    Os valores passam por ``pre_save``/``get_db_prep_save`` como no ``bulk_create``,
+    mas as chaves primárias não voltam para os objetos.
+    """
+    connection = connections[using]
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+    sql = f'COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv)'
+
+    for start in range(0, len(objs), batch_size):
+        buffer = io.StringIO()
+        for obj in objs[start:start + batch_size]:
+            buffer.write(','.join(
+                csv_value(field.get_db_prep_save(field.pre_save(obj, add=True), connection))
+                for field in fields
+            ))
+            buffer.write('\n')
+        buffer.seek(0)
+
+        with connection.cursor() as cursor:
+            raw = cursor.cursor
+            if hasattr(raw, 'copy_expert'):  # psycopg2
+                raw.copy_expert(sql, buffer)
+            else:  # psycopg 3
+                with raw.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
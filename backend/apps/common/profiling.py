@@ -0,0 +1,153 @@
+"""
+Profiling de requisições individuais (ver ``ProfilerMiddleware``).
+
+- ``SamplingProfiler``: amostra as pilhas de execução em intervalo fixo e gera o
+  formato "folded" (``func_a;func_b;func_c 42``), aceito por flamegraph.pl,
+  speedscope e inferno.
+- ``cProfile``: perfil determinístico salvo em ``.prof`` (pstats/snakeviz).
+
+Os arquivos ficam em ``PROFILER_DIR`` (por padrão ``MEDIA_ROOT/profiles``).
+"""
+import cProfile
+import heapq
+import itertools
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+
+
+class SamplingProfiler:
+    """
+    Profiler por amostragem em thread separada.
+
+    Com ``thread_ids`` amostra apenas essas threads; sem, amostra todas
+    (modo ASGI, onde a view síncrona roda em uma thread do executor).
+    """
+
+    def __init__(self, thread_ids=None, interval=None):
+        self.thread_ids = set(thread_ids) if thread_ids else None
+        self.interval = interval or settings.PROFILER_INTERVAL
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self
+
+    def _run(self):
+        own_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if self.thread_ids is not None and thread_id not in self.thread_ids:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{frame.f_globals.get("__name__", "?")}.{code.co_qualname}')
+                    frame = frame.f_back
+                if self.thread_ids is None:
+                    stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def folded(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.samples.most_common())
+
+
+class DeterministicProfiler:
+    """
+    Adaptador do ``cProfile`` com a mesma interface do ``SamplingProfiler``.
+    Só perfila a thread atual.
+    """
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+        return self
+
+    def stop(self):
+        self.profile.disable()
+        return self
+
+
+def get_profile_dir():
+    path = settings.PROFILER_DIR
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def save_profile(profiler, request, elapsed, prefix=''):
+    """
+    Grava o perfil e retorna o nome do arquivo.
+    """
+    slug = re.sub(r'[^a-zA-Z0-9]+', '-', request.path).strip('-') or 'root'
+    stem = f'{prefix}{time.strftime("%Y%m%d-%H%M%S")}-{request.method}-{slug[:60]}-{elapsed * 1000:.0f}ms-{uuid.uuid4().hex[:8]}'
+    directory = get_profile_dir()
+
+    if isinstance(profiler, DeterministicProfiler):
+        filename = f'{stem}.prof'
+        profiler.profile.dump_stats(os.path.join(directory, filename))
+    else:
+        filename = f'{stem}.folded'
+        with open(os.path.join(directory, filename), 'w', encoding='utf-8') as fp:
+            fp.write(profiler.folded())
+    return filename
+
+
+class SlowestProfiles:
+    """
+    Mantém em disco apenas os ``capacity`` perfis mais lentos deste processo
+    (amostragem aleatória). Perfis que saem do ranking são apagados.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._heap = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def qualifies(self, elapsed):
+        return len(self._heap) < self.capacity or elapsed > self._heap[0][0]
+
+    def offer(self, profiler, request, elapsed):
+        if self.capacity <= 0:
+            return None
+        with self._lock:
+            if not self.qualifies(elapsed):
+                return None
+        # Grava fora da trava; outra requisição pode ter entrado no ranking nesse meio
+        filename = save_profile(profiler, request, elapsed, prefix='sampled-')
+        entry = (elapsed, next(self._counter), filename)
+        with self._lock:
+            if len(self._heap) < self.capacity:
+                heapq.heappush(self._heap, entry)
+                return filename
+            if self.qualifies(elapsed):
+                evicted = heapq.heapreplace(self._heap, entry)[2]
+            else:
+                evicted, filename = filename, None
+        try:
+            os.remove(os.path.join(get_profile_dir(), evicted))
+        except FileNotFoundError:
+            pass
+        return filename
+
+    def entries(self):
+        with self._lock:
+            return sorted(self._heap, reverse=True)
@@ -0,0 +1,56 @@
+"""
+Renderer JSON baseado em orjson.
+
+Mantém a mesma saída do ``rest_framework.renderers.JSONRenderer`` (compacta,
+UTF-8, ``\\u2028``/``\\u2029`` escapados) e delega ao encoder do DRF os tipos que
+o orjson não trata igual (Decimal, datetime, lazy strings, querysets...).
+UUID, dict/list e subclasses de str (ex.: ``ErrorDetail``) são nativos.
+
+Onde o orjson diverge, a renderização volta para o ``JSONRenderer``:
+
+- indentação diferente de 2 espaços (ex.: ``?indent=4``, API navegável);
+- ``COMPACT_JSON``/``UNICODE_JSON`` desligados;
+- inteiros fora de 64 bits (o orjson lança ``JSONEncodeError``).
+
+Única divergência mantida: ``NaN``/``Infinity`` saem como ``null`` (o DRF, com
+``STRICT_JSON``, lança ``ValueError``). Detectar exigiria percorrer o payload;
+os serializers da API não têm ``FloatField``, então só um ``JSONField`` com
+esses valores gravados chega aqui.
+"""
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+_drf_default = encoders.JSONEncoder().default
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Substituto direto do ``JSONRenderer``. Use por view (``renderer_classes``)
+    ou globalmente em ``REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES']``.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        options = ORJSON_OPTIONS
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None:
+            # orjson só suporta indentação de 2 espaços
+            if indent != 2:
+                return super().render(data, accepted_media_type, renderer_context)
+            options |= orjson.OPT_INDENT_2
+        if not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_drf_default, option=options)
+        except orjson.JSONEncodeError:
+            # Inteiros fora de 64 bits; tipos sem suporte falham igual no DRF
+            return super().render(data, accepted_media_type, renderer_context)
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -0,0 +1,234 @@
+"""
+Utilitários compartilhados de serializers.
+
+``DynamicFieldsMixin`` implementa os parâmetros ``?fields=``, ``?omit=`` e
+``?expand=`` com caminhos aninhados separados por ponto, por exemplo::
+
+    /api/auth/me/?fields=id,email,companies.company.uuid,companies.company.trade_name
+    /api/auth/me/?omit=companies.theme
+    /api/auth/me/?expand=companies.company
+
+- ``fields``: mantém apenas os campos listados (um campo sem sub-caminho vem completo).
+- ``omit``: remove os campos listados.
+- ``expand``: quando informado, campos aninhados marcados como ``expandable_fields``
+  que não estiverem na lista são compactados para o UUID do objeto relacionado.
+  Sem o parâmetro, tudo é expandido (comportamento original).
+"""
+from rest_framework import serializers
+
+from .instrumentation import serializer_timer
+
+
+def parse_field_tree(raw):
+    """
+    Converte ``"a,b.c,b.d"`` em ``{'a': {}, 'b': {'c': {}, 'd': {}}}``.
+    """
+    if raw is None:
+        return None
+
+    tree = {}
+    for path in raw.split(','):
+        path = path.strip()
+        if not path:
+            continue
+        node = tree
+        for part in path.split('.'):
+            node = node.setdefault(part, {})
+    return tree
+
+
+class FieldFilter:
+    """
+    Seleção de campos de um nível do serializer (fields/omit/expand).
+    """
+    __slots__ = ('fields', 'omit', 'expand')
+
+    query_params = ('fields', 'omit', 'expand')
+
+    def __init__(self, fields=None, omit=None, expand=None):
+        self.fields = fields
+        self.omit = omit
+        self.expand = expand
+
+    @classmethod
+    def from_request(cls, request):
+        """
+        Retorna ``None`` quando a requisição não usa nenhum dos parâmetros.
+        """
+        if request is None:
+            return None
+        params = getattr(request, 'query_params', request.GET)
+        if not any(name in params for name in cls.query_params):
+            return None
+        return cls(
+            fields=parse_field_tree(params.get('fields')),
+            omit=parse_field_tree(params.get('omit')),
+            expand=parse_field_tree(params.get('expand')),
+        )
+
+    def is_included(self, name):
+        if self.fields is not None and name not in self.fields:
+            return False
+        # Só remove quando o caminho termina neste nível (omit=a remove "a",
+        # omit=a.b remove apenas "b" dentro de "a")
+        if self.omit is not None and self.omit.get(name) == {}:
+            return False
+        return True
+
+    def is_expanded(self, name):
+        return self.expand is None or name in self.expand
+
+    def child(self, name):
+        """
+        Filtro a ser aplicado no serializer aninhado ``name``.
+        """
+        fields = (self.fields.get(name) or None) if self.fields is not None else None
+        omit = (self.omit.get(name) or None) if self.omit is not None else None
+        expand = self.expand.get(name, {}) if self.expand is not None else None
+        if fields is None and omit is None and expand is None:
+            return None
+        return FieldFilter(fields, omit, expand)
+
+
+class TimedSerializerMixin:
+    """
+    Contabiliza o tempo de ``to_representation`` na instrumentação da requisição
+    (header ``Server-Timing``, ver ``QueryBudgetMiddleware``).
+    """
+
+    def to_representation(self, instance):
+        with serializer_timer(type(self).__name__):
+            return super().to_representation(instance)
+
+
+class DynamicFieldsMixin(TimedSerializerMixin):
+    """
+    Mixin para ModelSerializer com suporte a ``?fields=``, ``?omit=`` e ``?expand=``.
+
+    - ``expandable_fields``: campos aninhados que podem ser compactados. A forma
+      compacta usa o método ``get_<campo>_ref`` se existir, senão ``<source>.uuid``.
+    - ``field_sources``: campos do model usados por campos calculados (para ``only()``).
+    - ``nested_sources``: ``campo -> (relação, serializer)`` para aninhamentos feitos
+      em ``SerializerMethodField``.
+
+    Na raiz o filtro vem de ``context['field_filter']`` ou, na falta dele, da query
+    string da requisição. Serializers aninhados recebem o sub-filtro do pai.
+    Serializers de escrita (com ``data=``) nunca são filtrados.
+    """
+    expandable_fields = ()
+    field_sources = {}
+    nested_sources = {}
+
+    @property
+    def field_filter(self):
+        if not hasattr(self, '_field_filter'):
+            self._field_filter = self._resolve_field_filter()
+        return self._field_filter
+
+    def _is_root_level(self):
+        parent = getattr(self, 'parent', None)
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def _resolve_field_filter(self):
+        if not self._is_root_level() or hasattr(self.root, 'initial_data'):
+            return None
+        if 'field_filter' in self.context:
+            return self.context['field_filter']
+        return FieldFilter.from_request(self.context.get('request'))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        field_filter = self.field_filter
+        if field_filter is None:
+            return fields
+
+        for name in list(fields):
+            if not field_filter.is_included(name):
+                del fields[name]
+                continue
+
+            if name in self.expandable_fields and not field_filter.is_expanded(name):
+                fields[name] = self.get_collapsed_field(name, fields[name])
+                continue
+
+            child = fields[name]
+            if isinstance(child, serializers.ListSerializer):
+                child = child.child
+            if isinstance(child, DynamicFieldsMixin):
+                child._field_filter = field_filter.child(name)
+
+        return fields
+
+    def get_collapsed_field(self, name, field):
+        method_name = f'get_{name}_ref'
+        if hasattr(self, method_name):
+            return serializers.SerializerMethodField(method_name=method_name)
+        return serializers.ReadOnlyField(source=f'{field.source or name}.uuid')
+
+    def get_child_context(self, field_name):
+        """
+        Contexto para serializers aninhados criados em ``SerializerMethodField``.
+        """
+        field_filter = self.field_filter
+        return {
+            **self.context,
+            'field_filter': field_filter.child(field_name) if field_filter else None,
+        }
+
+    @classmethod
+    def get_nested_source(cls, name):
+        if name in cls.nested_sources:
+            return cls.nested_sources[name]
+        declared = cls._declared_fields.get(name)
+        if isinstance(declared, serializers.ListSerializer):
+            declared = declared.child
+        if isinstance(declared, DynamicFieldsMixin):
+            return declared.source or name, type(declared)
+        return None
+
+    @classmethod
+    def get_model_field_paths(cls, field_filter=None, prefix=''):
+        """
+        Campos do model (com caminhos ``a__b``) necessários para serializar com
+        o filtro informado. Usado para montar ``only()``/``select_related()``.
+        """
+        model_fields = {field.name for field in cls.Meta.model._meta.concrete_fields}
+        paths = [f'{prefix}id']
+
+        for name in cls.Meta.fields:
+            if field_filter is not None and not field_filter.is_included(name):
+                continue
+
+            nested = cls.get_nested_source(name)
+            if nested is not None:
+                relation, serializer_class = nested
+                if field_filter is None or field_filter.is_expanded(name) or name not in cls.expandable_fields:
+                    paths.extend(serializer_class.get_model_field_paths(
+                        field_filter.child(name) if field_filter else None,
+                        prefix=f'{prefix}{relation}__',
+                    ))
+                else:
+                    paths.append(f'{prefix}{relation}__uuid')
+            elif name in cls.field_sources:
+                paths.extend(f'{prefix}{source}' for source in cls.field_sources[name])
+            elif name in model_fields:
+                paths.append(f'{prefix}{name}')
+
+        return paths
+
+    @classmethod
+    def optimize_queryset(cls, queryset, field_filter=None, extra_fields=()):
+        """
+        Aplica ``select_related`` das relações aninhadas e, quando há filtro,
+        ``only()`` apenas com as colunas necessárias (mais ``extra_fields``,
+        ex.: a FK usada por um related manager).
+        """
+        paths = [*cls.get_model_field_paths(field_filter), *extra_fields]
+        relations = {path.rsplit('__', 1)[0] for path in paths if '__' in path}
+        if relations:
+            queryset = queryset.select_related(*sorted(relations))
+        if field_filter is not None:
+            queryset = queryset.only(*paths)
+        return queryset
@@ -0,0 +1,499 @@
+"""
+Servidor de produção com vários workers ASGI (``python manage.py serve``).
+
+O processo mestre (``Arbiter``) abre o socket de escuta e inicia N workers,
+cada um um interpretador novo rodando o daphne sobre o mesmo socket herdado
+(o kernel distribui as conexões entre eles). O mestre só supervisiona:
+
+- worker que morre é substituído (com espera crescente se falhar ao subir);
+- worker que atinge ``max_requests`` ou ``max_memory_mb`` avisa o mestre
+  (``retire``) e segue atendendo até o substituto ficar pronto; só então
+  recebe SIGTERM, para de aceitar conexões e termina as requisições em
+  andamento;
+- SIGHUP sobe uma nova geração de workers (código e settings relidos do disco)
+  e, da mesma forma, só encerra cada worker antigo quando um novo fica pronto;
+- SIGTERM/SIGINT encerram os workers com drenagem (SIGKILL após
+  ``graceful_timeout``); SIGQUIT encerra imediatamente.
+
+Workers e mestre conversam por um pipe com linhas ``<mensagem> <pid>``.
+"""
+import logging
+import math
+import os
+import random
+import resource
+import select
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+# Intervalo do laço do mestre e da verificação de memória dos workers
+TICK_SECONDS = 1.0
+MEMORY_CHECK_SECONDS = 5.0
+# Falhas seguidas ao subir um worker antes de o mestre desistir
+MAX_BOOT_FAILURES = 5
+# Cota de CPU do container (cgroup v2 e v1)
+CGROUP_CPU_MAX = '/sys/fs/cgroup/cpu.max'
+CGROUP_CFS_QUOTA = '/sys/fs/cgroup/cpu/cpu.cfs_quota_us'
+CGROUP_CFS_PERIOD = '/sys/fs/cgroup/cpu/cpu.cfs_period_us'
+
+
+def _read(path):
+    with open(path) as fp:
+        return fp.read().split()
+
+
+def cgroup_cpu_quota():
+    """
+    Cota de CPU do cgroup em CPUs (``docker run --cpus``), ou ``None`` sem limite.
+    """
+    try:
+        quota, period = _read(CGROUP_CPU_MAX)[:2]
+        return None if quota == 'max' else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        quota, period = int(_read(CGROUP_CFS_QUOTA)[0]), int(_read(CGROUP_CFS_PERIOD)[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return quota / period if quota > 0 and period > 0 else None
+
+
+def available_cpus():
+    """
+    CPUs que o processo pode usar: afinidade (cpuset/``taskset``) limitada pela
+    cota do cgroup. ``os.cpu_count()`` conta as CPUs do host mesmo no container.
+    """
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS
+        count = os.cpu_count() or 1
+    quota = cgroup_cpu_quota()
+    if quota is not None:
+        count = min(count, math.ceil(quota))
+    return max(count, 1)
+
+
+def parse_bind(bind):
+    """
+    ``host:porta`` IPv4. O endpoint ``fd:`` do daphne adota o socket sempre
+    como AF_INET, então IPv6 e unix sockets ficam de fora.
+    """
+    host, _, port = bind.rpartition(':')
+    if not port.isdigit() or ':' in host or host.startswith('unix'):
+        raise ValueError(f'Endereço inválido (use host:porta IPv4): {bind}')
+    return host or '0.0.0.0', int(port)
+
+
+def create_socket(bind, backlog):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(parse_bind(bind))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def current_rss_mb():
+    """
+    Memória residente atual (/proc/self/statm); fora do Linux, o pico.
+    """
+    try:
+        with open('/proc/self/statm', encoding='ascii') as fp:
+            pages = int(fp.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class WorkerProcess:
+    __slots__ = ('process', 'generation', 'state', 'started_at', 'deadline')
+
+    def __init__(self, process, generation):
+        self.process = process
+        self.generation = generation
+        # booting -> ready -> retiring (aguardando substituto) -> stopping (SIGTERM enviado)
+        self.state = 'booting'
+        self.started_at = time.monotonic()
+        self.deadline = None
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+
+class Arbiter:
+    """
+    Processo mestre: socket, workers e sinais.
+    """
+    # SIGCHLD só acorda o laço (via wakeup fd) para recolher o worker na hora
+    SIGNALS = (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGQUIT, signal.SIGTTIN, signal.SIGTTOU,
+               signal.SIGCHLD)
+
+    def __init__(self, bind, workers, worker_argv, backlog=2048, max_requests=0, max_requests_jitter=0,
+                 graceful_timeout=30):
+        self.bind = bind
+        self.target = workers
+        self.worker_argv = worker_argv
+        self.backlog = backlog
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.workers = {}
+        self.generation = 0
+        self.pending_signals = []
+        self.boot_failures = 0
+        self.next_spawn_at = 0.0
+        self.stopping = False
+        self.exit_code = 0
+
+    # -------------------------------------------------------------------------
+    # Laço principal
+    # -------------------------------------------------------------------------
+
+    def run(self):
+        self.socket = create_socket(self.bind, self.backlog)
+        self.control_r, self.control_w = os.pipe()
+        self.wakeup_r, self.wakeup_w = os.pipe()
+        for fd in (self.control_r, self.wakeup_r, self.wakeup_w):
+            os.set_blocking(fd, False)
+        signal.set_wakeup_fd(self.wakeup_w)
+        for signum in self.SIGNALS:
+            signal.signal(signum, self.handle_signal)
+
+        logger.info('Mestre %s escutando em %s com %s workers', os.getpid(), self.bind, self.target)
+        buffer = b''
+        try:
+            self.manage_workers()
+            while True:
+                try:
+                    readable, _, _ = select.select([self.control_r, self.wakeup_r], [], [], TICK_SECONDS)
+                except InterruptedError:
+                    readable = []
+                if self.wakeup_r in readable:
+                    self.drain_fd(self.wakeup_r)
+                if self.control_r in readable:
+                    buffer += self.drain_fd(self.control_r)
+                    *lines, buffer = buffer.split(b'\n')
+                    for line in lines:
+                        self.handle_message(line.decode('ascii', 'replace'))
+
+                while self.pending_signals:
+                    self.dispatch_signal(self.pending_signals.pop(0))
+                self.reap_workers()
+                if self.stopping:
+                    if not self.workers:
+                        break
+                else:
+                    self.manage_workers()
+                self.kill_overdue_workers()
+        finally:
+            self.socket.close()
+        logger.info('Mestre %s encerrado', os.getpid())
+
+    @staticmethod
+    def drain_fd(fd):
+        data = b''
+        while True:
+            try:
+                chunk = os.read(fd, 4096)
+            except BlockingIOError:
+                return data
+            if not chunk:
+                return data
+            data += chunk
+
+    # -------------------------------------------------------------------------
+    # Sinais e mensagens dos workers
+    # -------------------------------------------------------------------------
+
+    def handle_signal(self, signum, frame):
+        # Só enfileira: o tratamento acontece no laço principal
+        self.pending_signals.append(signum)
+
+    def dispatch_signal(self, signum):
+        if signum == signal.SIGHUP:
+            self.reload()
+        elif signum in (signal.SIGTERM, signal.SIGINT):
+            self.stop(graceful=True)
+        elif signum == signal.SIGQUIT:
+            self.stop(graceful=False)
+        elif signum == signal.SIGTTIN:
+            self.target += 1
+            logger.info('Workers: %s', self.target)
+        elif signum == signal.SIGTTOU and self.target > 1:
+            self.target -= 1
+            logger.info('Workers: %s', self.target)
+
+    def handle_message(self, line):
+        message, _, pid = line.partition(' ')
+        worker = self.workers.get(int(pid)) if pid.isdigit() else None
+        if worker is None:
+            return
+        if message == 'ready' and worker.state == 'booting':
+            worker.state = 'ready'
+            self.boot_failures = 0
+            # Cada worker novo pronto libera um worker aguardando substituição
+            if worker.generation == self.generation:
+                replaceable = self.replaceable_workers()
+                if replaceable:
+                    self.terminate(min(replaceable, key=lambda w: w.started_at))
+        elif message == 'retire' and worker.state in ('booting', 'ready'):
+            worker.state = 'retiring'
+
+    def reload(self):
+        if self.stopping:
+            return
+        self.generation += 1
+        logger.info('Reload: iniciando a geração %s de workers', self.generation)
+        # Workers antigos ainda booting não serão aproveitados
+        for worker in list(self.workers.values()):
+            if worker.generation < self.generation and worker.state == 'booting':
+                self.terminate(worker)
+
+    def stop(self, graceful):
+        if self.stopping and graceful:
+            return
+        self.stopping = True
+        logger.info('Encerrando workers (%s)', 'drenagem' if graceful else 'imediato')
+        for worker in list(self.workers.values()):
+            if graceful:
+                self.terminate(worker)
+            else:
+                self.kill(worker)
+
+    # -------------------------------------------------------------------------
+    # Ciclo de vida dos workers
+    # -------------------------------------------------------------------------
+
+    def active_workers(self):
+        """
+        Workers da geração atual que contam para o total (subindo ou prontos).
+        """
+        return [w for w in self.workers.values()
+                if w.generation == self.generation and w.state in ('booting', 'ready')]
+
+    def replaceable_workers(self):
+        """
+        Workers ainda atendendo que esperam um substituto (reciclagem ou reload).
+        """
+        return [w for w in self.workers.values()
+                if w.state == 'retiring' or (w.state == 'ready' and w.generation < self.generation)]
+
+    def manage_workers(self):
+        active = self.active_workers()
+        now = time.monotonic()
+        while len(active) < self.target and now >= self.next_spawn_at:
+            active.append(self.spawn())
+
+        # Depois de um SIGTTOU (ou reload com menos workers) encerra os excedentes
+        excess = len(active) - self.target
+        for worker in sorted(active, key=lambda w: w.started_at)[:max(excess, 0)]:
+            self.terminate(worker)
+
+        # Capacidade completa: ninguém mais precisa esperar substituto
+        if len(active) >= self.target and all(w.state == 'ready' for w in active):
+            for worker in self.replaceable_workers():
+                self.terminate(worker)
+
+    def spawn(self):
+        argv = [*self.worker_argv, '--worker-fd', str(self.socket.fileno()),
+                '--control-fd', str(self.control_w)]
+        if self.max_requests:
+            jitter = random.randint(0, self.max_requests_jitter) if self.max_requests_jitter else 0
+            argv += ['--max-requests', str(self.max_requests + jitter)]
+        process = subprocess.Popen(argv, pass_fds=(self.socket.fileno(), self.control_w))
+        worker = WorkerProcess(process, self.generation)
+        self.workers[worker.pid] = worker
+        logger.info('Worker %s iniciado (geração %s)', worker.pid, worker.generation)
+        return worker
+
+    def terminate(self, worker):
+        if worker.state == 'stopping':
+            return
+        worker.state = 'stopping'
+        worker.deadline = time.monotonic() + self.graceful_timeout + 5
+        self.send_signal(worker, signal.SIGTERM)
+
+    def kill(self, worker):
+        worker.state = 'stopping'
+        worker.deadline = None
+        self.send_signal(worker, signal.SIGKILL)
+
+    @staticmethod
+    def send_signal(worker, signum):
+        try:
+            os.kill(worker.pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def kill_overdue_workers(self):
+        now = time.monotonic()
+        for worker in list(self.workers.values()):
+            if worker.deadline is not None and now > worker.deadline:
+                logger.warning('Worker %s não encerrou a tempo: SIGKILL', worker.pid)
+                worker.deadline = None
+                self.send_signal(worker, signal.SIGKILL)
+
+    def reap_workers(self):
+        for worker in list(self.workers.values()):
+            code = worker.process.poll()
+            if code is None:
+                continue
+            del self.workers[worker.pid]
+            self.mark_metrics_dead(worker.pid)
+            if worker.state in ('retiring', 'stopping'):
+                logger.info('Worker %s encerrado', worker.pid)
+                continue
+            logger.error('Worker %s saiu inesperadamente (código %s)', worker.pid, code)
+            if worker.state == 'booting':
+                self.boot_failures += 1
+                if self.boot_failures >= MAX_BOOT_FAILURES:
+                    logger.critical('Workers falharam ao subir %s vezes seguidas', self.boot_failures)
+                    self.stop(graceful=True)
+                    self.exit_code = 1
+                    continue
+                self.next_spawn_at = time.monotonic() + min(2 ** self.boot_failures, 30)
+
+    @staticmethod
+    def mark_metrics_dead(pid):
+        if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+            from prometheus_client import multiprocess
+            multiprocess.mark_process_dead(pid)
+
+
+class RequestCounter:
+    """
+    Envolve a aplicação ASGI contando requisições HTTP em andamento e atendidas.
+    """
+
+    def __init__(self, application, on_request_done):
+        self.application = application
+        self.on_request_done = on_request_done
+        self.in_flight = 0
+        self.handled = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.application(scope, receive, send)
+        self.in_flight += 1
+        try:
+            return await self.application(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+            self.handled += 1
+            self.on_request_done()
+
+
+class Worker:
+    """
+    Processo worker: daphne sobre o socket herdado do mestre.
+    """
+
+    def __init__(self, application_path, fd, control_fd, max_requests=0, max_memory_mb=0, graceful_timeout=30,
+                 verbosity=1):
+        self.application_path = application_path
+        self.fd = fd
+        self.control_fd = control_fd
+        self.max_requests = max_requests
+        self.max_memory_mb = max_memory_mb
+        self.graceful_timeout = graceful_timeout
+        self.verbosity = verbosity
+        self.retiring = False
+        self.draining = False
+
+    def run(self):
+        # O daphne instala o reactor asyncio do Twisted: precisa vir antes da aplicação
+        from daphne.access import AccessLogGenerator
+        from daphne.server import Server
+        from django.urls import get_resolver
+        from django.utils.module_loading import import_string
+        from twisted.internet import reactor, task, tcp
+
+        self.reactor = reactor
+        self.task = task
+        self.tcp = tcp
+        self.pid = os.getpid()
+        self.master_pid = os.getppid()
+        self.application = RequestCounter(import_string(self.application_path), self.request_done)
+        # URLconf (e as views) carregados antes do "ready": a primeira requisição
+        # não paga a importação e o reload só troca workers já aquecidos
+        get_resolver().url_patterns
+        self.server = Server(
+            application=self.application,
+            endpoints=[f'fd:fileno={self.fd}'],
+            signal_handlers=False,
+            action_logger=AccessLogGenerator(sys.stdout) if self.verbosity >= 1 else None,
+            verbosity=self.verbosity,
+            ready_callable=lambda: reactor.callWhenRunning(self.notify, 'ready'),
+        )
+        signal.signal(signal.SIGTERM, lambda *args: reactor.callFromThread(self.drain, 'SIGTERM'))
+        signal.signal(signal.SIGINT, lambda *args: reactor.callFromThread(self.drain, 'SIGINT'))
+        signal.signal(signal.SIGQUIT, lambda *args: reactor.callFromThread(self.server.stop))
+        # Sinais de controle do mestre não se aplicam aos workers
+        for signum in (signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU):
+            signal.signal(signum, signal.SIG_IGN)
+        if self.max_memory_mb:
+            task.LoopingCall(self.check_memory).start(MEMORY_CHECK_SECONDS, now=False)
+        task.LoopingCall(self.check_master).start(TICK_SECONDS, now=False)
+        self.server.run()
+
+    def notify(self, message):
+        try:
+            os.write(self.control_fd, f'{message} {self.pid}\n'.encode('ascii'))
+        except OSError:
+            # Mestre morreu; check_master cuida do encerramento
+            pass
+
+    def check_master(self):
+        if os.getppid() != self.master_pid:
+            self.drain('mestre encerrado')
+
+    def request_done(self):
+        if self.max_requests and self.application.handled >= self.max_requests:
+            self.reactor.callLater(0, self.retire, f'{self.application.handled} requisições atendidas')
+
+    def check_memory(self):
+        rss = current_rss_mb()
+        if rss > self.max_memory_mb:
+            self.retire(f'memória {rss:.0f} MB acima de {self.max_memory_mb} MB')
+
+    def retire(self, reason):
+        """
+        Pede substituição ao mestre e segue atendendo até receber SIGTERM (ou
+        drena sozinho após ``graceful_timeout``, se o mestre não responder).
+        """
+        if self.retiring or self.draining:
+            return
+        self.retiring = True
+        logger.info('Worker %s aguardando substituto: %s', self.pid, reason)
+        self.notify('retire')
+        self.reactor.callLater(self.graceful_timeout, self.drain, reason)
+
+    def drain(self, reason):
+        """
+        Para de aceitar conexões e encerra quando as requisições HTTP em
+        andamento terminam (ou após ``graceful_timeout``).
+        """
+        if self.draining:
+            return
+        self.draining = True
+        logger.info('Worker %s drenando: %s', self.pid, reason)
+        # Os Deferreds de server.listeners já não carregam a porta (listen_success
+        # retorna None): a porta adotada é procurada entre os leitores do reactor
+        for reader in self.reactor.getReaders():
+            if isinstance(reader, self.tcp.Port):
+                reader.stopListening()
+        deadline = time.monotonic() + self.graceful_timeout
+
+        def check():
+            if self.application.in_flight == 0 or time.monotonic() >= deadline:
+                poller.stop()
+                self.server.stop()
+
+        poller = self.task.LoopingCall(check)
+        poller.start(0.1)
@@ -0,0 +1,155 @@
+"""
+Log de queries lentas.
+
+Toda query acima de ``SLOW_QUERY_THRESHOLD_MS`` é gravada como uma linha JSON em
+``SLOW_QUERY_LOG_FILE``, com view, usuário e empresa da requisição atual e o
+fingerprint normalizado do SQL. Opcionalmente, uma amostra dos SELECTs lentos
+recebe o plano de ``EXPLAIN (ANALYZE, BUFFERS)`` (apenas PostgreSQL; SELECTs
+com ``FOR UPDATE``/``FOR SHARE`` ou funções voláteis recebem ``EXPLAIN`` sem
+``ANALYZE``).
+
+Relatório agregado: ``python manage.py slow_queries_report``.
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+
+from .instrumentation import current_request, get_request_user
+from .tracing import current_trace_id
+
+logger = logging.getLogger(__name__)
+
+_write_lock = threading.Lock()
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+_VALUES_RE = re.compile(r'\bVALUES\s*(?:\((?:[^()]*)\)\s*,?\s*)+', re.IGNORECASE)
+_SPACE_RE = re.compile(r'\s+')
+# SELECTs com efeito colateral: travas de linha e funções voláteis conhecidas
+_SIDE_EFFECT_RE = re.compile(
+    r'\bFOR\s+(?:NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b'
+    r'|\b(?:nextval|setval|pg_(?:try_)?advisory\w*|pg_notify|set_config|txid_current|random'
+    r'|clock_timestamp|timeofday|gen_random_uuid|uuid_generate_v[14])\s*\(',
+    re.IGNORECASE,
+)
+
+
+def normalize_sql(sql):
+    """
+    Remove literais e colapsa listas para agrupar queries equivalentes.
+    """
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    sql = _VALUES_RE.sub('VALUES (...) ', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+def fingerprint(sql):
+    return hashlib.md5(normalize_sql(sql).encode()).hexdigest()[:12]
+
+
+def request_context():
+    """
+    View, usuário e empresa da requisição atual (sem disparar novas queries).
+    """
+    request = current_request.get()
+    if request is None:
+        return {}
+
+    resolver_match = getattr(request, 'resolver_match', None)
+    kwargs = resolver_match.kwargs if resolver_match else {}
+    data = {
+        'method': request.method,
+        'path': request.path,
+        'view': resolver_match.view_name if resolver_match else None,
+        'company': str(kwargs['company_uuid']) if kwargs.get('company_uuid') else None,
+        'user_id': None,
+    }
+    user = get_request_user(request)
+    if user is not None:
+        data['user_id'] = user.pk
+    return data
+
+
+def explain_options(sql):
+    """
+    ``ANALYZE`` executa a query de novo: em SELECTs que travam linhas
+    (``FOR UPDATE``/``FOR SHARE``) ou chamam funções voláteis isso repetiria
+    o efeito, então esses recebem só o plano estimado.
+    """
+    if _SIDE_EFFECT_RE.search(sql):
+        return 'FORMAT JSON'
+    return 'ANALYZE, BUFFERS, FORMAT JSON'
+
+
+def explain(connection, sql, params):
+    """
+    Plano de execução em JSON (ver ``explain_options``). Só é usado em SELECTs
+    e direto no cursor do driver (fora dos execute_wrappers).
+
+    Dentro de uma transação roda em um savepoint: no PostgreSQL um EXPLAIN
+    com erro abortaria a transação de quem chamou (ex.: ``atomic()`` do extrato).
+    """
+    if connection.vendor != 'postgresql' or not sql.lstrip().upper().startswith('SELECT'):
+        return None
+    in_transaction = not connection.get_autocommit()
+    try:
+        with connection.connection.cursor() as cursor:
+            if in_transaction:
+                cursor.execute('SAVEPOINT slow_query_explain')
+            try:
+                cursor.execute(f'EXPLAIN ({explain_options(sql)}) {sql}', params)
+                return cursor.fetchone()[0]
+            except Exception:
+                if in_transaction:
+                    cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+                raise
+            finally:
+                if in_transaction:
+                    cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+    except Exception as exc:  # o plano é opcional, nunca derruba a requisição
+        logger.debug('EXPLAIN falhou: %s', exc)
+        return None
+
+
+def record_slow_query(sql, params, many, context, duration):
+    connection = context['connection']
+    entry = {
+        'timestamp': datetime.now(dt_timezone.utc).isoformat(),
+        'duration_ms': round(duration * 1000, 3),
+        'fingerprint': fingerprint(sql),
+        'sql': sql[:5000],
+        'many': many,
+        'database': connection.alias,
+        'trace_id': current_trace_id(),
+        **request_context(),
+    }
+    if (
+        settings.SLOW_QUERY_EXPLAIN
+        and not many
+        and random.random() < settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE
+    ):
+        entry['plan'] = explain(connection, sql, params)
+
+    logger.warning(
+        'Query lenta (%.1fms) em %s [%s]',
+        entry['duration_ms'], entry.get('view') or '-', entry['fingerprint'],
+    )
+
+    path = settings.SLOW_QUERY_LOG_FILE
+    if not path:
+        return
+    line = json.dumps(entry, default=str, ensure_ascii=False) + '\n'
+    with _write_lock:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as fp:
+            fp.write(line)
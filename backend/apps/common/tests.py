@@ -1,3 +1,690 @@
-from django.test import TestCase
+import threading
+import time
+import uuid
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from types import SimpleNamespace
+import tempfile
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import orjson
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import CommandError, call_command
+from django.db import DEFAULT_DB_ALIAS, DatabaseError
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework import serializers
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from apps.common import idempotency
+from apps.common.cache import invalidated_timeout
+from apps.common.checks import admin_dependencies_check, admin_middleware_check, replica_pin_cache_check
+from apps.common.compiled import (
+    CompiledReader,
+    Field,
+    Nested,
+    as_choice_display,
+    as_datetime,
+    as_decimal,
+    as_str,
+)
+from apps.common.db_router import (
+    ReplicaHealth,
+    ReplicaRouter,
+    RoutingState,
+    pin_cache_key,
+    replica_health,
+    routing_state,
+)
+from apps.common.instrumentation import RequestMetrics, current_metrics, current_request
+from apps.common.management.commands.serve import Command as ServeCommand
+from apps.common.middleware import (
+    PathMiddlewareStack,
+    ProfilerMiddleware,
+    QueryBudgetMiddleware,
+    TracingMiddleware,
+)
+from apps.common.profiling import SlowestProfiles
+from apps.common.models import IdempotencyKey
+from apps.common.openapi import artifact_path, dump_schema, generate_schema, load_schema
+from apps.common.pgcopy import csv_value
+from apps.common.renderers import ORJSONRenderer
+from apps.common.server import available_cpus
+from apps.common.slow_queries import explain
+from apps.common.tracing import current_trace_id
+from apps.common.views import metrics_view
+from apps.companies.models import Company, CompanyMember, CompanyTheme
+
+
+class IdempotentView(APIView):
+    """
+    Conta as execuções; ``nested`` repete a mesma requisição de dentro da
+    original (duplicata concorrente).
+    """
+    calls = 0
+    nested = None
+
+    @idempotency.idempotent
+    def post(self, request):
+        type(self).calls += 1
+        if type(self).nested is not None:
+            type(self).nested = type(self).nested()
+        return Response({'calls': type(self).calls}, status=201)
+
+
+class IdempotencyTestMixin:
+    def setUp(self):
+        cache.clear()
+        IdempotentView.calls = 0
+        IdempotentView.nested = None
+        self.user = get_user_model().objects.create_user(
+            email='pdv@example.com', password='x', first_name='PDV'
+        )
+        self.view = IdempotentView.as_view()
+
+    def post(self, body, key='key-1'):
+        request = APIRequestFactory().post('/points/', body, format='json', HTTP_IDEMPOTENCY_KEY=key)
+        force_authenticate(request, user=self.user)
+        response = self.view(request)
+        if isinstance(response, Response):
+            response.render()
+        return response
+
+
+class IdempotencyTests(IdempotencyTestMixin, TestCase):
+    def assert_replay(self):
+        first = self.post({'amount': '10.00'})
+        retry = self.post({'amount': '10.00'})
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry[idempotency.REPLAYED_HEADER], 'true')
+        self.assertEqual(IdempotentView.calls, 1)
+
+    def test_local_cache_uses_database(self):
+        # LocMem não é visto pelos outros workers
+        self.assertIsInstance(idempotency.get_store(), idempotency.DatabaseStore)
+
+    def test_replay(self):
+        self.assert_replay()
+        self.assertEqual(IdempotencyKey.objects.get().status_code, 201)
+
+    def test_replay_shared_cache(self):
+        with mock.patch.object(idempotency, 'is_shared_cache', return_value=True):
+            self.assert_replay()
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_other_key_runs_again(self):
+        self.post({'amount': '10.00'})
+        self.post({'amount': '10.00'}, key='key-2')
+        self.assertEqual(IdempotentView.calls, 2)
+
+    def test_different_body(self):
+        self.post({'amount': '10.00'})
+        response = self.post({'amount': '20.00'})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(IdempotentView.calls, 1)
+
+    def test_concurrent_duplicate(self):
+        IdempotentView.nested = lambda: self.post({'amount': '10.00'})
+        self.post({'amount': '10.00'})
+        self.assertEqual(IdempotentView.nested.status_code, 409)
+        self.assertEqual(IdempotentView.nested['Retry-After'], '1')
+        self.assertEqual(IdempotentView.calls, 1)
+
+    def test_cache_failure_on_save(self):
+        # Travou no cache e o save falhou: a resposta vai para o banco e a
+        # retentativa a encontra
+        with mock.patch.object(idempotency, 'is_shared_cache', return_value=True), \
+                mock.patch.object(idempotency.CacheStore, 'save', side_effect=ConnectionError):
+            self.assert_replay()
+        self.assertEqual(IdempotencyKey.objects.get().status_code, 201)
+
+
+class IdempotencyQueryCountTests(IdempotencyTestMixin, TransactionTestCase):
+    """
+    Fora de ``TestCase`` as transações do DatabaseStore são reais (BEGIN, não
+    SAVEPOINT), como em produção.
+    """
+
+    def test_database_store_queries(self):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = self.post({'amount': '10.00'})
+        finally:
+            current_metrics.reset(token)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(metrics.queries, idempotency.DATABASE_STORE_QUERIES)
+
+
+class CopyCSVTests(SimpleTestCase):
+    def test_null_is_unquoted_empty(self):
+        self.assertEqual(csv_value(None), '')
+
+    def test_text_is_always_quoted(self):
+        # Nem "\N" nem vazio podem virar NULL no COPY
+        self.assertEqual(csv_value('\\N'), '"\\N"')
+        self.assertEqual(csv_value(''), '""')
+        self.assertEqual(csv_value('a "b",c'), '"a ""b"",c"')
+        self.assertEqual(csv_value(10), '"10"')
+
+
+class ExplainCursor:
+    def __init__(self, executed, fail=True):
+        self.executed = executed
+        self.fail = fail
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.executed.append(sql.split(' (')[0])
+        if sql.startswith('EXPLAIN') and self.fail:
+            raise RuntimeError('canceling statement due to statement timeout')
+
+    def fetchone(self):
+        return [[{'Plan': {}}]]
+
+
+class SlowQueryExplainTests(SimpleTestCase):
+    def explain(self, autocommit):
+        executed = []
+        connection = mock.Mock(vendor='postgresql')
+        connection.get_autocommit.return_value = autocommit
+        connection.connection.cursor.return_value = ExplainCursor(executed)
+        self.assertIsNone(explain(connection, 'SELECT 1', ()))
+        return executed
+
+    def test_failure_inside_transaction_rolls_back_savepoint(self):
+        self.assertEqual(self.explain(autocommit=False), [
+            'SAVEPOINT slow_query_explain',
+            'EXPLAIN',
+            'ROLLBACK TO SAVEPOINT slow_query_explain',
+            'RELEASE SAVEPOINT slow_query_explain',
+        ])
+
+    def test_autocommit_without_savepoint(self):
+        self.assertEqual(self.explain(autocommit=True), ['EXPLAIN'])
+
+    def test_analyze_only_without_side_effects(self):
+        connection = mock.Mock(vendor='postgresql')
+        connection.get_autocommit.return_value = True
+        cursor = mock.MagicMock(wraps=ExplainCursor([], fail=False))
+        cursor.__enter__.return_value = cursor
+        connection.connection.cursor.return_value = cursor
+        cases = {
+            'SELECT "id" FROM "companies_company" WHERE "id" = %s': True,
+            'SELECT "id" FROM "loyalty_points" WHERE "id" = %s FOR UPDATE': False,
+            'SELECT "id" FROM "loyalty_points" FOR NO KEY UPDATE OF "loyalty_points" SKIP LOCKED': False,
+            'SELECT "id" FROM "loyalty_points" WHERE "id" = %s\nFOR SHARE': False,
+            'SELECT "id" FROM "t" FOR KEY SHARE NOWAIT': False,
+            'SELECT nextval(\'seq\')': False,
+            'SELECT pg_try_advisory_xact_lock(%s)': False,
+            'SELECT "id" FROM "t" ORDER BY RANDOM() LIMIT 1': False,
+            'SELECT "for_update" FROM "t"': True,
+        }
+        for sql, analyze in cases.items():
+            self.assertEqual(explain(connection, sql, ()), [{'Plan': {}}])
+            executed = cursor.execute.call_args.args[0]
+            self.assertEqual(executed.startswith('EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) '), analyze, sql)
+            self.assertTrue(executed.endswith(sql), sql)
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1', 'replica_2'], REPLICA_MAX_LAG_SECONDS=5)
+class ReplicaHealthTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch('apps.common.db_router.connections')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_refresh_drops_lagging_and_unavailable(self):
+        health = ReplicaHealth()
+        with mock.patch.object(health, 'measure', side_effect=[1.0, 30.0]):
+            health.refresh()
+        self.assertEqual(health.healthy, ['replica_1'])
+
+        with mock.patch.object(health, 'measure', side_effect=[DatabaseError('timeout'), 0.0]):
+            health.refresh()
+        self.assertEqual(health.healthy, ['replica_2'])
+        self.assertIsNone(health.lag['replica_1'])
+
+    @override_settings(DATABASE_REPLICAS=['replica_1'], REPLICA_LAG_CHECK_INTERVAL=60)
+    def test_choose_does_not_wait_for_the_check(self):
+        # Réplica que não responde: a requisição segue no primário
+        health = ReplicaHealth()
+        answered = threading.Event()
+
+        def measure(alias):
+            answered.wait(5)
+            return 0.0
+
+        with mock.patch.object(health, 'measure', side_effect=measure):
+            started = time.monotonic()
+            self.assertIsNone(health.choose())
+            self.assertLess(time.monotonic() - started, 0.5)
+
+            answered.set()
+            deadline = time.monotonic() + 5
+            while not health.healthy and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(health.choose(), 'replica_1')
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(replica_health, 'choose', return_value='replica_1')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.router = ReplicaRouter()
+
+    def route(self, state, user=None):
+        request = SimpleNamespace(user=user) if user is not None else None
+        token = routing_state.set(state)
+        request_token = current_request.set(request)
+        try:
+            return self.router.db_for_read(None)
+        finally:
+            current_request.reset(request_token)
+            routing_state.reset(token)
+
+    def test_safe_read_uses_replica(self):
+        self.assertEqual(self.route(RoutingState(use_replica=True)), 'replica_1')
+
+    def test_unsafe_method_uses_primary(self):
+        self.assertEqual(self.route(RoutingState(use_replica=False)), DEFAULT_DB_ALIAS)
+
+    def test_write_pins_following_reads(self):
+        state = RoutingState(use_replica=True)
+        token = routing_state.set(state)
+        try:
+            self.assertEqual(self.router.db_for_write(None), DEFAULT_DB_ALIAS)
+        finally:
+            routing_state.reset(token)
+        self.assertEqual(self.route(state), DEFAULT_DB_ALIAS)
+
+    def test_recent_write_marker_pins_user(self):
+        user = SimpleNamespace(pk=7, is_authenticated=True)
+        cache.set(pin_cache_key(user.pk), True)
+        self.assertEqual(self.route(RoutingState(use_replica=True), user), DEFAULT_DB_ALIAS)
+
+    def test_local_cache_warning(self):
+        self.assertEqual([error.id for error in replica_pin_cache_check(None)], ['common.W001'])
+
+
+@skipUnless(settings.DATABASE_REPLICAS, 'sem DB_REPLICAS')
+class ReplicaDatabaseTests(TestCase):
+    """
+    Contra PostgreSQL de verdade (primário e réplica em DB_REPLICAS).
+    """
+    databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+
+    def test_lag_is_measured(self):
+        replica_health.refresh()
+        self.assertEqual(replica_health.healthy, settings.DATABASE_REPLICAS)
+
+
+class MetricsAccessTests(SimpleTestCase):
+    def get(self, remote_addr='203.0.113.9', **headers):
+        request = RequestFactory().get('/metrics', REMOTE_ADDR=remote_addr, headers=headers)
+        return metrics_view(request).status_code
+
+    @override_settings(METRICS_TOKEN='')
+    def test_public_without_token_is_denied(self):
+        self.assertEqual(self.get(), 403)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_loopback_allowed(self):
+        self.assertEqual(self.get('127.0.0.1'), 200)
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_token(self):
+        self.assertEqual(self.get(Authorization='Bearer s3cret'), 200)
+        self.assertEqual(self.get(Authorization='Bearer wrong'), 403)
+
+
+class ServerTimingTests(SimpleTestCase):
+    def respond(self, user=None):
+        request = RequestFactory().get('/api/')
+        if user is not None:
+            request.user = user
+        return QueryBudgetMiddleware(lambda request: HttpResponse())(request)
+
+    @override_settings(SERVER_TIMING_HEADER=False)
+    def test_hidden_from_clients(self):
+        self.assertNotIn('Server-Timing', self.respond())
+        customer = SimpleNamespace(is_authenticated=True, is_staff=False)
+        self.assertNotIn('Server-Timing', self.respond(customer))
+
+    @override_settings(SERVER_TIMING_HEADER=False)
+    def test_sent_to_staff(self):
+        staff = SimpleNamespace(is_authenticated=True, is_staff=True)
+        self.assertIn('Server-Timing', self.respond(staff))
+
+    @override_settings(SERVER_TIMING_HEADER=True)
+    def test_sent_to_everyone_when_enabled(self):
+        self.assertIn('Server-Timing', self.respond())
+
+    def test_budget_raises_in_tests(self):
+        self.assertTrue(settings.QUERY_BUDGET_RAISE)
+
+
+class ProfilerTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = override_settings(PROFILER_DIR=directory.name, PROFILER_ENABLED=True, PROFILER_SAMPLE_RATE=1.0)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.request = RequestFactory().get('/api/')
+
+    def test_keep_slowest_zero(self):
+        self.assertIsNone(SlowestProfiles(0).offer(mock.Mock(), self.request, 1.0))
+
+    def test_keeps_only_slowest(self):
+        slowest = SlowestProfiles(2)
+        with mock.patch('apps.common.profiling.save_profile', side_effect=['a', 'b', 'c', 'd']), \
+                mock.patch('apps.common.profiling.os.remove') as remove:
+            slowest.offer(None, self.request, 0.1)
+            slowest.offer(None, self.request, 0.3)
+            self.assertEqual(slowest.offer(None, self.request, 0.2), 'c')
+            self.assertIsNone(slowest.offer(None, self.request, 0.05))
+        self.assertEqual([entry[2] for entry in slowest.entries()], ['b', 'c'])
+        self.assertEqual(remove.call_count, 1)
+
+    def test_sampler_stops_when_view_raises(self):
+        def view(request):
+            raise RuntimeError
+
+        with mock.patch('apps.common.middleware.SamplingProfiler') as sampler:
+            with self.assertRaises(RuntimeError):
+                ProfilerMiddleware(view)(self.request)
+        sampler.return_value.stop.assert_called_once()
+
+
+@override_settings(LOCAL_CACHE_MAX_SECONDS=5)
+class InvalidatedTimeoutTests(SimpleTestCase):
+    def test_local_cache_is_capped(self):
+        self.assertEqual(invalidated_timeout(300), 5)
+
+    def test_shared_cache_keeps_timeout(self):
+        with mock.patch('apps.common.cache.is_shared_cache', return_value=True):
+            self.assertEqual(invalidated_timeout(300), 300)
+
+
+class OpenAPISchemaTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = override_settings(OPENAPI_SCHEMA_DIR=directory.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        load_schema.cache_clear()
+        self.addCleanup(load_schema.cache_clear)
+
+    def check(self):
+        call_command('openapi_schema', '--check', stdout=StringIO())
+
+    def test_artifact_matches_generator(self):
+        call_command('openapi_schema', stdout=StringIO())
+        self.assertEqual(artifact_path().read_bytes(), dump_schema(generate_schema()))
+        self.check()
+
+    def test_check_fails_without_artifact(self):
+        with self.assertRaises(CommandError):
+            self.check()
+
+    def test_check_fails_on_drift(self):
+        call_command('openapi_schema', stdout=StringIO())
+        artifact_path().write_bytes(artifact_path().read_bytes().replace(b'loyalty', b'pontos'))
+        with self.assertRaises(CommandError):
+            self.check()
+
+    def test_view_serves_artifact(self):
+        call_command('openapi_schema', stdout=StringIO())
+        response = self.client.get('/api/schema/', {'format': 'json'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(orjson.loads(response.content), orjson.loads(artifact_path().read_bytes()))
+        cached = self.client.get('/api/schema/', {'format': 'json'}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+
+class TracingMiddlewareTests(SimpleTestCase):
+    def view(self, request):
+        self.trace_id = current_trace_id()
+        return HttpResponse()
+
+    @override_settings(TRACING_ENABLED=False)
+    def test_not_used_when_disabled(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            TracingMiddleware(self.view)
+
+    @override_settings(TRACING_ENABLED=False)
+    def test_no_traceparent_when_disabled(self):
+        response = self.client.get('/metrics')
+        self.assertNotIn('traceparent', response)
+
+    @override_settings(TRACING_ENABLED=True, TRACING_SAMPLE_RATE=0)
+    def test_traceparent_when_enabled(self):
+        response = TracingMiddleware(self.view)(RequestFactory().get('/api/'))
+        self.assertEqual(response['traceparent'].split('-')[1], self.trace_id)
+
+
+class PathMiddlewareStackTests(SimpleTestCase):
+    def handle(self, path):
+        seen = {}
+
+        def view(request):
+            seen.update(session=hasattr(request, 'session'), user=hasattr(request, 'user'))
+            return HttpResponse()
+
+        PathMiddlewareStack(view)(RequestFactory().get(path))
+        return seen
+
+    def test_api_is_lean(self):
+        self.assertEqual(self.handle('/api/companies/'), {'session': False, 'user': False})
+
+    def test_admin_is_full(self):
+        self.assertEqual(self.handle('/admin/'), {'session': True, 'user': True})
+
+    @override_settings(LEAN_MIDDLEWARE_PATHS=[])
+    def test_full_everywhere_without_lean_paths(self):
+        self.assertEqual(self.handle('/api/companies/'), {'session': True, 'user': True})
+
+
+class AdminMiddlewareCheckTests(SimpleTestCase):
+    def error_ids(self):
+        return [error.id for error in admin_middleware_check(None)]
+
+    def test_admin_gets_full_stack(self):
+        self.assertEqual(self.error_ids(), [])
+        self.assertEqual(admin_dependencies_check(None), [])
+
+    def test_missing_from_full_stack(self):
+        full = [path for path in settings.FULL_MIDDLEWARE if not path.endswith('MessageMiddleware')]
+        with override_settings(FULL_MIDDLEWARE=full):
+            self.assertEqual(self.error_ids(), ['admin.E409'])
+
+    @override_settings(LEAN_MIDDLEWARE_PATHS=['/'])
+    def test_admin_on_lean_path(self):
+        self.assertEqual(self.error_ids(), ['admin.E410', 'admin.E408', 'admin.E409'])
+
+    def test_directly_in_middleware(self):
+        middleware = [
+            path for path in settings.MIDDLEWARE if path != 'apps.common.middleware.PathMiddlewareStack'
+        ]
+        with override_settings(MIDDLEWARE=[*middleware, *settings.FULL_MIDDLEWARE]):
+            self.assertEqual(self.error_ids(), [])
+        with override_settings(MIDDLEWARE=middleware):
+            self.assertEqual(len(self.error_ids()), 3)
+
+
+class CompiledConverterTests(SimpleTestCase):
+    """
+    Conversores do leitor compilado contra o ``to_representation`` dos campos DRF.
+    """
+
+    def test_decimal(self):
+        field = serializers.DecimalField(max_digits=5, decimal_places=2)
+        convert = as_decimal(2)({})
+        for value in ['1.5', '2', '0.01', '999.99', '1.005']:
+            self.assertEqual(convert(Decimal(value)), field.to_representation(Decimal(value)), value)
+
+    def test_datetime(self):
+        field = serializers.DateTimeField()
+        value = datetime(2026, 3, 1, 3, 30, 15, 123456, tzinfo=dt_timezone.utc)
+        for zone in ['UTC', 'America/Sao_Paulo']:
+            with override_settings(TIME_ZONE=zone):
+                self.assertEqual(as_datetime({})(value), field.to_representation(value), zone)
+
+    def test_choice_display(self):
+        choices = [('owner', 'Proprietário'), ('admin', 'Administrador')]
+        convert = as_choice_display(choices)({})
+        self.assertEqual(convert('owner'), 'Proprietário')
+        self.assertEqual(convert('outro'), 'outro')
+
+    def test_nested_null_column(self):
+        reader = CompiledReader([
+            Field('id'),
+            Nested('theme', 'theme', [Field('color')], null_column='id'),
+            Nested('colors', '', [Field('primary', 'color', convert=as_str)]),
+        ])
+        self.assertEqual(reader.columns, ['id', 'theme__color', 'theme__id', 'color'])
+        self.assertEqual(reader.serialize_rows([(1, None, None, None), (2, '#fff', 7, 3)]), [
+            {'id': 1, 'theme': None, 'colors': {'primary': None}},
+            {'id': 2, 'theme': {'color': '#fff'}, 'colors': {'primary': '3'}},
+        ])
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    """
+    Mesma saída do ``JSONRenderer`` do DRF (ver apps.common.renderers).
+    """
+
+    def assert_same(self, data, accepted_media_type=None, renderer_context=None):
+        expected = JSONRenderer().render(data, accepted_media_type, renderer_context)
+        self.assertEqual(ORJSONRenderer().render(data, accepted_media_type, renderer_context), expected)
+        return expected
+
+    def test_types(self):
+        self.assert_same({
+            'decimal': Decimal('1.50'),
+            'datetime': datetime(2026, 3, 1, 3, 30, 15, 123456, tzinfo=dt_timezone.utc),
+            'uuid': uuid.UUID(int=1),
+            'lazy': gettext_lazy('Proprietário'),
+            'error': [ErrorDetail('inválido', code='invalid')],
+            'separators': '\u2028\u2029',
+            'keys': {1: None, 'ação': True},
+            'float': 1.5,
+        })
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_indent(self):
+        data = {'a': [1, {'b': None}]}
+        for indent in ('2', '4', '8'):
+            self.assert_same(data, f'application/json; indent={indent}')
+        self.assertIn(b'\n    "a"', self.assert_same(data, None, {'indent': 4}))
+
+    def test_settings_fallback(self):
+        data = {'a': 'ação', 'b': [1, 2]}
+        for option in ('compact', 'ensure_ascii'):
+            with mock.patch.object(JSONRenderer, option, not getattr(JSONRenderer, option)):
+                self.assert_same(data)
+
+    def test_big_int(self):
+        self.assertEqual(self.assert_same({'n': 2 ** 70, 'm': -2 ** 64}), b'{"n":1180591620717411303424,"m":-18446744073709551616}')
+
+    def test_nan_is_null(self):
+        # Divergência documentada: o DRF (STRICT_JSON) recusa NaN/Infinity
+        with self.assertRaises(ValueError):
+            JSONRenderer().render({'x': float('nan')})
+        self.assertEqual(ORJSONRenderer().render({'x': float('nan'), 'y': float('inf')}), b'{"x":null,"y":null}')
+
+
+class ORJSONEndpointParityTests(TestCase):
+    """
+    Respostas reais (renderizadas pelo ORJSONRenderer) contra o ``JSONRenderer``.
+    """
+
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(email='dono@example.com', password=None, first_name='Dono')
+        member = User.objects.create_user(email='membro@example.com', password=None, phone='(11) 3333-4444')
+        self.company = Company.objects.create(
+            trade_name='Loja\u2028Ação', legal_name='Loja Ltda', cnpj='00.000.000/0001-00', email='loja@example.com',
+            points_per_real=Decimal('1.5'), logo='companies/logos/loja.png',
+        )
+        self.theme = CompanyTheme.objects.create(company=self.company, extra_config={'big': 2 ** 70, 'list': [1.5]})
+        CompanyMember.objects.create(company=self.company, user=self.user, role=CompanyMember.Role.OWNER)
+        CompanyMember.objects.create(company=self.company, user=member)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assert_same(self, response, status=200):
+        self.assertEqual(response.status_code, status)
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+    def test_endpoints(self):
+        company = {'company_uuid': self.company.uuid}
+        for compiled in (True, False):
+            with override_settings(COMPILED_READ_SERIALIZERS=compiled):
+                self.assert_same(self.client.get(reverse('current_user')))
+                self.assert_same(self.client.get(reverse('company-members', kwargs=company)))
+        self.assert_same(self.client.get(reverse('company-theme-list')))
+        self.assert_same(self.client.get(reverse('company-theme-detail', kwargs=company)))
+
+    def test_errors(self):
+        self.assert_same(self.client.patch(reverse('current_user'), {'phone': 'x' * 100}, format='json'), 400)
+        self.client.force_authenticate(None)
+        self.assert_same(self.client.get(reverse('current_user')), 401)
+
+
+class AvailableCPUsTests(SimpleTestCase):
+    def available(self, files, affinity=range(16)):
+        def fake_open(path, *args, **kwargs):
+            if path not in files:
+                raise FileNotFoundError(path)
+            return StringIO(files[path])
+        with mock.patch('apps.common.server.open', fake_open, create=True), \
+                mock.patch('os.sched_getaffinity', return_value=set(affinity), create=True):
+            return available_cpus()
+
+    def test_cgroup_v2(self):
+        self.assertEqual(self.available({'/sys/fs/cgroup/cpu.max': '200000 100000\n'}), 2)
+        self.assertEqual(self.available({'/sys/fs/cgroup/cpu.max': '150000 100000\n'}), 2)
+        self.assertEqual(self.available({'/sys/fs/cgroup/cpu.max': '50000 100000\n'}), 1)
+        self.assertEqual(self.available({'/sys/fs/cgroup/cpu.max': 'max 100000\n'}), 16)
+
+    def test_cgroup_v1(self):
+        files = {'/sys/fs/cgroup/cpu/cpu.cfs_quota_us': '400000\n', '/sys/fs/cgroup/cpu/cpu.cfs_period_us': '100000\n'}
+        self.assertEqual(self.available(files), 4)
+        files['/sys/fs/cgroup/cpu/cpu.cfs_quota_us'] = '-1\n'
+        self.assertEqual(self.available(files), 16)
+
+    def test_affinity(self):
+        self.assertEqual(self.available({}, affinity=[0, 1, 2]), 3)
+        self.assertEqual(self.available({'/sys/fs/cgroup/cpu.max': '800000 100000'}, affinity=[0, 1]), 2)
+
+    @override_settings(SERVER_WORKERS=0)
+    def test_serve_default(self):
+        with mock.patch('apps.common.management.commands.serve.available_cpus', return_value=3):
+            parser = ServeCommand().create_parser('manage.py', 'serve')
+        self.assertEqual(parser.parse_args([]).workers, 3)
+        with override_settings(SERVER_WORKERS=5):
+            self.assertEqual(ServeCommand().create_parser('manage.py', 'serve').parse_args([]).workers, 5)
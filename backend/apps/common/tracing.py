@@ -0,0 +1,358 @@
+"""
+Tracing leve (spans) compatível com OpenTelemetry/OTLP.
+
+- ``TracingMiddleware`` abre o span raiz de cada requisição e propaga o
+  ``traceparent`` (W3C Trace Context) recebido ou gera um novo.
+- ``start_span(name, **attributes)`` abre um span filho do span atual. Sem trace
+  amostrado é um no-op barato; por isso pode ficar em caminhos quentes (ORM,
+  cache, serializers, channel layer).
+- ``trace_context(name, traceparent=...)`` continua um trace fora de uma
+  requisição (management commands, jobs); ``inject()`` devolve o
+  ``traceparent`` atual para ser repassado ao job, e ``wrap_context(func)``
+  leva o contexto para outra thread.
+
+Os traces amostrados (``TRACING_SAMPLE_RATE``, ou o flag do ``traceparent`` de
+entrada) são exportados em segundo plano como OTLP/JSON: em arquivo JSONL
+(``TRACING_EXPORTER=file``, mesmo formato do file exporter do OTel Collector)
+ou via HTTP para um coletor (``TRACING_EXPORTER=otlp``).
+"""
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from functools import lru_cache
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+current_trace = contextvars.ContextVar('current_trace', default=None)
+current_span = contextvars.ContextVar('current_span', default=None)
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+SPAN_KIND_PRODUCER = 4
+
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_TRACEPARENT_RE = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+
+def _random_id(bytes_):
+    return f'{random.getrandbits(bytes_ * 8):0{bytes_ * 2}x}'
+
+
+def parse_traceparent(value):
+    """
+    Retorna ``(trace_id, parent_span_id, sampled)`` ou ``None`` se inválido.
+    """
+    match = _TRACEPARENT_RE.match((value or '').strip().lower())
+    if match is None or match.group(1) == '0' * 32:
+        return None
+    trace_id, span_id, flags = match.groups()
+    return trace_id, span_id, bool(int(flags, 16) & 1)
+
+
+class Trace:
+    __slots__ = ('trace_id', 'parent_span_id', 'sampled', 'spans', 'dropped')
+
+    def __init__(self, trace_id=None, parent_span_id=None, sampled=False):
+        self.trace_id = trace_id or _random_id(16)
+        self.parent_span_id = parent_span_id
+        self.sampled = sampled
+        self.spans = []
+        self.dropped = 0
+
+
+class Span:
+    """
+    Span em andamento; também é o context manager que o torna o span atual.
+    """
+    __slots__ = (
+        'trace', 'span_id', 'parent_id', 'name', 'kind', 'attributes',
+        'start_ns', 'end_ns', 'status', 'status_message', '_token',
+    )
+
+    def __init__(self, trace, name, kind, attributes, parent_id):
+        self.trace = trace
+        self.span_id = _random_id(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.start_ns = self.end_ns = 0
+        self.status = 0
+        self.status_message = ''
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_name(self, name):
+        self.name = name
+
+    def set_error(self, message):
+        self.status = STATUS_ERROR
+        self.status_message = message
+
+    def __enter__(self):
+        self._token = current_span.set(self)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        current_span.reset(self._token)
+        if exc is not None and self.status != STATUS_ERROR:
+            self.set_error(f'{exc_type.__name__}: {exc}')
+        self.trace.spans.append(self)
+        return False
+
+
+class _NoopSpan:
+    """
+    Span de requisições não amostradas (mesma interface, não registra nada).
+    """
+    __slots__ = ()
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_name(self, name):
+        pass
+
+    def set_error(self, message):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def start_span(name, kind=SPAN_KIND_INTERNAL, **attributes):
+    """
+    Abre um span filho do atual (use com ``with``). Atributos com ponto no nome
+    podem ser passados via ``**{'db.system': 'postgresql'}``.
+    """
+    trace = current_trace.get()
+    if trace is None or not trace.sampled:
+        return NOOP_SPAN
+    if len(trace.spans) >= settings.TRACING_MAX_SPANS:
+        trace.dropped += 1
+        return NOOP_SPAN
+    parent = current_span.get()
+    parent_id = parent.span_id if parent is not None else trace.parent_span_id
+    return Span(trace, name, kind, attributes, parent_id)
+
+
+def inject():
+    """
+    ``traceparent`` do contexto atual (para repassar a jobs ou chamadas externas).
+    """
+    trace = current_trace.get()
+    if trace is None:
+        return None
+    span = current_span.get()
+    span_id = span.span_id if span is not None else (trace.parent_span_id or _random_id(8))
+    return f'00-{trace.trace_id}-{span_id}-{"01" if trace.sampled else "00"}'
+
+
+def current_trace_id():
+    trace = current_trace.get()
+    return trace.trace_id if trace is not None else None
+
+
+def wrap_context(func):
+    """
+    Executa ``func`` (ex.: em outra thread) com o trace e o span atuais.
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(func, *args, **kwargs)
+
+
+def should_sample(parent_sampled=None):
+    if not settings.TRACING_ENABLED:
+        return False
+    if parent_sampled is not None and settings.TRACING_RESPECT_PARENT:
+        return parent_sampled
+    rate = settings.TRACING_SAMPLE_RATE
+    return rate > 0 and random.random() < rate
+
+
+class trace_context:
+    """
+    Inicia (ou continua, com ``traceparent``) um trace e abre o span raiz.
+    Ao sair, o trace amostrado é enviado ao exporter.
+
+        with trace_context('export_data', traceparent=os.environ.get('TRACEPARENT')):
+            ...
+    """
+
+    def __init__(self, name, traceparent=None, kind=SPAN_KIND_INTERNAL, **attributes):
+        parent = parse_traceparent(traceparent)
+        if parent is not None:
+            trace_id, parent_span_id, parent_sampled = parent
+            self.trace = Trace(trace_id, parent_span_id, should_sample(parent_sampled))
+        else:
+            self.trace = Trace(sampled=should_sample())
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+
+    def __enter__(self):
+        self._trace_token = current_trace.set(self.trace)
+        self._span = start_span(self.name, self.kind, **self.attributes)
+        return self._span.__enter__()
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self._span.__exit__(exc_type, exc, tb)
+        finally:
+            current_trace.reset(self._trace_token)
+        if self.trace.sampled and self.trace.spans:
+            export_queue().put(self.trace)
+        return False
+
+
+# =============================================================================
+# Exportação (OTLP/JSON)
+# =============================================================================
+
+def _attribute_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def encode_traces(traces):
+    """
+    Converte traces no corpo de ``ExportTraceServiceRequest`` em JSON.
+    """
+    spans = []
+    for trace in traces:
+        for span in trace.spans:
+            data = {
+                'traceId': trace.trace_id,
+                'spanId': span.span_id,
+                'name': span.name,
+                'kind': span.kind,
+                'startTimeUnixNano': str(span.start_ns),
+                'endTimeUnixNano': str(span.end_ns),
+                'attributes': [
+                    {'key': key, 'value': _attribute_value(value)}
+                    for key, value in span.attributes.items() if value is not None
+                ],
+            }
+            if span.parent_id:
+                data['parentSpanId'] = span.parent_id
+            if span.status:
+                data['status'] = {'code': span.status, 'message': span.status_message}
+            spans.append(data)
+        if trace.dropped:
+            logger.debug('Trace %s: %d spans descartados (TRACING_MAX_SPANS)', trace.trace_id, trace.dropped)
+
+    return {
+        'resourceSpans': [{
+            'resource': {'attributes': [
+                {'key': 'service.name', 'value': {'stringValue': settings.TRACING_SERVICE_NAME}},
+                {'key': 'process.pid', 'value': {'intValue': str(os.getpid())}},
+            ]},
+            'scopeSpans': [{'scope': {'name': 'apps.common.tracing'}, 'spans': spans}],
+        }],
+    }
+
+
+class FileSpanExporter:
+    def __init__(self, path):
+        self.path = path
+
+    def export(self, traces):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as fp:
+            fp.write(json.dumps(encode_traces(traces), separators=(',', ':')) + '\n')
+
+
+class OTLPHTTPSpanExporter:
+    def __init__(self, endpoint, timeout=5):
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def export(self, traces):
+        body = json.dumps(encode_traces(traces)).encode()
+        request = urllib.request.Request(
+            self.endpoint, data=body, headers={'Content-Type': 'application/json'}, method='POST',
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class SpanExportQueue:
+    """
+    Fila com thread de exportação: a requisição só enfileira o trace.
+    Com a fila cheia (coletor lento/fora do ar) os traces são descartados.
+    """
+
+    def __init__(self, exporter, max_size=2048, batch_size=64):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=max_size)
+        self._thread = threading.Thread(target=self._run, name='trace-exporter', daemon=True)
+        self._thread.start()
+
+    def put(self, trace):
+        try:
+            self.queue.put_nowait(trace)
+        except queue.Full:
+            logger.debug('Fila de traces cheia; trace %s descartado', trace.trace_id)
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.exporter.export(batch)
+            except Exception:
+                logger.warning('Falha ao exportar %d traces', len(batch), exc_info=True)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def flush(self):
+        self.queue.join()
+
+
+def flush():
+    """
+    Aguarda a exportação pendente (use ao fim de management commands).
+    """
+    if export_queue.cache_info().currsize:
+        export_queue().flush()
+
+
+@lru_cache(maxsize=1)
+def export_queue():
+    if settings.TRACING_EXPORTER == 'otlp':
+        exporter = OTLPHTTPSpanExporter(settings.TRACING_OTLP_ENDPOINT)
+    else:
+        exporter = FileSpanExporter(settings.TRACING_FILE)
+    return SpanExportQueue(exporter)
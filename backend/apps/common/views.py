@@ -1,3 +1,57 @@
-from django.shortcuts import render
+import ipaddress
 
-# Create your views here.
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.utils.module_loading import import_string
+from django.views.decorators.http import require_GET
+
+from .metrics import render_latest
+
+
+def metrics_allowed(request):
+    """
+    ``Authorization: Bearer <METRICS_TOKEN>`` ou cliente em
+    ``METRICS_ALLOWED_NETWORKS``; sem token configurado, só essas redes.
+    """
+    token = settings.METRICS_TOKEN
+    if token:
+        provided = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        if constant_time_compare(provided, token):
+            return True
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network) for network in settings.METRICS_ALLOWED_NETWORKS)
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Exporta as métricas no formato texto do Prometheus (ver ``metrics_allowed``).
+    """
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+
+    content, content_type = render_latest()
+    return HttpResponse(content, content_type=content_type)
+
+
+def lazy_view(view_path, **initkwargs):
+    """
+    View de classe importada só na primeira requisição (``view_path`` é o
+    caminho pontuado da classe). Mantém módulos pesados e raramente usados,
+    como as views de documentação, fora do boot dos workers.
+    """
+    view = None
+
+    def dispatch(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(view_path).as_view(**initkwargs)
+        return view(request, *args, **kwargs)
+
+    # Como o as_view() do DRF; a view real decide sobre autenticação
+    dispatch.csrf_exempt = True
+    return dispatch
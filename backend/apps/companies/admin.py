@@ -1,8 +1,82 @@
-from django.contrib import admin
+from functools import reduce
+from operator import and_, or_
+
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.utils.text import smart_split, unescape_string_literal
 from django.utils.translation import gettext_lazy as _
 
+from apps.common.admin import LargeTableAdminMixin, bulk_action_confirmation
+
+from . import bulk
 from .models import Company, CompanyMember, CompanyTheme
 
+BRAZILIAN_STATES = [
+    'AC', 'AL', 'AM', 'AP', 'BA', 'CE', 'DF', 'ES', 'GO', 'MA', 'MG', 'MS', 'MT', 'PA',
+    'PB', 'PE', 'PI', 'PR', 'RJ', 'RN', 'RO', 'RR', 'RS', 'SC', 'SE', 'SP', 'TO',
+]
+
+
+class StateListFilter(admin.SimpleListFilter):
+    """
+    Filtro por UF com lista fixa (o filtro padrão faz SELECT DISTINCT na tabela toda).
+    """
+    title = _('estado')
+    parameter_name = 'state'
+
+    def lookups(self, request, model_admin):
+        return [(state, state) for state in BRAZILIAN_STATES]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(state=self.value())
+        return queryset
+
+
+class BulkActionsMixin:
+    """
+    Actions em massa (apps.companies.bulk): cada uma é um UPDATE por tabela.
+    Substituem o ``delete_selected`` padrão, que apaga de verdade objeto a
+    objeto e monta a árvore de relacionados na confirmação.
+    """
+    bulk_set_active = None
+    bulk_soft_delete = None
+    bulk_restore = None
+
+    actions = ['activate_selected', 'deactivate_selected', 'soft_delete_selected', 'restore_selected']
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def report(self, request, label, count):
+        self.message_user(request, _('%(label)s: %(count)d.') % {'label': label, 'count': count}, messages.SUCCESS)
+
+    @admin.action(description=_('Ativar seleção'), permissions=['change'])
+    def activate_selected(self, request, queryset):
+        self.report(request, _('Ativados'), self.bulk_set_active(queryset, True))
+
+    @admin.action(description=_('Desativar seleção'), permissions=['change'])
+    def deactivate_selected(self, request, queryset):
+        self.report(request, _('Desativados'), self.bulk_set_active(queryset, False))
+
+    @admin.action(description=_('Excluir seleção (soft delete)'), permissions=['delete'])
+    def soft_delete_selected(self, request, queryset):
+        if 'post' not in request.POST:
+            return bulk_action_confirmation(self, request, queryset, 'soft_delete_selected', _('Excluir seleção'))
+        self.report(request, _('Excluídos'), self.bulk_soft_delete(queryset))
+
+    @admin.action(description=_('Restaurar seleção'), permissions=['change'])
+    def restore_selected(self, request, queryset):
+        self.report(request, _('Restaurados'), self.bulk_restore(queryset))
+
+
+class RoleChangeForm(forms.Form):
+    role = forms.ChoiceField(label=_('Novo papel'), choices=CompanyMember.Role.choices)
+
 
 class CompanyMemberInline(admin.TabularInline):
     """
@@ -15,6 +89,9 @@ class CompanyMemberInline(admin.TabularInline):
     verbose_name = _('Membro')
     verbose_name_plural = _('Membros da Empresa')
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user')
+
 
 class CompanyThemeInline(admin.StackedInline):
     """
@@ -50,24 +127,30 @@ class CompanyThemeInline(admin.StackedInline):
 
 
 @admin.register(Company)
-class CompanyAdmin(admin.ModelAdmin):
+class CompanyAdmin(BulkActionsMixin, LargeTableAdminMixin, admin.ModelAdmin):
     """
     Admin para gerenciar empresas do programa de fidelidade.
     """
 
+    # Excluir/restaurar propaga para membros e tema
+    bulk_set_active = staticmethod(bulk.set_companies_active)
+    bulk_soft_delete = staticmethod(bulk.soft_delete_companies)
+    bulk_restore = staticmethod(bulk.restore_companies)
+
     list_display = [
         'trade_name',
         'cnpj',
         'city',
         'state',
         'points_per_real',
+        'active_members_count',
         'is_active',
         'created_at'
     ]
 
     list_filter = [
         'is_active',
-        'state',
+        StateListFilter,
         'created_at',
         'deleted_at'
     ]
@@ -80,7 +163,7 @@ class CompanyAdmin(admin.ModelAdmin):
         'city'
     ]
 
-    readonly_fields = ['uuid', 'created_at', 'updated_at', 'deleted_at']
+    readonly_fields = ['uuid', 'active_members_count', 'created_at', 'updated_at', 'deleted_at']
 
     fieldsets = (
         (_('Informações Básicas'), {
@@ -94,7 +177,7 @@ class CompanyAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
         (_('Programa de Fidelidade'), {
-            'fields': ('logo', 'points_per_real', 'is_active')
+            'fields': ('logo', 'points_per_real', 'is_active', 'active_members_count')
         }),
         (_('Auditoria'), {
             'fields': ('created_at', 'updated_at', 'deleted_at'),
@@ -115,11 +198,16 @@ class CompanyAdmin(admin.ModelAdmin):
 
 
 @admin.register(CompanyMember)
-class CompanyMemberAdmin(admin.ModelAdmin):
+class CompanyMemberAdmin(BulkActionsMixin, LargeTableAdminMixin, admin.ModelAdmin):
     """
     Admin para gerenciar relacionamento entre usuários e empresas.
     """
 
+    bulk_set_active = staticmethod(bulk.set_members_active)
+    bulk_soft_delete = staticmethod(bulk.soft_delete_members)
+    bulk_restore = staticmethod(bulk.restore_members)
+    actions = [*BulkActionsMixin.actions, 'change_role_selected']
+
     list_display = [
         'user',
         'company',
@@ -134,6 +222,13 @@ class CompanyMemberAdmin(admin.ModelAdmin):
         'created_at'
     ]
 
+    list_select_related = ['user', 'company']
+
+    # A ordenação padrão do modelo (empresa, papel, usuário) ordena por colunas
+    # de outras tabelas; created_at é indexado
+    ordering = ['-created_at']
+
+    # Mantidos para exibir a caixa de busca; a consulta é montada em get_search_results
     search_fields = [
         'user__email',
         'user__first_name',
@@ -141,6 +236,8 @@ class CompanyMemberAdmin(admin.ModelAdmin):
         'company__trade_name',
         'company__cnpj'
     ]
+    user_search_fields = ['email', 'first_name', 'last_name']
+    company_search_fields = ['trade_name', 'cnpj']
 
     autocomplete_fields = ['user', 'company']
 
@@ -165,13 +262,49 @@ class CompanyMemberAdmin(admin.ModelAdmin):
         """
         return CompanyMember.all_objects.all()
 
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Cada palavra precisa aparecer no usuário ou na empresa. A busca vira
+        ``user_id IN (...) OR company_id IN (...)`` com subqueries que usam os
+        índices trigram de cada tabela, em vez de ``icontains`` sobre o JOIN.
+        """
+        User = get_user_model()
+        conditions = []
+        for word in smart_split(search_term):
+            # Termos entre aspas contam como uma palavra só, como no admin padrão
+            if word.startswith(('"', "'")) and word[0] == word[-1]:
+                word = unescape_string_literal(word)
+            users = User.objects.filter(
+                reduce(or_, (Q(**{f'{field}__icontains': word}) for field in self.user_search_fields))
+            )
+            companies = Company.all_objects.filter(
+                reduce(or_, (Q(**{f'{field}__icontains': word}) for field in self.company_search_fields))
+            )
+            conditions.append(Q(user__in=users.values('pk')) | Q(company__in=companies.values('pk')))
+        if not conditions:
+            return queryset, False
+        return queryset.filter(reduce(and_, conditions)), False
+
+    @admin.action(description=_('Alterar papel da seleção'), permissions=['change'])
+    def change_role_selected(self, request, queryset):
+        form = RoleChangeForm(request.POST if 'post' in request.POST else None)
+        if not form.is_valid():
+            return bulk_action_confirmation(
+                self, request, queryset, 'change_role_selected', _('Alterar papel'), form=form
+            )
+        self.report(request, _('Papel alterado'), bulk.change_members_role(queryset, form.cleaned_data['role']))
+
 
 @admin.register(CompanyTheme)
-class CompanyThemeAdmin(admin.ModelAdmin):
+class CompanyThemeAdmin(BulkActionsMixin, LargeTableAdminMixin, admin.ModelAdmin):
     """
     Admin para gerenciar temas das empresas.
     """
 
+    bulk_set_active = staticmethod(bulk.set_themes_active)
+    bulk_soft_delete = staticmethod(bulk.soft_delete_themes)
+    bulk_restore = staticmethod(bulk.restore_themes)
+
     list_display = [
         'company',
         'primary_color_display',
@@ -185,6 +318,8 @@ class CompanyThemeAdmin(admin.ModelAdmin):
         'created_at'
     ]
 
+    list_select_related = ['company']
+
     search_fields = [
         'company__trade_name',
         'company__cnpj'
@@ -0,0 +1,63 @@
+"""
+Versões assíncronas das leituras de tema e membros (ver apps.common.async_views).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.settings import api_settings
+
+from apps.common.async_views import AsyncReadView
+from apps.common.cache import invalidated_timeout
+from apps.companies.models import CompanyMember, CompanyTheme
+from apps.companies.signals import theme_cache_key
+from .permissions import CanManageCompanyTheme
+from .serializers import CompanyMemberSerializer, CompanyThemeSerializer
+from .views import CompanyMemberCompanyMixin
+
+
+class CompanyThemeAsyncView(AsyncReadView):
+    """
+    ``CompanyThemeViewSet.retrieve``: tema de uma empresa da qual o usuário é
+    membro. As colunas do tema ficam em cache por empresa (invalidado ao salvar).
+    """
+    permission_classes = [IsAuthenticated, CanManageCompanyTheme]
+
+    async def get(self, request, company_uuid):
+        company_id = await CompanyMember.objects.filter(
+            user=request.user,
+            company__uuid=company_uuid,
+            is_active=True,
+            deleted_at__isnull=True
+        ).values_list('company_id', flat=True).afirst()
+        if company_id is None:
+            raise Http404(f'No {CompanyTheme._meta.object_name} matches the given query.')
+
+        reader = CompanyThemeSerializer.compiled_reader
+        key = theme_cache_key(company_id)
+        row = await cache.aget(key)
+        if row is None:
+            row = await reader.values_list(CompanyTheme.objects.filter(company_id=company_id)).afirst()
+            if row is None:
+                raise Http404(f'No {CompanyTheme._meta.object_name} matches the given query.')
+            await cache.aset(key, row, invalidated_timeout(settings.ASYNC_THEME_CACHE_SECONDS))
+
+        await self.check_object_permissions(CompanyTheme(company_id=company_id))
+        return reader.serialize_rows([row], {'request': request})[0]
+
+
+class CompanyMemberListAsyncView(CompanyMemberCompanyMixin, AsyncReadView):
+    """
+    GET de ``CompanyMemberListCreateView`` (sem ``?search=``, que fica com o
+    ``SearchFilter`` da view DRF).
+    """
+    fallback_params = (*AsyncReadView.fallback_params, api_settings.SEARCH_PARAM)
+
+    async def get(self, request, company_uuid):
+        await self.aensure_manage_permission(request)
+        reader = CompanyMemberSerializer.compiled_reader
+        queryset = reader.values_list(self.get_member_list_queryset(await self.aget_company()))
+        return await self.paginate(
+            queryset,
+            lambda rows: reader.serialize_rows(rows, {'request': request}),
+        )
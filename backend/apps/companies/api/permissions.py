@@ -1,5 +1,7 @@
 from rest_framework import permissions
 
+from apps.companies.models import CompanyMember
+
 
 class IsCompanyMemberWithPermission(permissions.BasePermission):
     """
@@ -81,3 +83,18 @@ class CanManageCompanyTheme(permissions.BasePermission):
             return membership.role in ['owner', 'admin']
         except:
             return False
+
+    async def ahas_object_permission(self, request, view, obj):
+        """
+        Versão assíncrona (apps.common.async_views); usa apenas ``obj.company_id``.
+        """
+        if request.method in permissions.SAFE_METHODS:
+            return True
+
+        role = await CompanyMember.objects.filter(
+            company_id=obj.company_id,
+            user=request.user,
+            is_active=True,
+            deleted_at__isnull=True
+        ).values_list('role', flat=True).afirst()
+        return role in ['owner', 'admin']
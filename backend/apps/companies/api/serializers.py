@@ -3,12 +3,29 @@ from django.core.validators import RegexValidator
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from apps.common.compiled import (
+    CompiledReader,
+    Computed,
+    Field,
+    Nested,
+    as_absolute_file_url,
+    as_choice_display,
+    as_datetime,
+    as_decimal,
+    as_str,
+)
+from apps.common.serializers import DynamicFieldsMixin, TimedSerializerMixin
 from apps.companies.models import Company, CompanyMember, CompanyTheme
 
 User = get_user_model()
 
 
-class CompanyThemeSerializer(serializers.ModelSerializer):
+def as_full_name(context):
+    """Mesmo resultado de ``CustomUser.get_full_name`` a partir das colunas."""
+    return lambda first_name, last_name, email: f'{first_name} {last_name}'.strip() or email
+
+
+class CompanyThemeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para o tema da empresa.
     Retorna todas as configurações visuais.
@@ -18,6 +35,47 @@ class CompanyThemeSerializer(serializers.ModelSerializer):
     text = serializers.SerializerMethodField()
     background = serializers.SerializerMethodField()
 
+    field_sources = {
+        'logos': ['logo_light', 'logo_dark', 'favicon'],
+        'colors': [
+            'primary_color', 'secondary_color', 'accent_color',
+            'success_color', 'warning_color', 'error_color',
+        ],
+        'text': ['text_primary', 'text_secondary'],
+        'background': ['background_color', 'background_secondary', 'card_background'],
+    }
+
+    # Especificação equivalente para o leitor compilado (apps.common.compiled)
+    compiled_fields = [
+        Field('uuid', convert=as_str),
+        Nested('logos', '', [
+            Field('light', 'logo_light', convert=as_absolute_file_url(CompanyTheme, 'logo_light')),
+            Field('dark', 'logo_dark', convert=as_absolute_file_url(CompanyTheme, 'logo_dark')),
+            Field('favicon', 'favicon', convert=as_absolute_file_url(CompanyTheme, 'favicon')),
+        ]),
+        Nested('colors', '', [
+            Field('primary', 'primary_color'),
+            Field('secondary', 'secondary_color'),
+            Field('accent', 'accent_color'),
+            Field('success', 'success_color'),
+            Field('warning', 'warning_color'),
+            Field('error', 'error_color'),
+        ]),
+        Nested('text', '', [
+            Field('primary', 'text_primary'),
+            Field('secondary', 'text_secondary'),
+        ]),
+        Nested('background', '', [
+            Field('primary', 'background_color'),
+            Field('secondary', 'background_secondary'),
+            Field('card', 'card_background'),
+        ]),
+        Field('custom_css'),
+        Field('extra_config'),
+        Field('is_active'),
+    ]
+    compiled_reader = CompiledReader(compiled_fields)
+
     class Meta:
         model = CompanyTheme
         fields = [
@@ -63,12 +121,28 @@ class CompanyThemeSerializer(serializers.ModelSerializer):
         }
 
 
-class CompanySerializer(serializers.ModelSerializer):
+class CompanySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer básico para Company.
     """
     logo = serializers.SerializerMethodField()
 
+    compiled_fields = [
+        Field('uuid', convert=as_str),
+        Field('trade_name'),
+        Field('legal_name'),
+        Field('cnpj'),
+        Field('email'),
+        Field('phone'),
+        Field('address'),
+        Field('city'),
+        Field('state'),
+        Field('zip_code'),
+        Field('logo', convert=as_absolute_file_url(Company, 'logo')),
+        Field('points_per_real', convert=as_decimal(2)),
+        Field('is_active'),
+    ]
+
     class Meta:
         model = Company
         fields = [
@@ -94,7 +168,7 @@ class CompanySerializer(serializers.ModelSerializer):
         return None
 
 
-class UserCompanySerializer(serializers.ModelSerializer):
+class UserCompanySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para empresas do usuário (com role e tema).
     Usado em UserSerializer para mostrar empresas que o usuário gerencia.
@@ -103,6 +177,20 @@ class UserCompanySerializer(serializers.ModelSerializer):
     theme = serializers.SerializerMethodField()
     role_display = serializers.CharField(source='get_role_display', read_only=True)
 
+    expandable_fields = ('company', 'theme')
+    field_sources = {'role_display': ['role']}
+    nested_sources = {'theme': ('company__theme', CompanyThemeSerializer)}
+
+    compiled_reader = CompiledReader([
+        Field('uuid', convert=as_str),
+        Nested('company', 'company', CompanySerializer.compiled_fields),
+        Field('role'),
+        Field('role_display', 'role', convert=as_choice_display(CompanyMember.Role.choices)),
+        Nested('theme', 'company__theme', CompanyThemeSerializer.compiled_fields, null_column='id'),
+        Field('is_active'),
+        Field('created_at', convert=as_datetime),
+    ])
+
     class Meta:
         model = CompanyMember
         fields = [
@@ -121,7 +209,16 @@ class UserCompanySerializer(serializers.ModelSerializer):
         """
         try:
             theme = obj.company.theme
-            return CompanyThemeSerializer(theme, context=self.context).data
+        except CompanyTheme.DoesNotExist:
+            return None
+        return CompanyThemeSerializer(theme, context=self.get_child_context('theme')).data
+
+    def get_theme_ref(self, obj):
+        """
+        Forma compacta do tema (apenas UUID), usada quando não expandido.
+        """
+        try:
+            return obj.company.theme.uuid
         except CompanyTheme.DoesNotExist:
             return None
 
@@ -145,13 +242,29 @@ class CompanyMemberUserSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
-class CompanyMemberSerializer(serializers.ModelSerializer):
+class CompanyMemberSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer principal para membros da empresa exibindo dados do usuário.
     """
     user = CompanyMemberUserSerializer(read_only=True)
     role_display = serializers.CharField(source='get_role_display', read_only=True)
 
+    compiled_reader = CompiledReader([
+        Field('uuid', convert=as_str),
+        Field('role'),
+        Field('role_display', 'role', convert=as_choice_display(CompanyMember.Role.choices)),
+        Field('is_active'),
+        Field('created_at', convert=as_datetime),
+        Nested('user', 'user', [
+            Field('id'),
+            Field('email'),
+            Field('first_name'),
+            Field('last_name'),
+            Computed('full_name', ['first_name', 'last_name', 'email'], as_full_name),
+            Field('phone'),
+        ]),
+    ])
+
     class Meta:
         model = CompanyMember
         fields = [
@@ -1,23 +1,43 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
+from apps.common.async_views import async_read_view
+
 from .views import (
     CompanyThemeViewSet,
     CompanyMemberListCreateView,
     CompanyMemberDetailView,
     CompanyMemberPasswordResetView,
+    CompanyExportView,
+    CompanyThemeExportView,
+    CompanyMemberExportView,
 )
+from .async_views import CompanyMemberListAsyncView, CompanyThemeAsyncView
 
 router = DefaultRouter()
 router.register(r'themes', CompanyThemeViewSet, basename='company-theme')
 
+# GET do tema com a view assíncrona (ASYNC_READ_VIEWS)
+router_urls = router.urls
+for pattern in router_urls:
+    if pattern.name == 'company-theme-detail':
+        pattern.callback = async_read_view(pattern.callback, CompanyThemeAsyncView)
+
 urlpatterns = [
-    path('', include(router.urls)),
+    # Exportações em streaming (antes do router para não colidir com themes/<uuid>/)
+    path('export/', CompanyExportView.as_view(), name='company-export'),
+    path('themes/export/', CompanyThemeExportView.as_view(), name='company-theme-export'),
+    path('', include(router_urls)),
     path(
         '<uuid:company_uuid>/members/',
-        CompanyMemberListCreateView.as_view(),
+        async_read_view(CompanyMemberListCreateView.as_view(), CompanyMemberListAsyncView),
         name='company-members',
     ),
+    path(
+        '<uuid:company_uuid>/members/export/',
+        CompanyMemberExportView.as_view(),
+        name='company-members-export',
+    ),
     path(
         '<uuid:company_uuid>/members/<uuid:member_uuid>/',
         CompanyMemberDetailView.as_view(),
@@ -1,11 +1,16 @@
-from django.shortcuts import get_object_or_404
-from rest_framework import viewsets, status, generics
+from django.conf import settings
+from django.shortcuts import aget_object_or_404, get_object_or_404
+from rest_framework import filters, viewsets, status, generics
 from rest_framework.decorators import action
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from drf_spectacular.utils import extend_schema, extend_schema_view
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiTypes
 
+from apps.common.idempotency import DATABASE_STORE_QUERIES, IDEMPOTENCY_KEY_PARAMETER, idempotent
+from apps.common.export import EXPORT_FORMATS, is_asgi_request, parse_columns, streaming_export_response
+from apps.common.serializers import FieldFilter
+from apps.companies.exports import EXPORT_QUERYSETS, EXPORT_RESOURCES
 from apps.companies.models import Company, CompanyMember, CompanyTheme
 from .serializers import (
     CompanySerializer,
@@ -47,6 +52,7 @@ class CompanyThemeViewSet(viewsets.ModelViewSet):
     """
     serializer_class = CompanyThemeSerializer
     permission_classes = [IsAuthenticated, CanManageCompanyTheme]
+    query_budget = 6
     lookup_field = 'company__uuid'
     lookup_url_kwarg = 'company_uuid'
 
@@ -62,10 +68,20 @@ class CompanyThemeViewSet(viewsets.ModelViewSet):
             deleted_at__isnull=True
         ).values_list('company_id', flat=True)
 
-        return CompanyTheme.objects.filter(
+        queryset = CompanyTheme.objects.filter(
             company_id__in=company_ids
         ).select_related('company')
 
+        # Leitura com ?fields=/?omit=: carrega apenas as colunas necessárias
+        if self.action in ['list', 'retrieve']:
+            field_filter = FieldFilter.from_request(self.request)
+            if field_filter is not None:
+                queryset = queryset.only(
+                    'company__uuid',
+                    *CompanyThemeSerializer.get_model_field_paths(field_filter),
+                )
+        return queryset
+
     def get_serializer_class(self):
         """
         Usa serializer diferente para update.
@@ -172,31 +188,63 @@ class CompanyMemberCompanyMixin:
             )
         return self._company_cache
 
-    def ensure_manage_permission(self, request):
-        company = self.get_company()
-        membership = company.companymember_set.filter(
-            user=request.user,
+    async def aget_company(self):
+        if not hasattr(self, '_company_cache'):
+            self._company_cache = await aget_object_or_404(
+                Company,
+                uuid=self.kwargs['company_uuid'],
+                deleted_at__isnull=True
+            )
+        return self._company_cache
+
+    def get_membership_queryset(self, company, user):
+        return company.companymember_set.filter(
+            user=user,
             is_active=True,
             deleted_at__isnull=True
-        ).first()
+        )
+
+    def check_manage_membership(self, membership):
         if not membership:
             raise PermissionDenied('Você não tem acesso a esta empresa.')
         if membership.role not in self.manage_roles:
             raise PermissionDenied('Apenas proprietários ou administradores podem gerenciar usuários.')
         return membership
 
+    def ensure_manage_permission(self, request):
+        company = self.get_company()
+        return self.check_manage_membership(
+            self.get_membership_queryset(company, request.user).first()
+        )
+
+    async def aensure_manage_permission(self, request):
+        company = await self.aget_company()
+        return self.check_manage_membership(
+            await self.get_membership_queryset(company, request.user).afirst()
+        )
+
+    def get_member_list_queryset(self, company):
+        return CompanyMember.objects.filter(
+            company=company,
+            is_active=True,
+        ).select_related('user').order_by('user__first_name', 'user__email')
+
 
 @extend_schema_view(
     get=extend_schema(
         tags=['company-members'],
         summary='Listar membros da empresa',
-        description='Retorna usuários associados à empresa escolhida (apenas para owner/admin).',
+        description=(
+            'Retorna usuários associados à empresa escolhida (apenas para owner/admin). '
+            'Aceita ?search= por nome, sobrenome ou e-mail.'
+        ),
         responses=CompanyMemberSerializer(many=True),
     ),
     post=extend_schema(
         tags=['company-members'],
         summary='Adicionar usuário à empresa',
         description='Cria ou associa um usuário existente à empresa e define o papel.',
+        parameters=[IDEMPOTENCY_KEY_PARAMETER],
         request=CompanyMemberCreateSerializer,
         responses=CompanyMemberSerializer,
     ),
@@ -210,15 +258,29 @@ class CompanyMemberListCreateView(
     """
     serializer_class = CompanyMemberSerializer
     permission_classes = [IsAuthenticated]
+    filter_backends = [filters.SearchFilter]
+    search_fields = ['user__first_name', 'user__last_name', 'user__email']
+    # Criação com Idempotency-Key guardado no banco soma DATABASE_STORE_QUERIES
+    query_budget = 12 + DATABASE_STORE_QUERIES
 
     def get_queryset(self):
         self.ensure_manage_permission(self.request)
-        company = self.get_company()
-        return CompanyMember.objects.filter(
-            company=company,
-            is_active=True,
-        ).select_related('user').order_by('user__first_name', 'user__email')
-
+        return self.get_member_list_queryset(self.get_company())
+
+    def list(self, request, *args, **kwargs):
+        if not settings.COMPILED_READ_SERIALIZERS:
+            return super().list(request, *args, **kwargs)
+
+        # Caminho rápido: tuplas de values_list() direto para o leitor compilado
+        reader = CompanyMemberSerializer.compiled_reader
+        context = self.get_serializer_context()
+        rows = reader.values_list(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(reader.serialize_rows(page, context))
+        return Response(reader.serialize_rows(rows, context))
+
+    @idempotent
     def create(self, request, *args, **kwargs):
         self.ensure_manage_permission(request)
         company = self.get_company()
@@ -318,3 +380,100 @@ class CompanyMemberPasswordResetView(
         return Response({
             'password': password,
         })
+
+
+EXPORT_PARAMETERS = [
+    OpenApiParameter(
+        'type',
+        OpenApiTypes.STR,
+        enum=list(EXPORT_FORMATS),
+        description='Formato do arquivo: csv (padrão) ou ndjson.',
+    ),
+    OpenApiParameter(
+        'columns',
+        OpenApiTypes.STR,
+        description='Colunas separadas por vírgula. Ex: uuid,role,user__email',
+    ),
+]
+
+
+class StreamingExportView(generics.GenericAPIView):
+    """
+    Base para exportações em streaming (CSV/NDJSON).
+
+    As subclasses definem ``export_resource`` e ``get_export_company_ids``.
+    """
+    permission_classes = [IsAuthenticated]
+    export_resource = None
+    pagination_class = None
+
+    def get_export_company_ids(self):
+        raise NotImplementedError
+
+    def get_export_filename(self):
+        return self.export_resource
+
+    def get(self, request, *args, **kwargs):
+        allowed, default = EXPORT_RESOURCES[self.export_resource]
+        export_format = request.query_params.get('type', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError({'type': f'Formato inválido. Opções: {", ".join(EXPORT_FORMATS)}.'})
+        try:
+            columns = parse_columns(request.query_params.get('columns'), allowed, default)
+        except ValueError as exc:
+            raise ValidationError({'columns': str(exc)})
+
+        queryset = EXPORT_QUERYSETS[self.export_resource](self.get_export_company_ids())
+        return streaming_export_response(
+            queryset,
+            columns,
+            export_format,
+            filename=self.get_export_filename(),
+            asynchronous=is_asgi_request(request),
+        )
+
+
+@extend_schema(
+    tags=['companies'],
+    summary='Exportar empresas do usuário',
+    description='Exporta em streaming as empresas das quais o usuário é membro ativo.',
+    parameters=EXPORT_PARAMETERS,
+    responses={200: OpenApiTypes.BINARY},
+)
+class CompanyExportView(StreamingExportView):
+    export_resource = 'companies'
+
+    def get_export_company_ids(self):
+        return self.request.user.company_memberships.filter(
+            is_active=True,
+            deleted_at__isnull=True
+        ).values_list('company_id', flat=True)
+
+
+@extend_schema(
+    tags=['themes'],
+    summary='Exportar temas das empresas do usuário',
+    description='Exporta em streaming os temas das empresas das quais o usuário é membro ativo.',
+    parameters=EXPORT_PARAMETERS,
+    responses={200: OpenApiTypes.BINARY},
+)
+class CompanyThemeExportView(CompanyExportView):
+    export_resource = 'themes'
+
+
+@extend_schema(
+    tags=['company-members'],
+    summary='Exportar membros da empresa',
+    description='Exporta em streaming os membros ativos da empresa (apenas para owner/admin).',
+    parameters=EXPORT_PARAMETERS,
+    responses={200: OpenApiTypes.BINARY},
+)
+class CompanyMemberExportView(CompanyMemberCompanyMixin, StreamingExportView):
+    export_resource = 'members'
+
+    def get_export_company_ids(self):
+        self.ensure_manage_permission(self.request)
+        return [self.get_company().pk]
+
+    def get_export_filename(self):
+        return f'members-{self.get_company().uuid}'
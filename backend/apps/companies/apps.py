@@ -5,3 +5,22 @@ class CompaniesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.companies'
     verbose_name = 'Empresas'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from .models import Company, CompanyMember, CompanyTheme
+        from .signals import (
+            discount_deleted_member,
+            invalidate_company_points_cache,
+            invalidate_membership_cache,
+            invalidate_theme_cache,
+        )
+
+        post_save.connect(invalidate_theme_cache, sender=CompanyTheme, dispatch_uid='companies_theme_cache_save')
+        post_delete.connect(invalidate_theme_cache, sender=CompanyTheme, dispatch_uid='companies_theme_cache_delete')
+        post_save.connect(invalidate_company_points_cache, sender=Company, dispatch_uid='companies_points_cache_save')
+        post_delete.connect(invalidate_company_points_cache, sender=Company, dispatch_uid='companies_points_cache_delete')
+        post_save.connect(invalidate_membership_cache, sender=CompanyMember, dispatch_uid='companies_membership_cache_save')
+        post_delete.connect(invalidate_membership_cache, sender=CompanyMember, dispatch_uid='companies_membership_cache_delete')
+        post_delete.connect(discount_deleted_member, sender=CompanyMember, dispatch_uid='companies_member_counter_delete')
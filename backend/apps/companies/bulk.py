@@ -0,0 +1,138 @@
+"""
+Operações em massa sobre empresas, membros e temas (actions do admin).
+
+Cada operação é um UPDATE por tabela, sem carregar nem salvar os objetos um a
+um. Como ``update()`` não dispara signals, os caches de tema, empresa e
+vínculo (apps.companies.signals) são invalidados aqui, após o commit. Excluir/restaurar uma empresa propaga para membros e tema:
+a exclusão usa o mesmo ``deleted_at`` em tudo e a restauração traz de volta só
+o que foi excluído junto com a empresa. ``Company.active_members_count`` é
+ajustado na mesma transação (apps.companies.counters).
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .counters import adjust_active_members, company_deltas, recount_active_members
+from .models import Company, CompanyMember, CompanyTheme
+from .signals import company_points_cache_key, membership_cache_key, theme_cache_key
+
+
+def invalidate_caches(keys):
+    keys = list(keys)
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_theme_caches(company_ids):
+    invalidate_caches(theme_cache_key(company_id) for company_id in company_ids)
+
+
+def invalidate_company_caches(companies):
+    invalidate_caches(company_points_cache_key(uuid) for uuid in companies.values_list('uuid', flat=True))
+
+
+def invalidate_membership_caches(members):
+    invalidate_caches(
+        membership_cache_key(company_id, user_id)
+        for company_id, user_id in members.values_list('company_id', 'user_id')
+    )
+
+
+# -----------------------------------------------------------------------------
+# Empresas
+# -----------------------------------------------------------------------------
+@transaction.atomic
+def set_companies_active(queryset, is_active):
+    companies = Company.all_objects.filter(pk__in=queryset.values('pk')).exclude(is_active=is_active)
+    invalidate_company_caches(companies)
+    return companies.touch_update(is_active=is_active)
+
+
+@transaction.atomic
+def soft_delete_companies(queryset):
+    # Ids fixados antes: o filtro do admin pode depender de deleted_at
+    company_ids = list(queryset.filter(deleted_at__isnull=True).values_list('pk', flat=True))
+    now = timezone.now()
+    invalidate_company_caches(Company.all_objects.filter(pk__in=company_ids))
+    invalidate_membership_caches(CompanyMember.all_objects.filter(company_id__in=company_ids, deleted_at__isnull=True))
+    count = Company.all_objects.filter(pk__in=company_ids).soft_delete(now)
+    CompanyMember.all_objects.filter(company_id__in=company_ids).soft_delete(now)
+    CompanyTheme.all_objects.filter(company_id__in=company_ids).soft_delete(now)
+    recount_active_members(company_ids)
+    invalidate_theme_caches(company_ids)
+    return count
+
+
+@transaction.atomic
+def restore_companies(queryset):
+    company_ids = list(queryset.filter(deleted_at__isnull=False).values_list('pk', flat=True))
+    invalidate_company_caches(Company.all_objects.filter(pk__in=company_ids))
+    invalidate_membership_caches(
+        CompanyMember.all_objects.filter(company_id__in=company_ids, deleted_at=F('company__deleted_at'))
+    )
+    # Filhos antes da empresa: a comparação usa o deleted_at ainda gravado nela
+    for model in (CompanyMember, CompanyTheme):
+        model.all_objects.filter(company_id__in=company_ids, deleted_at=F('company__deleted_at')).restore()
+    count = Company.all_objects.filter(pk__in=company_ids).restore()
+    recount_active_members(company_ids)
+    invalidate_theme_caches(company_ids)
+    return count
+
+
+# -----------------------------------------------------------------------------
+# Membros
+# -----------------------------------------------------------------------------
+@transaction.atomic
+def set_members_active(queryset, is_active):
+    members = CompanyMember.all_objects.filter(pk__in=queryset.values('pk')).exclude(is_active=is_active)
+    adjust_active_members(company_deltas(members.filter(deleted_at__isnull=True), 1 if is_active else -1))
+    invalidate_membership_caches(members)
+    return members.touch_update(is_active=is_active)
+
+
+@transaction.atomic
+def soft_delete_members(queryset):
+    members = CompanyMember.all_objects.filter(pk__in=queryset.values('pk'), deleted_at__isnull=True)
+    adjust_active_members(company_deltas(members.filter(is_active=True), -1))
+    invalidate_membership_caches(members)
+    return members.soft_delete()
+
+
+@transaction.atomic
+def restore_members(queryset):
+    members = CompanyMember.all_objects.filter(pk__in=queryset.values('pk'), deleted_at__isnull=False)
+    adjust_active_members(company_deltas(members.filter(is_active=True), 1))
+    invalidate_membership_caches(members)
+    return members.restore()
+
+
+@transaction.atomic
+def change_members_role(queryset, role):
+    members = CompanyMember.all_objects.filter(pk__in=queryset.values('pk')).exclude(role=role)
+    invalidate_membership_caches(members)
+    return members.touch_update(role=role)
+
+
+# -----------------------------------------------------------------------------
+# Temas
+# -----------------------------------------------------------------------------
+@transaction.atomic
+def set_themes_active(queryset, is_active):
+    themes = CompanyTheme.all_objects.filter(pk__in=queryset.values('pk')).exclude(is_active=is_active)
+    invalidate_theme_caches(list(themes.values_list('company_id', flat=True)))
+    return themes.touch_update(is_active=is_active)
+
+
+@transaction.atomic
+def soft_delete_themes(queryset):
+    themes = CompanyTheme.all_objects.filter(pk__in=queryset.values('pk'), deleted_at__isnull=True)
+    invalidate_theme_caches(list(themes.values_list('company_id', flat=True)))
+    return themes.soft_delete()
+
+
+@transaction.atomic
+def restore_themes(queryset):
+    themes = CompanyTheme.all_objects.filter(pk__in=queryset.values('pk'), deleted_at__isnull=False)
+    invalidate_theme_caches(list(themes.values_list('company_id', flat=True)))
+    return themes.restore()
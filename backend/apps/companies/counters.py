@@ -0,0 +1,78 @@
+"""
+Contadores desnormalizados em ``Company`` (``active_members_count``).
+
+As escritas ajustam o contador com ``F()`` na mesma transação: ``save()`` de
+``CompanyMember`` (criação, ativação, soft delete, restauração), o
+``post_delete`` (exclusão definitiva) e as operações em massa de
+``apps.companies.bulk``. Escritas fora desses caminhos (``bulk_create``,
+``COPY``, SQL direto) e corridas entre o cálculo do delta e o UPDATE em massa
+são corrigidas por ``recount_active_members`` (``manage.py
+reconcile_company_counters``).
+"""
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import Company, CompanyMember
+
+
+def counted_company_id_in_db(member_pk, using=None):
+    row = CompanyMember.all_objects.using(using).filter(pk=member_pk).values_list(
+        'company_id', 'is_active', 'deleted_at'
+    ).first()
+    if row is None:
+        return None
+    company_id, is_active, deleted_at = row
+    return company_id if is_active and deleted_at is None else None
+
+
+def adjust_active_members(deltas, using=None):
+    """
+    Aplica ``{company_id: delta}`` em um único UPDATE com ``F()``.
+    """
+    deltas = {company_id: delta for company_id, delta in deltas.items() if company_id is not None and delta}
+    if not deltas:
+        return 0
+    increment = Case(
+        *(When(pk=company_id, then=Value(delta)) for company_id, delta in deltas.items()),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    return Company.all_objects.using(using).filter(pk__in=deltas).update(
+        active_members_count=F('active_members_count') + increment
+    )
+
+
+def company_deltas(members, sign):
+    """
+    ``{company_id: sign * n}`` dos vínculos do queryset, calculado antes de um
+    UPDATE em massa que os tira (``sign=-1``) ou coloca (``sign=1``) na conta.
+    """
+    rows = members.order_by().values('company_id').annotate(total=Count('pk')).values_list('company_id', 'total')
+    return {company_id: sign * total for company_id, total in rows}
+
+
+def active_members_subquery():
+    counted = CompanyMember.objects.filter(company=OuterRef('pk'), is_active=True).order_by().values(
+        'company'
+    ).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def recount_active_members(companies=None):
+    """
+    Recalcula o contador das empresas (queryset ou ids; ``None`` = todas).
+    Retorna ``[(company_id, gravado, real)]`` das que estavam divergentes.
+    """
+    queryset = Company.all_objects.all()
+    if companies is not None:
+        queryset = queryset.filter(pk__in=companies)
+    drifted = list(
+        queryset.annotate(actual=active_members_subquery()).exclude(
+            active_members_count=F('actual')
+        ).values_list('pk', 'active_members_count', 'actual')
+    )
+    if drifted:
+        Company.all_objects.filter(pk__in=[row[0] for row in drifted]).update(
+            active_members_count=active_members_subquery()
+        )
+    return drifted
@@ -0,0 +1,109 @@
+"""
+Definições de exportação (colunas permitidas e querysets) para empresas,
+membros e temas.
+"""
+from apps.companies.models import Company, CompanyMember, CompanyTheme
+
+
+MEMBER_EXPORT_COLUMNS = [
+    'uuid',
+    'role',
+    'is_active',
+    'created_at',
+    'user__id',
+    'user__email',
+    'user__first_name',
+    'user__last_name',
+    'user__phone',
+    'company__uuid',
+    'company__trade_name',
+]
+
+MEMBER_DEFAULT_COLUMNS = [
+    'uuid',
+    'role',
+    'is_active',
+    'created_at',
+    'user__email',
+    'user__first_name',
+    'user__last_name',
+    'user__phone',
+]
+
+COMPANY_EXPORT_COLUMNS = [
+    'uuid',
+    'trade_name',
+    'legal_name',
+    'cnpj',
+    'email',
+    'phone',
+    'address',
+    'city',
+    'state',
+    'zip_code',
+    'logo',
+    'points_per_real',
+    'is_active',
+    'created_at',
+]
+
+THEME_EXPORT_COLUMNS = [
+    'uuid',
+    'company__uuid',
+    'company__trade_name',
+    'logo_light',
+    'logo_dark',
+    'favicon',
+    'primary_color',
+    'secondary_color',
+    'accent_color',
+    'success_color',
+    'warning_color',
+    'error_color',
+    'text_primary',
+    'text_secondary',
+    'background_color',
+    'background_secondary',
+    'card_background',
+    'custom_css',
+    'extra_config',
+    'is_active',
+]
+
+# recurso -> (colunas permitidas, colunas padrão)
+EXPORT_RESOURCES = {
+    'members': (MEMBER_EXPORT_COLUMNS, MEMBER_DEFAULT_COLUMNS),
+    'companies': (COMPANY_EXPORT_COLUMNS, COMPANY_EXPORT_COLUMNS),
+    'themes': (THEME_EXPORT_COLUMNS, THEME_EXPORT_COLUMNS),
+}
+
+
+def member_export_queryset(company_ids=None):
+    """
+    Membros ativos, ordenados por PK para um scan sequencial estável.
+    """
+    queryset = CompanyMember.objects.filter(is_active=True)
+    if company_ids is not None:
+        queryset = queryset.filter(company_id__in=company_ids)
+    return queryset.order_by('pk')
+
+
+def company_export_queryset(company_ids=None):
+    queryset = Company.objects.all()
+    if company_ids is not None:
+        queryset = queryset.filter(pk__in=company_ids)
+    return queryset.order_by('pk')
+
+
+def theme_export_queryset(company_ids=None):
+    queryset = CompanyTheme.objects.all()
+    if company_ids is not None:
+        queryset = queryset.filter(company_id__in=company_ids)
+    return queryset.order_by('pk')
+
+
+EXPORT_QUERYSETS = {
+    'members': member_export_queryset,
+    'companies': company_export_queryset,
+    'themes': theme_export_queryset,
+}
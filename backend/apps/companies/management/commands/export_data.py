@@ -0,0 +1,61 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.common import tracing
+from apps.common.export import DEFAULT_CHUNK_SIZE, EXPORT_FORMATS, iter_export, parse_columns
+from apps.companies.exports import EXPORT_QUERYSETS, EXPORT_RESOURCES
+from apps.companies.models import Company
+
+
+class Command(BaseCommand):
+    help = 'Exporta membros, empresas ou temas em CSV/NDJSON via streaming (memória constante).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('resource', choices=sorted(EXPORT_RESOURCES))
+        parser.add_argument('--format', dest='export_format', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--columns', help='Colunas separadas por vírgula.')
+        parser.add_argument('--company', help='UUID da empresa para filtrar a exportação.')
+        parser.add_argument('--output', '-o', help='Arquivo de saída (padrão: stdout).')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        # Continua o trace de quem disparou o comando (variável TRACEPARENT)
+        with tracing.trace_context(
+            f'export_data {options["resource"]}',
+            traceparent=os.environ.get('TRACEPARENT'),
+        ):
+            self.export(options)
+        tracing.flush()
+
+    def export(self, options):
+        resource = options['resource']
+        allowed, default = EXPORT_RESOURCES[resource]
+        try:
+            columns = parse_columns(options['columns'], allowed, default)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        company_ids = None
+        if options['company']:
+            company = Company.objects.filter(uuid=options['company']).only('pk').first()
+            if company is None:
+                raise CommandError('Empresa não encontrada.')
+            company_ids = [company.pk]
+
+        chunks = iter_export(
+            EXPORT_QUERYSETS[resource](company_ids),
+            columns,
+            options['export_format'],
+            chunk_size=options['chunk_size'],
+        )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as fp:
+                for chunk in chunks:
+                    fp.write(chunk)
+            self.stderr.write(self.style.SUCCESS(f'Exportação salva em {options["output"]}'))
+        else:
+            for chunk in chunks:
+                sys.stdout.write(chunk)
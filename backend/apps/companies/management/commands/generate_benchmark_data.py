@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from benchmarks.fixtures import clear_dataset, generate_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera massa sintética para testes de carga: N empresas × M membros, com temas '
+        '(COPY no PostgreSQL, bulk_create nos demais bancos).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--companies', type=int, default=100)
+        parser.add_argument('--members', type=int, default=100, help='Membros por empresa.')
+        parser.add_argument('--themes', type=float, default=1.0, help='Fração das empresas com tema.')
+        parser.add_argument('--admin-companies', type=int, default=5,
+                            help='Empresas das quais o admin de benchmark é dono.')
+        parser.add_argument('--prefix', default='bench', help='Domínio dos e-mails: <prefix>.example.com.')
+        parser.add_argument('--password', default='bench-password')
+        parser.add_argument('--no-copy', action='store_true', help='Força bulk_create mesmo no PostgreSQL.')
+        parser.add_argument('--clear', action='store_true', help='Apaga a massa anterior com o mesmo prefixo.')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            companies, users = clear_dataset(options['prefix'])
+            self.stdout.write(f'Massa anterior removida ({companies + users} registros).')
+
+        start = time.perf_counter()
+        summary = generate_dataset(
+            companies=options['companies'],
+            members=options['members'],
+            themes=options['themes'],
+            admin_companies=options['admin_companies'],
+            prefix=options['prefix'],
+            password=options['password'],
+            use_copy=False if options['no_copy'] else None,
+        )
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{summary["companies"]} empresas, {summary["themes"]} temas, {summary["users"]} usuários e '
+            f'{summary["memberships"]} vínculos criados via {summary["method"]} em {elapsed:.1f}s.'
+        ))
+        self.stdout.write(f'Login: {summary["admin_email"]} / {summary["admin_password"]}')
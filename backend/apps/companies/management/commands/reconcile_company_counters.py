@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.companies.counters import recount_active_members
+from apps.companies.models import Company
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula os contadores desnormalizados de Company (active_members_count) '
+        'e corrige divergências. Rode periodicamente (cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Empresas por transação (intervalos de id).')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        batch_size = options['batch_size']
+        checked = fixed = 0
+        last_pk = 0
+        while True:
+            ids = list(
+                Company.all_objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            last_pk = ids[-1]
+            drifted = recount_active_members(ids)
+            checked += len(ids)
+            fixed += len(drifted)
+            for company_id, stored, actual in drifted:
+                self.stdout.write(self.style.WARNING(
+                    f'empresa {company_id}: active_members_count {stored} -> {actual}'
+                ))
+
+        elapsed = (time.perf_counter() - start) * 1000
+        self.stdout.write(f'{checked} empresas conferidas, {fixed} corrigidas ({elapsed:.0f} ms)')
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:05
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY não roda dentro de transação
+    atomic = False
+
+    dependencies = [
+        ('companies', '0002_companytheme'),
+        # Extensão pg_trgm
+        ('accounts', '0002_admin_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='company',
+            index=models.Index(fields=['trade_name'], name='companies_c_trade_n_f6064f_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='company',
+            index=models.Index(fields=['created_at'], name='companies_c_created_301a54_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='company',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('trade_name'), name='gin_trgm_ops'), name='company_trade_name_trgm'),
+        ),
+        AddIndexConcurrently(
+            model_name='company',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('legal_name'), name='gin_trgm_ops'), name='company_legal_name_trgm'),
+        ),
+        AddIndexConcurrently(
+            model_name='company',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('cnpj'), name='gin_trgm_ops'), name='company_cnpj_trgm'),
+        ),
+        AddIndexConcurrently(
+            model_name='company',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('email'), name='gin_trgm_ops'), name='company_email_trgm'),
+        ),
+        AddIndexConcurrently(
+            model_name='company',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('city'), name='gin_trgm_ops'), name='company_city_trgm'),
+        ),
+        AddIndexConcurrently(
+            model_name='companymember',
+            index=models.Index(fields=['created_at'], name='companies_c_created_644aa6_idx'),
+        ),
+    ]
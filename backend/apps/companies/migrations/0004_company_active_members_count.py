@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:12
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_active_members_count(apps, schema_editor):
+    Company = apps.get_model('companies', 'Company')
+    CompanyMember = apps.get_model('companies', 'CompanyMember')
+    counted = CompanyMember.objects.filter(
+        company=OuterRef('pk'), is_active=True, deleted_at__isnull=True
+    ).order_by().values('company').annotate(total=Count('pk')).values('total')
+    Company.objects.update(active_members_count=Coalesce(Subquery(counted, output_field=IntegerField()), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0003_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='active_members_count',
+            field=models.IntegerField(default=0, editable=False, help_text='Membros ativos e não excluídos', verbose_name='membros ativos'),
+        ),
+        migrations.RunPython(populate_active_members_count, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,16 @@
 from django.conf import settings
 from django.core.validators import RegexValidator
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db import models, router, transaction
+from django.db.models.functions import Upper
 from django.utils.translation import gettext_lazy as _
 
 from apps.common.models import BaseModel
 
 
+# Colunas que decidem se um vínculo entra em Company.active_members_count
+COUNTED_FIELDS = {'company_id', 'is_active', 'deleted_at'}
+
 # Validador para cores em formato HEX
 hex_color_validator = RegexValidator(
     regex=r'^#([A-Fa-f0-9]{6}|[A-Fa-f0-9]{3})$',
@@ -110,6 +115,15 @@ class Company(BaseModel):
         help_text=_('Empresa ativa no programa de fidelidade')
     )
 
+    # Contadores desnormalizados (apps.companies.counters): mantidos com F() na
+    # mesma transação da escrita e conferidos por reconcile_company_counters
+    active_members_count = models.IntegerField(
+        _('membros ativos'),
+        default=0,
+        editable=False,
+        help_text=_('Membros ativos e não excluídos')
+    )
+
     # Relacionamento com usuários (através de CompanyMember)
     members = models.ManyToManyField(
         settings.AUTH_USER_MODEL,
@@ -125,6 +139,14 @@ class Company(BaseModel):
         indexes = [
             models.Index(fields=['cnpj']),
             models.Index(fields=['is_active', 'deleted_at']),
+            models.Index(fields=['trade_name']),
+            models.Index(fields=['created_at']),
+            # Busca do admin (icontains): pg_trgm sobre UPPER(col)
+            GinIndex(OpClass(Upper('trade_name'), name='gin_trgm_ops'), name='company_trade_name_trgm'),
+            GinIndex(OpClass(Upper('legal_name'), name='gin_trgm_ops'), name='company_legal_name_trgm'),
+            GinIndex(OpClass(Upper('cnpj'), name='gin_trgm_ops'), name='company_cnpj_trgm'),
+            GinIndex(OpClass(Upper('email'), name='gin_trgm_ops'), name='company_email_trgm'),
+            GinIndex(OpClass(Upper('city'), name='gin_trgm_ops'), name='company_city_trgm'),
         ]
 
     def __str__(self):
@@ -132,7 +154,8 @@ class Company(BaseModel):
 
     def get_active_members(self):
         """
-        Retorna membros ativos da empresa.
+        Retorna membros ativos da empresa. Para só contar, use
+        ``active_members_count``.
         """
         return self.companymember_set.filter(is_active=True)
 
@@ -195,11 +218,47 @@ class CompanyMember(BaseModel):
         indexes = [
             models.Index(fields=['user', 'is_active']),
             models.Index(fields=['company', 'is_active']),
+            models.Index(fields=['created_at']),
         ]
 
     def __str__(self):
         return f'{self.user.get_full_name()} - {self.company.trade_name} ({self.get_role_display()})'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if COUNTED_FIELDS.issubset(field_names):
+            instance._counted_company_id = instance.counted_company_id()
+        return instance
+
+    def counted_company_id(self):
+        """
+        Empresa em cujo ``active_members_count`` este vínculo entra (ativo e
+        não excluído), ou ``None``.
+        """
+        return self.company_id if self.is_active and self.deleted_at is None else None
+
+    def save(self, *args, **kwargs):
+        """
+        Salva e ajusta ``Company.active_members_count`` na mesma transação
+        (criação, ativação/desativação, soft delete e restauração).
+        """
+        from .counters import adjust_active_members, counted_company_id_in_db
+
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            if self._state.adding and self.pk is None:
+                previous = None
+            elif hasattr(self, '_counted_company_id'):
+                previous = self._counted_company_id
+            else:
+                previous = counted_company_id_in_db(self.pk, using)
+            super().save(*args, **kwargs)
+            current = self.counted_company_id()
+            if previous != current:
+                adjust_active_members({previous: -1, current: 1}, using=using)
+            self._counted_company_id = current
+
     def has_permission(self, permission):
         """
         Verifica se o membro tem uma determinada permissão.
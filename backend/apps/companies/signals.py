@@ -0,0 +1,37 @@
+"""
+Invalidação dos caches de empresa, vínculo e tema (lidos pela view assíncrona
+do tema e pelo acúmulo de pontos em apps.loyalty) e contador de membros
+ativos na exclusão definitiva de um vínculo.
+"""
+from django.core.cache import cache
+
+
+def theme_cache_key(company_id):
+    return f'companies:theme:v1:{company_id}'
+
+
+def company_points_cache_key(company_uuid):
+    return f'companies:points:v1:{company_uuid}'
+
+
+def membership_cache_key(company_id, user_id):
+    return f'companies:membership:v1:{company_id}:{user_id}'
+
+
+def invalidate_theme_cache(sender, instance, **kwargs):
+    cache.delete(theme_cache_key(instance.company_id))
+
+
+def invalidate_company_points_cache(sender, instance, **kwargs):
+    cache.delete(company_points_cache_key(instance.uuid))
+
+
+def invalidate_membership_cache(sender, instance, **kwargs):
+    cache.delete(membership_cache_key(instance.company_id, instance.user_id))
+
+
+def discount_deleted_member(sender, instance, using, **kwargs):
+    from .counters import adjust_active_members
+
+    company_id = getattr(instance, '_counted_company_id', instance.counted_company_id())
+    adjust_active_members({company_id: -1}, using=using)
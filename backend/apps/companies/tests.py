@@ -1,3 +1,617 @@
-from django.test import TestCase
+import csv
+from functools import partial
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import orjson
+from asgiref.sync import async_to_sync
+from django.contrib import admin
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIClient
+
+from apps.common.admin import EstimatedCountPaginator
+from apps.common.export import aiter_export, iter_export, parse_columns
+from apps.common.serializers import FieldFilter, parse_field_tree
+from apps.companies import bulk
+from apps.companies.api.serializers import CompanyThemeSerializer, UserCompanySerializer
+from apps.companies.exports import MEMBER_DEFAULT_COLUMNS, MEMBER_EXPORT_COLUMNS, member_export_queryset
+from apps.companies.models import Company, CompanyMember, CompanyTheme
+from apps.companies.signals import company_points_cache_key, membership_cache_key, theme_cache_key
+
+User = get_user_model()
+
+
+def create_company(name, cnpj):
+    return Company.objects.create(
+        trade_name=name, legal_name=f'{name} Ltda', cnpj=cnpj, email=f'{name.lower()}@example.com'
+    )
+
+
+def create_user(name):
+    return User.objects.create_user(email=f'{name.lower()}@example.com', password=None, first_name=name)
+
+
+class CompaniesTestMixin:
+    def setUp(self):
+        self.company = create_company('Loja', '00.000.000/0001-00')
+        self.other = create_company('Outra', '00.000.000/0002-00')
+        self.users = [create_user(f'Membro{index}') for index in range(4)]
+
+    def add_member(self, user, company=None, **fields):
+        return CompanyMember.objects.create(company=company or self.company, user=user, **fields)
+
+
+class ActiveMembersCountTests(CompaniesTestMixin, TestCase):
+    def assert_counts(self):
+        for company in Company.all_objects.all():
+            actual = CompanyMember.objects.filter(company=company, is_active=True).count()
+            self.assertEqual(company.active_members_count, actual, company)
+
+    def test_create(self):
+        self.add_member(self.users[0])
+        self.add_member(self.users[1], is_active=False)
+        self.add_member(self.users[2], company=self.other)
+        self.assert_counts()
+        self.assertEqual(Company.objects.get(pk=self.company.pk).active_members_count, 1)
+
+    def test_deactivate_and_activate(self):
+        member = self.add_member(self.users[0])
+        member.is_active = False
+        member.save()
+        self.assert_counts()
+        member.is_active = True
+        member.save()
+        self.assert_counts()
+        # Salvar sem mudar o que conta não mexe no contador
+        member.role = CompanyMember.Role.ADMIN
+        member.save()
+        self.assert_counts()
+
+    def test_save_of_loaded_instance(self):
+        self.add_member(self.users[0])
+        member = CompanyMember.objects.get(user=self.users[0])
+        member.is_active = False
+        member.save(update_fields=['is_active'])
+        self.assert_counts()
+
+    def test_move_to_other_company(self):
+        member = self.add_member(self.users[0])
+        member.company = self.other
+        member.save()
+        self.assert_counts()
+        self.assertEqual(Company.objects.get(pk=self.other.pk).active_members_count, 1)
+
+    def test_soft_delete_and_restore(self):
+        member = self.add_member(self.users[0])
+        self.add_member(self.users[1])
+        member.delete()
+        self.assert_counts()
+        member.restore()
+        self.assert_counts()
+
+    def test_hard_delete(self):
+        member = self.add_member(self.users[0])
+        self.add_member(self.users[1])
+        member.hard_delete()
+        self.assert_counts()
+        inactive = self.add_member(self.users[2], is_active=False)
+        inactive.hard_delete()
+        self.assert_counts()
+
+    def test_bulk_members(self):
+        for user in self.users[:3]:
+            self.add_member(user)
+        self.add_member(self.users[3], company=self.other, is_active=False)
+        members = CompanyMember.all_objects.all()
+
+        bulk.set_members_active(members, False)
+        self.assert_counts()
+        bulk.set_members_active(members.filter(user__in=self.users[1:]), True)
+        self.assert_counts()
+        bulk.soft_delete_members(members.filter(user=self.users[1]))
+        self.assert_counts()
+        # Já excluído ou já ativo: não conta duas vezes
+        bulk.soft_delete_members(members)
+        bulk.set_members_active(members, True)
+        self.assert_counts()
+        bulk.restore_members(members)
+        self.assert_counts()
+
+    def test_bulk_companies(self):
+        for user in self.users[:2]:
+            self.add_member(user)
+        self.add_member(self.users[2], company=self.other)
+        removed = self.add_member(self.users[3])
+        removed.delete()
+
+        bulk.soft_delete_companies(Company.all_objects.filter(pk=self.company.pk))
+        self.assert_counts()
+        self.assertEqual(Company.all_objects.get(pk=self.company.pk).active_members_count, 0)
+        bulk.restore_companies(Company.all_objects.all())
+        self.assert_counts()
+        # Só volta o que foi excluído junto com a empresa
+        self.assertTrue(CompanyMember.all_objects.get(pk=removed.pk).is_deleted)
+        self.assertEqual(Company.objects.get(pk=self.company.pk).active_members_count, 2)
+
+    def test_reconcile_repairs_drift(self):
+        self.add_member(self.users[0])
+        # bulk_create não passa pelo save(): o contador fica para trás
+        CompanyMember.objects.bulk_create([
+            CompanyMember(company=self.company, user=self.users[1]),
+            CompanyMember(company=self.other, user=self.users[2]),
+        ])
+        Company.objects.filter(pk=self.other.pk).update(active_members_count=7)
+
+        out = StringIO()
+        call_command('reconcile_company_counters', '--batch-size', '1', stdout=out)
+        self.assert_counts()
+        self.assertIn(f'empresa {self.company.pk}: active_members_count 1 -> 2', out.getvalue())
+        self.assertIn(f'empresa {self.other.pk}: active_members_count 7 -> 1', out.getvalue())
+        self.assertIn('2 empresas conferidas, 2 corrigidas', out.getvalue())
+
+        out = StringIO()
+        call_command('reconcile_company_counters', stdout=out)
+        self.assertIn('0 corrigidas', out.getvalue())
+
+
+class AdminTestMixin(CompaniesTestMixin):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.admin = User.objects.create_superuser(email='admin@example.com', password=None, first_name='Admin')
+        self.client.force_login(self.admin)
+
+    def changelist(self, model):
+        return reverse(f'admin:companies_{model._meta.model_name}_changelist')
+
+    def action(self, model, action, objects=(), **data):
+        data = {'action': action, ACTION_CHECKBOX_NAME: [obj.pk for obj in objects], **data}
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.changelist(model), data)
+
+    def fill_caches(self, *keys):
+        cache.set_many({key: 'stale' for key in keys})
+
+    def assert_cleared(self, *keys):
+        self.assertEqual(cache.get_many(keys), {})
+
+
+class BulkAdminActionTests(AdminTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.members = [self.add_member(user) for user in self.users[:3]]
+        self.member_keys = [membership_cache_key(member.company_id, member.user_id) for member in self.members]
+
+    def test_default_delete_is_replaced(self):
+        response = self.client.get(self.changelist(CompanyMember))
+        actions = dict(response.context['action_form'].fields['action'].choices)
+        self.assertNotIn('delete_selected', actions)
+        self.assertIn('soft_delete_selected', actions)
+        self.assertIn('change_role_selected', actions)
+
+    def test_deactivate_and_activate(self):
+        self.fill_caches(*self.member_keys)
+        response = self.action(CompanyMember, 'deactivate_selected', self.members[:2])
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(CompanyMember.objects.filter(is_active=False).count(), 2)
+        self.assertEqual(Company.objects.get(pk=self.company.pk).active_members_count, 1)
+        self.assert_cleared(*self.member_keys[:2])
+        self.assertEqual(cache.get(self.member_keys[2]), 'stale')
+
+        self.action(CompanyMember, 'activate_selected', self.members)
+        self.assertFalse(CompanyMember.objects.filter(is_active=False).exists())
+        self.assertEqual(Company.objects.get(pk=self.company.pk).active_members_count, 3)
+
+    def test_soft_delete_asks_for_confirmation(self):
+        self.fill_caches(*self.member_keys)
+        response = self.action(CompanyMember, 'soft_delete_selected', self.members[:2])
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'admin/bulk_action_confirmation.html')
+        self.assertEqual(response.context['count'], 2)
+        self.assertEqual(response.context['selected'], [str(member.pk) for member in self.members[:2]])
+        self.assertContains(response, 'name="post" value="yes"')
+        self.assertEqual(CompanyMember.objects.count(), 3)
+        self.assertEqual(cache.get(self.member_keys[0]), 'stale')
+
+        response = self.action(CompanyMember, 'soft_delete_selected', self.members[:2], post='yes')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(CompanyMember.objects.all()), [self.members[2]])
+        self.assertEqual(CompanyMember.all_objects.count(), 3)
+        self.assertEqual(Company.objects.get(pk=self.company.pk).active_members_count, 1)
+        self.assert_cleared(*self.member_keys[:2])
+
+    def test_select_across(self):
+        response = self.action(CompanyMember, 'soft_delete_selected', self.members[:1], select_across='1')
+        self.assertEqual(response.context['count'], 3)
+        self.assertContains(response, 'name="select_across" value="1"')
+        self.action(CompanyMember, 'soft_delete_selected', self.members[:1], select_across='1', post='yes')
+        self.assertFalse(CompanyMember.objects.exists())
+
+    def test_restore(self):
+        self.members[0].delete()
+        self.fill_caches(self.member_keys[0])
+        self.action(CompanyMember, 'restore_selected', CompanyMember.all_objects.all())
+        self.assertEqual(CompanyMember.objects.count(), 3)
+        self.assertEqual(Company.objects.get(pk=self.company.pk).active_members_count, 3)
+        self.assert_cleared(self.member_keys[0])
+
+    def test_change_role(self):
+        self.fill_caches(*self.member_keys)
+        response = self.action(CompanyMember, 'change_role_selected', self.members[:2])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('role', response.context['form'].fields)
+        self.assertFalse(CompanyMember.objects.exclude(role=CompanyMember.Role.ATTENDANT).exists())
+
+        response = self.action(CompanyMember, 'change_role_selected', self.members[:2], post='yes', role='chefe')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors)
+
+        response = self.action(
+            CompanyMember, 'change_role_selected', self.members[:2], post='yes', role=CompanyMember.Role.ADMIN
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            set(CompanyMember.objects.filter(role=CompanyMember.Role.ADMIN)), set(self.members[:2])
+        )
+        self.assert_cleared(*self.member_keys[:2])
+        self.assertEqual(cache.get(self.member_keys[2]), 'stale')
+
+    def test_company_soft_delete_and_restore(self):
+        theme = CompanyTheme.objects.create(company=self.company)
+        keys = [
+            company_points_cache_key(self.company.uuid),
+            theme_cache_key(self.company.pk),
+            *self.member_keys,
+        ]
+        self.fill_caches(*keys)
+        self.action(Company, 'soft_delete_selected', [self.company], post='yes')
+        self.assertFalse(Company.objects.filter(pk=self.company.pk).exists())
+        self.assertFalse(CompanyMember.objects.exists())
+        self.assertFalse(CompanyTheme.objects.filter(pk=theme.pk).exists())
+        self.assert_cleared(*keys)
+
+        self.fill_caches(*keys)
+        self.action(Company, 'restore_selected', [Company.all_objects.get(pk=self.company.pk)])
+        self.assertEqual(CompanyMember.objects.count(), 3)
+        self.assertTrue(CompanyTheme.objects.filter(pk=theme.pk).exists())
+        self.assertEqual(Company.objects.get(pk=self.company.pk).active_members_count, 3)
+        self.assert_cleared(*keys)
+
+    def test_company_deactivate(self):
+        key = company_points_cache_key(self.company.uuid)
+        self.fill_caches(key)
+        self.action(Company, 'deactivate_selected', [self.company, self.other])
+        self.assertFalse(Company.objects.filter(is_active=True).exists())
+        self.assert_cleared(key)
+
+    def test_theme_deactivate(self):
+        theme = CompanyTheme.objects.create(company=self.company)
+        self.fill_caches(theme_cache_key(self.company.pk))
+        self.action(CompanyTheme, 'deactivate_selected', [theme])
+        self.assertFalse(CompanyTheme.objects.get(pk=theme.pk).is_active)
+        self.assert_cleared(theme_cache_key(self.company.pk))
+
+
+class AdminSearchTests(AdminTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.users[1].last_name = 'Souza Lima'
+        self.users[1].save()
+        self.add_member(self.users[0])
+        self.add_member(self.users[1])
+        self.add_member(self.users[2], company=self.other)
+        self.add_member(self.users[1], company=self.other).delete()
+        self.model_admin = admin.site._registry[CompanyMember]
+
+    def search(self, search_term, method):
+        queryset = self.model_admin.get_queryset(None)
+        results, _ = method(None, queryset, search_term)
+        return sorted(results.values_list('pk', flat=True).distinct())
+
+    def test_matches_default_search(self):
+        default = partial(admin.ModelAdmin.get_search_results, self.model_admin)
+        for search_term in [
+            '', 'membro', 'MEMBRO1', 'loja', 'outra membro2', 'membro0 outra', '0001', 'example.com',
+            'souza', '"souza lima"', '"lima souza"', 'inexistente',
+        ]:
+            with self.subTest(search_term=search_term):
+                self.assertEqual(
+                    self.search(search_term, self.model_admin.get_search_results),
+                    self.search(search_term, default),
+                )
+
+    def test_changelist_search(self):
+        response = self.client.get(self.changelist(CompanyMember), {'q': 'souza outra'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+
+class EstimatedCountPaginatorTests(AdminTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        for user in self.users:
+            self.add_member(user)
+        connection = connections[DEFAULT_DB_ALIAS]
+        self.patch(mock.patch.object(connection, 'vendor', 'postgresql'))
+        self.table_estimate = self.patch(mock.patch('apps.common.admin.table_estimate', return_value=250000))
+        self.plan_estimate = self.patch(mock.patch('apps.common.admin.plan_estimate', return_value=150000))
+
+    def patch(self, patcher):
+        mocked = patcher.start()
+        self.addCleanup(patcher.stop)
+        return mocked
+
+    def count(self, queryset):
+        return EstimatedCountPaginator(queryset, 20).count
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=100000)
+    def test_estimate_above_threshold(self):
+        self.assertEqual(self.count(CompanyMember.all_objects.all()), 250000)
+        self.assertEqual(self.count(CompanyMember.all_objects.filter(is_active=True)), 150000)
+        self.table_estimate.assert_called_once_with(mock.ANY, CompanyMember._meta.db_table)
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1000000)
+    def test_exact_count_below_threshold(self):
+        self.assertEqual(self.count(CompanyMember.all_objects.all()), 4)
+        self.assertEqual(self.count(CompanyMember.all_objects.filter(user=self.users[0])), 1)
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=100000)
+    def test_exact_count_without_statistics(self):
+        self.table_estimate.return_value = None
+        self.assertEqual(self.count(CompanyMember.all_objects.all()), 4)
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=0)
+    def test_disabled(self):
+        self.assertEqual(self.count(CompanyMember.all_objects.all()), 4)
+        self.table_estimate.assert_not_called()
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=100000)
+    def test_exact_count_on_other_databases(self):
+        with mock.patch.object(connections[DEFAULT_DB_ALIAS], 'vendor', 'sqlite'):
+            self.assertEqual(self.count(CompanyMember.all_objects.all()), 4)
+        self.table_estimate.assert_not_called()
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=100000)
+    def test_changelist_uses_estimate(self):
+        response = self.client.get(self.changelist(CompanyMember))
+        self.assertEqual(response.context['cl'].result_count, 250000)
+        self.assertIsNone(response.context['cl'].full_result_count)
+
+
+class CompiledMemberListTests(CompaniesTestMixin, TestCase):
+    """
+    Paridade do leitor compilado (COMPILED_READ_SERIALIZERS) com o serializer DRF.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.owner = self.users[0]
+        self.add_member(self.owner, role=CompanyMember.Role.OWNER)
+        self.add_member(self.users[1], role=CompanyMember.Role.ADMIN)
+        # Sem nome: full_name cai no e-mail
+        self.users[2].first_name = ''
+        self.users[2].phone = '(11) 3333-4444'
+        self.users[2].save()
+        self.add_member(self.users[2])
+        self.add_member(self.users[3], is_active=False)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.url = reverse('company-members', kwargs={'company_uuid': self.company.uuid})
+
+    def get(self, compiled, **params):
+        with override_settings(COMPILED_READ_SERIALIZERS=compiled):
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_matches_serializer(self):
+        expected = self.get(False)
+        self.assertEqual(self.get(True), expected)
+        members = expected['results']
+        self.assertEqual(len(members), 3)
+        self.assertIn('Proprietário', [member['role_display'] for member in members])
+        self.assertIn(self.users[2].email, [member['user']['full_name'] for member in members])
+
+    def test_matches_serializer_with_search_and_pages(self):
+        self.assertEqual(self.get(True, search='membro1'), self.get(False, search='membro1'))
+        with mock.patch.object(PageNumberPagination, 'page_size', 2):
+            self.assertEqual(self.get(True, page=2), self.get(False, page=2))
+
+    @override_settings(TIME_ZONE='UTC')
+    def test_matches_serializer_in_utc(self):
+        self.assertEqual(self.get(True), self.get(False))
+
+
+class FieldFilterTests(SimpleTestCase):
+    def test_parse_field_tree(self):
+        self.assertIsNone(parse_field_tree(None))
+        self.assertEqual(parse_field_tree(''), {})
+        self.assertEqual(parse_field_tree(' a, b.c ,b.d,,b.c.e'), {'a': {}, 'b': {'c': {'e': {}}, 'd': {}}})
+
+    def test_from_request(self):
+        factory = RequestFactory()
+        self.assertIsNone(FieldFilter.from_request(None))
+        self.assertIsNone(FieldFilter.from_request(factory.get('/', {'page': 2})))
+        field_filter = FieldFilter.from_request(factory.get('/', {'omit': 'a.b', 'expand': ''}))
+        self.assertIsNone(field_filter.fields)
+        self.assertEqual(field_filter.omit, {'a': {'b': {}}})
+        self.assertEqual(field_filter.expand, {})
+
+    def test_child(self):
+        field_filter = FieldFilter(fields=parse_field_tree('a.x,b'), omit=parse_field_tree('a.y'))
+        self.assertTrue(field_filter.is_included('a'))
+        self.assertFalse(field_filter.is_included('c'))
+        child = field_filter.child('a')
+        self.assertEqual((child.fields, child.omit, child.expand), ({'x': {}}, {'y': {}}, None))
+        # Campo sem sub-caminho vem completo
+        self.assertIsNone(field_filter.child('b'))
+
+    def test_expand(self):
+        field_filter = FieldFilter(expand=parse_field_tree('a'))
+        self.assertTrue(field_filter.is_expanded('a'))
+        self.assertFalse(field_filter.is_expanded('b'))
+        # Abaixo de um campo expandido sem sub-caminho, nada mais é expandido
+        self.assertFalse(field_filter.child('a').is_expanded('c'))
+        self.assertTrue(FieldFilter().is_expanded('a'))
+
+    def test_model_field_paths(self):
+        field_filter = FieldFilter(fields=parse_field_tree('role_display,company.trade_name,theme.colors'))
+        self.assertEqual(UserCompanySerializer.get_model_field_paths(field_filter), [
+            'id', 'company__id', 'company__trade_name', 'role',
+            'company__theme__id', *(f'company__theme__{name}' for name in CompanyThemeSerializer.field_sources['colors']),
+        ])
+        collapsed = FieldFilter(expand={})
+        self.assertIn('company__uuid', UserCompanySerializer.get_model_field_paths(collapsed))
+        self.assertNotIn('company__trade_name', UserCompanySerializer.get_model_field_paths(collapsed))
+
+
+class ThemeFieldSelectionTests(CompaniesTestMixin, TestCase):
+    """
+    ``?fields=``/``?omit=`` na listagem de temas (``only()`` em get_queryset).
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.users[0]
+        for company in (self.company, self.other):
+            CompanyTheme.objects.create(company=company)
+            self.add_member(self.user, company=company)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, **params):
+        response = self.client.get(reverse('company-theme-list'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_fields_and_omit(self):
+        full = self.get()
+        self.assertEqual(self.get(fields='uuid,colors'), [
+            {'uuid': theme['uuid'], 'colors': theme['colors']} for theme in full
+        ])
+        self.assertEqual(self.get(omit='logos,custom_css,nope'), [
+            {key: value for key, value in theme.items() if key not in ('logos', 'custom_css')} for theme in full
+        ])
+
+    def test_deferred_columns_are_not_loaded_per_row(self):
+        selections = [{'fields': 'colors'}, {'fields': 'uuid,text', 'omit': 'text'}, {'omit': 'logos'}]
+        for index, params in enumerate(selections, start=3):
+            with CaptureQueriesContext(connection) as before:
+                self.get(**params)
+            company = create_company(f'Nova{index}', f'00.000.000/{index:04d}-00')
+            CompanyTheme.objects.create(company=company)
+            self.add_member(self.user, company=company)
+            with CaptureQueriesContext(connection) as after:
+                self.get(**params)
+            self.assertEqual(len(after), len(before), params)
+
+
+class ExportTests(CompaniesTestMixin, TestCase):
+    """
+    Exportação em streaming (apps.common.export) e as views de exportação.
+    """
+    columns = ['user__email', 'user__first_name', 'user__phone']
+
+    def setUp(self):
+        super().setUp()
+        self.owner = self.users[0]
+        self.add_member(self.owner, role=CompanyMember.Role.OWNER)
+        self.add_member(self.users[1], role=CompanyMember.Role.ATTENDANT)
+        # Valores que uma planilha executaria como fórmula
+        self.users[2].first_name = '=HYPERLINK("http://example.com","x")'
+        self.users[2].phone = '+55 11 99999-0000'
+        self.users[2].save()
+        self.add_member(self.users[2])
+        self.users[3].first_name = '@SUM(1+1)'
+        self.users[3].last_name = '-2'
+        self.users[3].save()
+        self.add_member(self.users[3], company=self.other)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def export(self, export_format='csv', chunk_size=2):
+        return ''.join(iter_export(member_export_queryset(), self.columns, export_format, chunk_size=chunk_size))
+
+    def aexport(self, export_format='csv', chunk_size=2):
+        async def collect():
+            chunks = aiter_export(member_export_queryset(), self.columns, export_format, chunk_size=chunk_size)
+            return ''.join([chunk async for chunk in chunks])
+        return async_to_sync(collect)()
+
+    def test_csv_escapes_formulas(self):
+        rows = list(csv.reader(StringIO(self.export())))
+        self.assertEqual(rows[0], self.columns)
+        self.assertEqual(rows[3], ['membro2@example.com', '\'=HYPERLINK("http://example.com","x")', "'+55 11 99999-0000"])
+        self.assertEqual(rows[4][1], "'@SUM(1+1)")
+        self.assertEqual(rows[1], ['membro0@example.com', 'Membro0', ''])
+
+    def test_ndjson_keeps_raw_values(self):
+        rows = [orjson.loads(line) for line in self.export('ndjson').splitlines()]
+        self.assertEqual(rows[2]['user__first_name'], '=HYPERLINK("http://example.com","x")')
+        self.assertEqual(rows[2]['user__phone'], '+55 11 99999-0000')
+
+    def test_async_matches_sync(self):
+        for export_format in ('csv', 'ndjson'):
+            for chunk_size in (1, 2, 4, 100):
+                self.assertEqual(
+                    self.aexport(export_format, chunk_size),
+                    self.export(export_format, chunk_size),
+                    (export_format, chunk_size),
+                )
+
+    def test_parse_columns(self):
+        self.assertEqual(parse_columns('', MEMBER_EXPORT_COLUMNS, MEMBER_DEFAULT_COLUMNS), MEMBER_DEFAULT_COLUMNS)
+        self.assertEqual(parse_columns(' uuid , role,', MEMBER_EXPORT_COLUMNS), ['uuid', 'role'])
+        with self.assertRaisesMessage(ValueError, 'user__password, company__cnpj'):
+            parse_columns('uuid,user__password,company__cnpj', MEMBER_EXPORT_COLUMNS)
+
+    def get(self, name, company=None, **params):
+        kwargs = {'company_uuid': company.uuid} if company is not None else {}
+        return self.client.get(reverse(name, kwargs=kwargs), params)
+
+    def read(self, response):
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_member_export_view(self):
+        response = self.get('company-members-export', self.company, columns='user__email,user__first_name')
+        rows = list(csv.reader(StringIO(self.read(response))))
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn(f'members-{self.company.uuid}.csv', response['Content-Disposition'])
+        self.assertEqual(rows[0], ['user__email', 'user__first_name'])
+        self.assertEqual([row[0] for row in rows[1:]], [f'membro{index}@example.com' for index in range(3)])
+        self.assertEqual(rows[3][1], '\'=HYPERLINK("http://example.com","x")')
+
+    def test_invalid_columns_and_format(self):
+        response = self.get('company-members-export', self.company, columns='uuid,user__password')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('columns', response.json())
+        response = self.get('company-export', type='xlsx')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('type', response.json())
+
+    def test_member_export_permissions(self):
+        # Atendente não exporta; empresa sem vínculo também não
+        self.client.force_authenticate(self.users[1])
+        self.assertEqual(self.get('company-members-export', self.company).status_code, 403)
+        self.client.force_authenticate(self.owner)
+        self.assertEqual(self.get('company-members-export', self.other).status_code, 403)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.get('company-members-export', self.company).status_code, 401)
+
+    def test_company_export_is_scoped_to_memberships(self):
+        lines = self.read(self.get('company-export', type='ndjson', columns='trade_name')).splitlines()
+        self.assertEqual([orjson.loads(line) for line in lines], [{'trade_name': 'Loja'}])
+        CompanyTheme.objects.create(company=self.company)
+        CompanyTheme.objects.create(company=self.other)
+        rows = list(csv.reader(StringIO(self.read(self.get('company-theme-export', columns='company__trade_name')))))
+        self.assertEqual(rows, [['company__trade_name'], ['Loja']])
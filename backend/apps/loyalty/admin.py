@@ -0,0 +1,65 @@
+from django.contrib import admin
+from django.utils.translation import gettext_lazy as _
+
+from apps.common.admin import LargeTableAdminMixin
+
+from .models import PointsBalance, PointsCheckpoint, PointsTransaction
+
+
+class ReadOnlyAdminMixin:
+    """
+    Extrato e saldos só mudam pelo motor de pontos (apps.loyalty.ledger).
+    """
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(PointsTransaction)
+class PointsTransactionAdmin(ReadOnlyAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
+    """
+    Extrato de pontos (somente leitura).
+    """
+
+    list_display = ['created_at', 'kind', 'points', 'customer', 'company', 'purchase_amount', 'reference']
+    list_filter = ['kind', 'created_at']
+    list_select_related = ['customer', 'company']
+    search_fields = ['=reference', '=customer__email']
+    search_help_text = _('Buscar pela referência exata ou pelo email do cliente')
+    ordering = ['-created_at']
+    raw_id_fields = ['customer', 'company', 'created_by']
+
+
+@admin.register(PointsBalance)
+class PointsBalanceAdmin(ReadOnlyAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
+    """
+    Saldos materializados (somente leitura).
+    """
+
+    list_display = ['customer', 'company', 'points', 'updated_at']
+    list_select_related = ['customer', 'company']
+    search_fields = ['=customer__email']
+    search_help_text = _('Buscar pelo email exato do cliente')
+    ordering = ['-pk']
+    raw_id_fields = ['customer', 'company']
+
+
+@admin.register(PointsCheckpoint)
+class PointsCheckpointAdmin(ReadOnlyAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
+    """
+    Fechamentos mensais do extrato (somente leitura; aggregate/rebuild_points_checkpoints).
+    """
+
+    list_display = ['period', 'customer', 'company', 'credits', 'debits', 'closing_balance']
+    list_filter = ['period']
+    list_select_related = ['customer', 'company']
+    search_fields = ['=customer__email']
+    search_help_text = _('Buscar pelo email exato do cliente')
+    ordering = ['-period']
+    raw_id_fields = ['customer', 'company']
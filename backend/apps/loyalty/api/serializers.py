@@ -0,0 +1,118 @@
+from datetime import datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.base_user import BaseUserManager
+from drf_spectacular.utils import extend_schema_field
+from rest_framework import serializers
+
+from apps.loyalty.models import PointsTransaction
+
+
+class EarnPointsSerializer(serializers.Serializer):
+    """
+    Acúmulo no PDV: cliente (e-mail) e valor da compra.
+    """
+    customer = serializers.EmailField(help_text='E-mail do cliente.')
+    amount = serializers.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        min_value=Decimal('0.01'),
+        help_text='Valor da compra em reais.'
+    )
+    reference = serializers.CharField(
+        max_length=100,
+        required=False,
+        default='',
+        help_text='Identificador da venda no PDV (cupom).'
+    )
+    description = serializers.CharField(max_length=255, required=False, default='')
+
+    def validate_customer(self, value):
+        # Mesma normalização do cadastro (domínio em minúsculas)
+        return BaseUserManager.normalize_email(value)
+
+
+class EarnPointsResponseSerializer(serializers.Serializer):
+    """
+    Lançamento criado pelo acúmulo.
+    """
+    uuid = serializers.UUIDField()
+    customer = serializers.EmailField()
+    points = serializers.IntegerField()
+    purchase_amount = serializers.DecimalField(max_digits=12, decimal_places=2)
+    points_per_real = serializers.DecimalField(max_digits=5, decimal_places=2)
+    reference = serializers.CharField()
+    created_at = serializers.DateTimeField()
+
+
+class EarnRecordSerializer(EarnPointsSerializer):
+    """
+    Compra de um lote sincronizado pelo PDV.
+    """
+    company = serializers.UUIDField(help_text='UUID da empresa.')
+
+
+@extend_schema_field(EarnRecordSerializer(many=True))
+class EarnRecordsField(serializers.ListField):
+    """
+    Lista das compras; cada uma é validada na ingestão (apps.loyalty.batch),
+    com resultado próprio em vez de erro no lote inteiro.
+    """
+
+
+class EarnBatchSerializer(serializers.Serializer):
+    records = EarnRecordsField(min_length=1, max_length=settings.POINTS_BATCH_MAX_RECORDS)
+
+
+class EarnBatchResultSerializer(serializers.Serializer):
+    index = serializers.IntegerField(help_text='Posição da compra no lote.')
+    status = serializers.ChoiceField(choices=['created', 'rejected'])
+    uuid = serializers.UUIDField(required=False, help_text='Lançamento criado.')
+    points = serializers.IntegerField(required=False)
+    errors = serializers.DictField(required=False, help_text='Erros por campo da compra rejeitada.')
+
+
+class EarnBatchResponseSerializer(serializers.Serializer):
+    created = serializers.IntegerField()
+    rejected = serializers.IntegerField()
+    points = serializers.IntegerField(help_text='Total de pontos lançados.')
+    results = EarnBatchResultSerializer(many=True)
+
+
+class BalanceQuerySerializer(serializers.Serializer):
+    at = serializers.DateTimeField(required=False, help_text='Instante do saldo (padrão: agora).')
+
+
+class BalanceSerializer(serializers.Serializer):
+    points = serializers.IntegerField()
+    at = serializers.DateTimeField(allow_null=True)
+
+
+class StatementQuerySerializer(serializers.Serializer):
+    month = serializers.RegexField(
+        r'^\d{4}-(0[1-9]|1[0-2])$',
+        required=False,
+        help_text='Mês no formato AAAA-MM (padrão: mês atual).',
+    )
+
+    def validate_month(self, value):
+        return datetime.strptime(value, '%Y-%m').date()
+
+
+class PointsTransactionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PointsTransaction
+        fields = [
+            'uuid', 'kind', 'points', 'purchase_amount', 'points_per_real',
+            'reference', 'description', 'created_at',
+        ]
+
+
+class StatementSerializer(serializers.Serializer):
+    period = serializers.DateField(help_text='Primeiro dia do mês.')
+    opening_balance = serializers.IntegerField()
+    credits = serializers.IntegerField()
+    debits = serializers.IntegerField()
+    closing_balance = serializers.IntegerField()
+    entries = PointsTransactionSerializer(many=True)
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from .views import EarnBatchView, EarnPointsView, PointsBalanceView, PointsStatementView
+
+urlpatterns = [
+    path('earn/batch/', EarnBatchView.as_view(), name='loyalty-earn-batch'),
+    path('<uuid:company_uuid>/earn/', EarnPointsView.as_view(), name='loyalty-earn'),
+    path('<uuid:company_uuid>/balance/', PointsBalanceView.as_view(), name='loyalty-balance'),
+    path('<uuid:company_uuid>/statement/', PointsStatementView.as_view(), name='loyalty-statement'),
+]
@@ -0,0 +1,213 @@
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework import generics, status
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from drf_spectacular.utils import OpenApiParameter, OpenApiTypes, extend_schema
+
+from apps.common.idempotency import DATABASE_STORE_QUERIES, IDEMPOTENCY_KEY_PARAMETER, idempotent
+from apps.companies.models import Company, CompanyMember
+from apps.loyalty import ledger
+from apps.loyalty.batch import CREATED, ingest_purchases
+from apps.loyalty.cache import get_member_role, get_points_company
+from apps.loyalty.checkpoints import balance_at, monthly_statement, period_of
+from .serializers import (
+    BalanceQuerySerializer,
+    BalanceSerializer,
+    StatementQuerySerializer,
+    StatementSerializer,
+    EarnBatchResponseSerializer,
+    EarnBatchSerializer,
+    EarnPointsResponseSerializer,
+    EarnPointsSerializer,
+    EarnRecordSerializer,
+)
+
+
+class StatelessJWTScheme(SimpleJWTScheme):
+    """
+    Mesmo bearer JWT no schema; nome próprio porque o drf-spectacular não
+    aceita duas classes de autenticação no mesmo componente ``jwtAuth``.
+    """
+    target_class = JWTStatelessUserAuthentication
+    name = 'jwtStatelessAuth'
+    priority = 1
+
+
+@extend_schema(
+    tags=['loyalty'],
+    summary='Acumular pontos de uma compra',
+    description=(
+        'Registra no PDV os pontos de uma compra do cliente (e-mail) pela taxa '
+        'points_per_real da empresa. Qualquer membro ativo da empresa pode lançar.'
+    ),
+    parameters=[IDEMPOTENCY_KEY_PARAMETER],
+    request=EarnPointsSerializer,
+    responses={201: EarnPointsResponseSerializer},
+)
+class EarnPointsView(generics.GenericAPIView):
+    """
+    Acúmulo no PDV, no caminho mais curto possível:
+
+    - JWT sem consulta ao usuário (``JWTStatelessUserAuthentication``);
+    - empresa (taxa) e vínculo do atendente em cache (apps.loyalty.cache);
+    - cliente por e-mail (índice único) e, na transação, um INSERT no extrato
+      e um UPDATE no saldo (apps.loyalty.ledger).
+    """
+    serializer_class = EarnPointsSerializer
+    authentication_classes = [JWTStatelessUserAuthentication]
+    permission_classes = [IsAuthenticated]
+    # Cache frio e primeiro acúmulo do cliente: empresa, vínculo, cliente,
+    # BEGIN, INSERT, UPDATE sem linha, criação do saldo e UPDATE; mais o
+    # Idempotency-Key guardado no banco
+    query_budget = 8 + DATABASE_STORE_QUERIES
+
+    @idempotent
+    def post(self, request, company_uuid):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        company = get_points_company(company_uuid)
+        if company is None:
+            raise NotFound('Empresa não encontrada.')
+        company_id, points_per_real = company
+
+        role = get_member_role(company_id, request.user.id)
+        if role is None:
+            raise PermissionDenied('Você não tem acesso a esta empresa.')
+        if not CompanyMember(role=role).has_permission('manage_points'):
+            raise PermissionDenied('Seu papel não permite lançar pontos.')
+
+        customer_id = get_user_model().objects.filter(
+            email=data['customer'], is_active=True
+        ).values_list('pk', flat=True).first()
+        if customer_id is None:
+            raise ValidationError({'customer': ['Cliente não encontrado.']})
+
+        entry = ledger.earn_purchase(
+            customer_id, company_id, points_per_real, data['amount'],
+            created_by_id=request.user.id,
+            reference=data['reference'],
+            description=data['description'],
+        )
+        if entry is None:
+            raise ValidationError({'amount': ['Valor não gera pontos nesta empresa.']})
+
+        return Response({
+            'uuid': entry.uuid,
+            'customer': data['customer'],
+            'points': entry.points,
+            'purchase_amount': entry.purchase_amount,
+            'points_per_real': entry.points_per_real,
+            'reference': entry.reference,
+            'created_at': entry.created_at,
+        }, status=status.HTTP_201_CREATED)
+
+
+@extend_schema(
+    tags=['loyalty'],
+    summary='Sincronizar compras em lote',
+    description=(
+        'Recebe até POINTS_BATCH_MAX_RECORDS compras (de uma ou mais empresas) acumuladas '
+        'pelo PDV e lança os pontos de todas de uma vez. Cada compra tem o seu resultado: '
+        'as rejeitadas trazem os erros e não impedem as demais.'
+    ),
+    parameters=[IDEMPOTENCY_KEY_PARAMETER],
+    request=EarnBatchSerializer,
+    responses={200: EarnBatchResponseSerializer},
+)
+class EarnBatchView(generics.GenericAPIView):
+    """
+    Ingestão em lote (apps.loyalty.batch): consultas em número fixo por lote,
+    ``COPY`` no extrato e um ``UPDATE ... FROM`` por bloco de saldos.
+    """
+    serializer_class = EarnBatchSerializer
+    authentication_classes = [JWTStatelessUserAuthentication]
+    permission_classes = [IsAuthenticated]
+    # Empresas, vínculos, clientes, BEGIN, extrato e, por bloco de 1000 pares,
+    # criação e UPDATE dos saldos (5000 compras em pares distintos); mais o
+    # Idempotency-Key guardado no banco
+    query_budget = 16 + DATABASE_STORE_QUERIES
+
+    @idempotent
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = ingest_purchases(
+            serializer.validated_data['records'], EarnRecordSerializer(), request.user.id
+        )
+        created = [result for result in results if result['status'] == CREATED]
+        return Response({
+            'created': len(created),
+            'rejected': len(results) - len(created),
+            'points': sum(result['points'] for result in created),
+            'results': results,
+        })
+
+
+class CustomerCompanyMixin:
+    """
+    Consultas do próprio cliente autenticado em uma empresa.
+    """
+
+    def get_company_id(self):
+        company_id = Company.objects.filter(uuid=self.kwargs['company_uuid']).values_list('pk', flat=True).first()
+        if company_id is None:
+            raise NotFound('Empresa não encontrada.')
+        return company_id
+
+    def get_query(self, serializer_class):
+        serializer = serializer_class(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+
+@extend_schema(
+    tags=['loyalty'],
+    summary='Saldo de pontos',
+    description=(
+        'Saldo do usuário autenticado na empresa. Com ?at=, o saldo naquele instante '
+        '(último fechamento mensal mais os lançamentos seguintes).'
+    ),
+    parameters=[OpenApiParameter('at', OpenApiTypes.DATETIME, description='Instante do saldo (ISO 8601).')],
+    responses=BalanceSerializer,
+)
+class PointsBalanceView(CustomerCompanyMixin, generics.GenericAPIView):
+    serializer_class = BalanceSerializer
+    permission_classes = [IsAuthenticated]
+    query_budget = 4
+
+    def get(self, request, company_uuid):
+        at = self.get_query(BalanceQuerySerializer).get('at')
+        company_id = self.get_company_id()
+        if at is None:
+            points = ledger.get_balance(request.user.pk, company_id)
+        else:
+            points = balance_at(request.user.pk, company_id, at)
+        return Response(BalanceSerializer({'points': points, 'at': at}).data)
+
+
+@extend_schema(
+    tags=['loyalty'],
+    summary='Extrato mensal de pontos',
+    description=(
+        'Extrato do usuário autenticado na empresa em um mês: saldo de abertura, '
+        'lançamentos, créditos, débitos e saldo de fechamento.'
+    ),
+    parameters=[OpenApiParameter('month', OpenApiTypes.STR, description='Mês no formato AAAA-MM (padrão: atual).')],
+    responses=StatementSerializer,
+)
+class PointsStatementView(CustomerCompanyMixin, generics.GenericAPIView):
+    serializer_class = StatementSerializer
+    permission_classes = [IsAuthenticated]
+    query_budget = 5
+
+    def get(self, request, company_uuid):
+        month = self.get_query(StatementQuerySerializer).get('month') or period_of(timezone.now())
+        statement = monthly_statement(request.user.pk, self.get_company_id(), month)
+        return Response(StatementSerializer(statement).data)
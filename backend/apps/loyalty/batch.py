@@ -0,0 +1,92 @@
+"""
+Sincronização em lote de compras do PDV (lojas que acumulam vendas offline).
+
+Um lote com milhares de compras custa um número fixo de consultas: empresas,
+vínculos do usuário e clientes resolvidos de uma vez, pontos calculados em
+uma passada pela taxa de cada empresa e gravação por ``ledger.record_batch``.
+Compras inválidas não derrubam o lote: cada uma tem o seu resultado.
+"""
+from django.contrib.auth import get_user_model
+from rest_framework.exceptions import ValidationError
+
+from apps.companies.models import Company, CompanyMember
+
+from . import ledger
+from .models import PointsTransaction
+
+CREATED = 'created'
+REJECTED = 'rejected'
+
+
+def rejected(index, errors):
+    return {'index': index, 'status': REJECTED, 'errors': errors}
+
+
+def ingest_purchases(records, record_serializer, user_id):
+    """
+    Valida (com ``record_serializer``, uma instância reaproveitada), resolve e
+    lança as compras. Retorna um resultado por registro, na ordem recebida.
+    """
+    results = [None] * len(records)
+    valid = []
+    for index, raw in enumerate(records):
+        try:
+            valid.append((index, record_serializer.run_validation(raw)))
+        except ValidationError as exc:
+            results[index] = rejected(index, exc.detail)
+
+    companies = {
+        uuid: (pk, points_per_real)
+        for uuid, pk, points_per_real in Company.objects.filter(
+            uuid__in={data['company'] for _, data in valid}, is_active=True
+        ).values_list('uuid', 'pk', 'points_per_real')
+    }
+    allowed = {
+        company_id
+        for company_id, role in CompanyMember.objects.filter(
+            company_id__in=[pk for pk, _ in companies.values()],
+            user_id=user_id,
+            is_active=True,
+            user__is_active=True,
+        ).values_list('company_id', 'role')
+        if CompanyMember(role=role).has_permission('manage_points')
+    }
+    customers = dict(get_user_model().objects.filter(
+        email__in={data['customer'] for _, data in valid}, is_active=True
+    ).values_list('email', 'pk'))
+
+    entries = []
+    for index, data in valid:
+        company = companies.get(data['company'])
+        if company is None:
+            results[index] = rejected(index, {'company': ['Empresa não encontrada.']})
+            continue
+        company_id, points_per_real = company
+        if company_id not in allowed:
+            results[index] = rejected(index, {'company': ['Você não pode lançar pontos nesta empresa.']})
+            continue
+        customer_id = customers.get(data['customer'])
+        if customer_id is None:
+            results[index] = rejected(index, {'customer': ['Cliente não encontrado.']})
+            continue
+        points = ledger.points_for_amount(data['amount'], points_per_real)
+        if points <= 0:
+            results[index] = rejected(index, {'amount': ['Valor não gera pontos nesta empresa.']})
+            continue
+        entry = PointsTransaction(
+            kind=PointsTransaction.Kind.EARN,
+            customer_id=customer_id,
+            company_id=company_id,
+            points=points,
+            purchase_amount=data['amount'],
+            points_per_real=points_per_real,
+            created_by_id=user_id,
+            reference=data['reference'],
+            description=data['description'],
+        )
+        entries.append(entry)
+        results[index] = {'index': index, 'status': CREATED, 'uuid': entry.uuid, 'points': points}
+
+    if entries:
+        ledger.record_batch(entries)
+    return results
@@ -0,0 +1,44 @@
+"""
+Empresa e vínculo do atendente em cache para o acúmulo no PDV.
+
+As chaves e a invalidação ficam em apps.companies.signals (save/delete dos
+modelos e operações em massa). ``POINTS_EARN_CACHE_SECONDS`` limita o atraso
+para o que não passa por elas, como a desativação do usuário; em cache local
+ao processo, a invalidação só alcança o worker que salvou e o TTL fica
+limitado a ``LOCAL_CACHE_MAX_SECONDS`` (apps.common.cache.invalidated_timeout).
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.common.cache import invalidated_timeout
+from apps.companies.models import Company, CompanyMember
+from apps.companies.signals import company_points_cache_key, membership_cache_key
+
+
+def get_points_company(company_uuid):
+    """
+    ``(company_id, points_per_real)`` da empresa ativa, ou ``None``.
+    """
+    key = company_points_cache_key(company_uuid)
+    row = cache.get(key)
+    if row is None:
+        # Tupla vazia marca "não encontrada" (None é o miss do cache)
+        row = Company.objects.filter(uuid=company_uuid, is_active=True).values_list(
+            'pk', 'points_per_real'
+        ).first() or ()
+        cache.set(key, row, invalidated_timeout(settings.POINTS_EARN_CACHE_SECONDS))
+    return row or None
+
+
+def get_member_role(company_id, user_id):
+    """
+    Papel do usuário ativo na empresa, ou ``None`` se não for membro ativo.
+    """
+    key = membership_cache_key(company_id, user_id)
+    role = cache.get(key)
+    if role is None:
+        role = CompanyMember.objects.filter(
+            company_id=company_id, user_id=user_id, is_active=True, user__is_active=True
+        ).values_list('role', flat=True).first() or ''
+        cache.set(key, role, invalidated_timeout(settings.POINTS_EARN_CACHE_SECONDS))
+    return role or None
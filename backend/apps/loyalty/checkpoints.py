@@ -0,0 +1,215 @@
+"""
+Fechamentos mensais do extrato (``PointsCheckpoint``) e consultas históricas.
+
+"Saldo na data X" e o extrato de um mês partem do último fechamento anterior
+e somam só os lançamentos depois dele, pelo índice (cliente, empresa, data) do
+extrato: um fechamento mais um intervalo curto, em vez do histórico inteiro.
+
+- ``aggregate_checkpoints``: incremental, fecha os meses encerrados desde o
+  último fechamento (``manage.py aggregate_points_checkpoints``, no cron);
+- ``rebuild_checkpoints``: recalcula tudo para um intervalo de clientes
+  (``manage.py rebuild_points_checkpoints``, em blocos paralelos); corrige
+  meses fechados que receberam lançamentos depois do fechamento.
+
+Um mês só é fechado ``POINTS_CHECKPOINT_GRACE_SECONDS`` depois de acabar,
+para incluir transações que ainda estavam commitando na virada. Os meses
+seguem o ``TIME_ZONE`` do projeto.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import DateField, IntegerField, Max, Min, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from .models import PointsCheckpoint, PointsTransaction
+
+BATCH_SIZE = 5000
+
+
+def next_period(period):
+    return (period.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def period_of(when):
+    return timezone.localtime(when).date().replace(day=1)
+
+
+def period_start(period):
+    return timezone.make_aware(datetime.combine(period, time.min))
+
+
+def open_period(now=None):
+    """
+    Primeiro mês ainda aberto: só os meses anteriores a ele são fechados.
+    """
+    now = now or timezone.now()
+    return period_of(now - timedelta(seconds=settings.POINTS_CHECKPOINT_GRACE_SECONDS))
+
+
+def monthly_totals(transactions):
+    """
+    Créditos, débitos e saldo líquido por (cliente, empresa, mês).
+    """
+    return transactions.annotate(
+        month=TruncMonth('created_at', output_field=DateField()),
+    ).values('customer_id', 'company_id', 'month').annotate(
+        credits=Coalesce(Sum('points', filter=Q(points__gt=0)), 0),
+        debits=Coalesce(-Sum('points', filter=Q(points__lt=0)), 0),
+        net=Sum('points'),
+    )
+
+
+def upsert(checkpoints):
+    PointsCheckpoint.objects.bulk_create(
+        checkpoints,
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['customer', 'company', 'period'],
+        update_fields=['credits', 'debits', 'closing_balance'],
+    )
+
+
+@transaction.atomic
+def aggregate_period(period):
+    """
+    Fecha um mês: soma os lançamentos do mês por par e soma ao fechamento
+    anterior de cada par (subquery no índice único). Idempotente.
+    """
+    previous = PointsCheckpoint.objects.filter(
+        customer_id=OuterRef('customer_id'),
+        company_id=OuterRef('company_id'),
+        period__lt=period,
+    ).order_by('-period').values('closing_balance')[:1]
+    rows = monthly_totals(PointsTransaction.objects.filter(
+        created_at__gte=period_start(period),
+        created_at__lt=period_start(next_period(period)),
+    )).annotate(
+        previous=Coalesce(Subquery(previous, output_field=IntegerField()), 0),
+    ).order_by()
+
+    batch, count = [], 0
+    for row in rows.iterator(chunk_size=BATCH_SIZE):
+        batch.append(PointsCheckpoint(
+            customer_id=row['customer_id'],
+            company_id=row['company_id'],
+            period=period,
+            credits=row['credits'],
+            debits=row['debits'],
+            closing_balance=row['previous'] + row['net'],
+        ))
+        if len(batch) >= BATCH_SIZE:
+            upsert(batch)
+            count += len(batch)
+            batch = []
+    upsert(batch)
+    return count + len(batch)
+
+
+def aggregate_checkpoints(now=None):
+    """
+    Fecha, em ordem, os meses encerrados depois do último fechamento (ou
+    desde o primeiro lançamento). Retorna ``{mês: fechamentos}``.
+    """
+    until = open_period(now)
+    latest = PointsCheckpoint.objects.aggregate(latest=Max('period'))['latest']
+    if latest is not None:
+        period = next_period(latest)
+    else:
+        first = PointsTransaction.objects.aggregate(first=Min('created_at'))['first']
+        if first is None:
+            return {}
+        period = period_of(first)
+
+    done = {}
+    while period < until:
+        done[period] = aggregate_period(period)
+        period = next_period(period)
+    return done
+
+
+@transaction.atomic
+def rebuild_checkpoints(first_customer_id, last_customer_id, now=None):
+    """
+    Recalcula todos os fechamentos dos clientes com id no intervalo (inclusivo)
+    em uma passada ordenada pelo extrato. Retorna quantos gravou.
+    """
+    until = open_period(now)
+    customers = Q(customer_id__gte=first_customer_id, customer_id__lte=last_customer_id)
+    PointsCheckpoint.objects.filter(customers).delete()
+    rows = monthly_totals(PointsTransaction.objects.filter(
+        customers, created_at__lt=period_start(until),
+    )).order_by('customer_id', 'company_id', 'month')
+
+    batch, count = [], 0
+    pair, closing = None, 0
+    for row in rows.iterator(chunk_size=BATCH_SIZE):
+        if (row['customer_id'], row['company_id']) != pair:
+            pair, closing = (row['customer_id'], row['company_id']), 0
+        closing += row['net']
+        batch.append(PointsCheckpoint(
+            customer_id=row['customer_id'],
+            company_id=row['company_id'],
+            period=row['month'],
+            credits=row['credits'],
+            debits=row['debits'],
+            closing_balance=closing,
+        ))
+        if len(batch) >= BATCH_SIZE:
+            upsert(batch)
+            count += len(batch)
+            batch = []
+    upsert(batch)
+    return count + len(batch)
+
+
+# =============================================================================
+# Consultas
+# =============================================================================
+
+def balance_at(customer_id, company_id, when):
+    """
+    Saldo no instante ``when``: último fechamento de um mês anterior ao de
+    ``when`` mais os lançamentos entre o fim desse mês e ``when``.
+    """
+    checkpoint = PointsCheckpoint.objects.filter(
+        customer_id=customer_id,
+        company_id=company_id,
+        period__lt=period_of(when),
+    ).order_by('-period').values_list('period', 'closing_balance').first()
+
+    transactions = PointsTransaction.objects.filter(
+        customer_id=customer_id, company_id=company_id, created_at__lt=when
+    )
+    opening = 0
+    if checkpoint is not None:
+        period, opening = checkpoint
+        transactions = transactions.filter(created_at__gte=period_start(next_period(period)))
+    return opening + (transactions.aggregate(total=Sum('points'))['total'] or 0)
+
+
+def monthly_statement(customer_id, company_id, period):
+    """
+    Extrato do mês: saldo de abertura (``balance_at`` no início do mês), os
+    lançamentos do mês e os totais.
+    """
+    period = period.replace(day=1)
+    start = period_start(period)
+    opening = balance_at(customer_id, company_id, start)
+    entries = list(PointsTransaction.objects.filter(
+        customer_id=customer_id,
+        company_id=company_id,
+        created_at__gte=start,
+        created_at__lt=period_start(next_period(period)),
+    ).order_by('created_at'))
+    credits = sum(entry.points for entry in entries if entry.points > 0)
+    debits = -sum(entry.points for entry in entries if entry.points < 0)
+    return {
+        'period': period,
+        'opening_balance': opening,
+        'credits': credits,
+        'debits': debits,
+        'closing_balance': opening + credits - debits,
+        'entries': entries,
+    }
@@ -0,0 +1,191 @@
+"""
+Motor de pontos: lançamentos no extrato e saldo materializado.
+
+Cada operação, em uma transação:
+
+1. insere o lançamento em ``PointsTransaction`` (só inserção, sem lock);
+2. aplica o delta em ``PointsBalance`` com ``UPDATE ... SET points = points + n``.
+
+O UPDATE é o último passo para o lock da linha do saldo durar o mínimo até
+o commit. Acúmulos concorrentes no mesmo par (cliente, empresa) se enfileiram
+nesse lock e nenhum se perde. Débitos (resgate, expiração, ajuste negativo)
+levam ``WHERE points >= n``: sem saldo, nada é alterado e ``InsufficientPoints``
+desfaz o lançamento.
+
+Lotes (``record_batch``) seguem a mesma ordem: o extrato entra por ``COPY``
+(ou INSERT de várias linhas) e os deltas agrupados por par vão em um
+``UPDATE ... FROM`` por bloco.
+"""
+from collections import defaultdict
+from decimal import ROUND_DOWN, Decimal
+
+from django.db import connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.common.pgcopy import copy_instances
+
+from .models import PointsBalance, PointsTransaction
+
+
+class InsufficientPoints(Exception):
+    """
+    Débito maior que o saldo do cliente na empresa.
+    """
+
+    def __init__(self, balance, points):
+        self.balance = balance
+        self.points = points
+        super().__init__(f'Saldo insuficiente: {balance} pontos, débito de {points}.')
+
+
+def points_for_amount(amount, points_per_real):
+    """
+    Pontos inteiros de uma compra (arredondados para baixo).
+    """
+    return int((Decimal(amount) * Decimal(points_per_real)).to_integral_value(rounding=ROUND_DOWN))
+
+
+def get_balance(customer_id, company_id):
+    return PointsBalance.objects.filter(customer_id=customer_id, company_id=company_id).values_list(
+        'points', flat=True
+    ).first() or 0
+
+
+def apply_balance_delta(customer_id, company_id, delta, now=None):
+    """
+    Soma ``delta`` ao saldo com ``F()``. No primeiro lançamento do par a linha é
+    criada (``ON CONFLICT DO NOTHING``, seguro entre transações concorrentes)
+    e o UPDATE repetido.
+    """
+    now = now or timezone.now()
+    balances = PointsBalance.objects.filter(customer_id=customer_id, company_id=company_id)
+    if delta < 0:
+        balances = balances.filter(points__gte=-delta)
+    if balances.update(points=F('points') + delta, updated_at=now):
+        return
+    if delta < 0:
+        raise InsufficientPoints(get_balance(customer_id, company_id), -delta)
+    PointsBalance.objects.bulk_create(
+        [PointsBalance(customer_id=customer_id, company_id=company_id, points=0, updated_at=now)],
+        ignore_conflicts=True,
+    )
+    balances.update(points=F('points') + delta, updated_at=now)
+
+
+def apply_balance_deltas(deltas, now=None, using=None, batch_size=1000):
+    """
+    Soma créditos agrupados (``{(customer_id, company_id): delta}``, deltas
+    positivos) aos saldos: cria as linhas que faltam e aplica um
+    ``UPDATE ... FROM (VALUES ...)`` por bloco de ``batch_size`` pares.
+
+    No PostgreSQL as linhas são travadas em ordem de id antes do UPDATE, então
+    lotes concorrentes com pares em comum se enfileiram em vez de entrar em
+    deadlock.
+    """
+    now = now or timezone.now()
+    using = using or router.db_for_write(PointsBalance)
+    connection = connections[using]
+    pairs = sorted(deltas.items())
+    PointsBalance.objects.using(using).bulk_create(
+        [PointsBalance(customer_id=customer_id, company_id=company_id, points=0, updated_at=now)
+         for (customer_id, company_id), _ in pairs],
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+
+    table = connection.ops.quote_name(PointsBalance._meta.db_table)
+    lock = ' ORDER BY b.id FOR UPDATE OF b' if connection.vendor == 'postgresql' else ''
+    with connection.cursor() as cursor:
+        for start in range(0, len(pairs), batch_size):
+            chunk = pairs[start:start + batch_size]
+            values = ', '.join(['(%s, %s, %s)'] * len(chunk))
+            params = [value for (customer_id, company_id), delta in chunk for value in (customer_id, company_id, delta)]
+            cursor.execute(
+                f'WITH v (customer_id, company_id, delta) AS (VALUES {values}), '
+                f'locked AS ('
+                f'SELECT b.id, v.delta FROM {table} b '
+                f'JOIN v ON b.customer_id = v.customer_id AND b.company_id = v.company_id{lock}'
+                f') '
+                f'UPDATE {table} SET points = {table}.points + locked.delta, updated_at = %s '
+                f'FROM locked WHERE {table}.id = locked.id',
+                [*params, now],
+            )
+
+
+@transaction.atomic
+def record_batch(entries, now=None, batch_size=1000):
+    """
+    Lança de uma vez ``PointsTransaction`` não salvos (créditos, com
+    ``customer_id``/``company_id``/``points`` preenchidos): ``COPY`` no
+    PostgreSQL, ``bulk_create`` nos demais bancos, e um delta por par no saldo.
+    Os lançamentos recebem ``created_at = now``; os uuids já vêm dos objetos.
+    """
+    now = now or timezone.now()
+    using = router.db_for_write(PointsTransaction)
+    deltas = defaultdict(int)
+    for entry in entries:
+        if entry.points <= 0:
+            raise ValueError('Lote aceita apenas créditos.')
+        entry.created_at = now
+        deltas[entry.customer_id, entry.company_id] += entry.points
+
+    if connections[using].vendor == 'postgresql':
+        copy_instances(PointsTransaction, entries, using=using)
+    else:
+        PointsTransaction.objects.using(using).bulk_create(entries, batch_size=batch_size)
+    apply_balance_deltas(deltas, now, using=using, batch_size=batch_size)
+    return entries
+
+
+@transaction.atomic
+def record(kind, customer_id, company_id, points, **fields):
+    """
+    Lança ``points`` (com sinal) no extrato e no saldo. Retorna o lançamento.
+    """
+    if not points:
+        raise ValueError('Lançamento sem pontos.')
+    entry = PointsTransaction.objects.create(
+        kind=kind, customer_id=customer_id, company_id=company_id, points=points, **fields
+    )
+    apply_balance_delta(customer_id, company_id, points)
+    return entry
+
+
+def earn(customer_id, company_id, points, **fields):
+    if points <= 0:
+        raise ValueError('Acúmulo precisa ser positivo.')
+    return record(PointsTransaction.Kind.EARN, customer_id, company_id, points, **fields)
+
+
+def earn_purchase(customer_id, company_id, points_per_real, amount, **fields):
+    """
+    Acúmulo de uma compra pela taxa ``points_per_real`` da empresa (gravada no
+    lançamento). Compras que não geram pontos retornam ``None``.
+    """
+    points = points_for_amount(amount, points_per_real)
+    if points <= 0:
+        return None
+    return earn(
+        customer_id, company_id, points,
+        purchase_amount=amount, points_per_real=points_per_real, **fields
+    )
+
+
+def redeem(customer_id, company_id, points, **fields):
+    if points <= 0:
+        raise ValueError('Resgate precisa ser positivo.')
+    return record(PointsTransaction.Kind.REDEEM, customer_id, company_id, -points, **fields)
+
+
+def expire(customer_id, company_id, points, **fields):
+    if points <= 0:
+        raise ValueError('Expiração precisa ser positiva.')
+    return record(PointsTransaction.Kind.EXPIRE, customer_id, company_id, -points, **fields)
+
+
+def adjust(customer_id, company_id, points, **fields):
+    """
+    Correção manual (positiva ou negativa); negativa respeita o saldo.
+    """
+    return record(PointsTransaction.Kind.ADJUST, customer_id, company_id, points, **fields)
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.loyalty.checkpoints import aggregate_checkpoints
+
+
+class Command(BaseCommand):
+    help = (
+        'Fecha os meses encerrados do extrato de pontos desde o último fechamento '
+        '(PointsCheckpoint). Incremental; rode periodicamente (cron).'
+    )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        done = aggregate_checkpoints()
+        for period, count in done.items():
+            self.stdout.write(f'{period:%m/%Y}: {count} fechamentos')
+        elapsed = (time.perf_counter() - start) * 1000
+        self.stdout.write(self.style.SUCCESS(f'{len(done)} meses fechados ({elapsed:.0f} ms)'))
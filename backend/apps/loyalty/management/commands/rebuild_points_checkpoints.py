@@ -0,0 +1,56 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Max, Min
+
+from apps.loyalty.checkpoints import rebuild_checkpoints
+from apps.loyalty.models import PointsBalance
+
+
+def rebuild_chunk(first_customer_id, last_customer_id):
+    # Cada thread usa (e fecha) a sua conexão
+    try:
+        return rebuild_checkpoints(first_customer_id, last_customer_id)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula do zero os fechamentos mensais do extrato de pontos, em blocos '
+        'de clientes processados em paralelo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=10000,
+                            help='Intervalo de ids de cliente por bloco (uma transação).')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Blocos processados em paralelo (uma conexão cada).')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        bounds = PointsBalance.objects.aggregate(first=Min('customer_id'), last=Max('customer_id'))
+        if bounds['first'] is None:
+            self.stdout.write('Nenhum lançamento no extrato.')
+            return
+
+        chunk_size = options['chunk_size']
+        chunks = [
+            (first, min(first + chunk_size - 1, bounds['last']))
+            for first in range(bounds['first'], bounds['last'] + 1, chunk_size)
+        ]
+        total = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = {executor.submit(rebuild_chunk, *chunk): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                first, last = futures[future]
+                count = future.result()
+                total += count
+                self.stdout.write(f'clientes {first}-{last}: {count} fechamentos')
+
+        elapsed = (time.perf_counter() - start) * 1000
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} fechamentos em {len(chunks)} blocos ({elapsed:.0f} ms)'
+        ))
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:14
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('companies', '0004_company_active_members_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PointsBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.IntegerField(default=0, verbose_name='pontos')),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='atualizado em')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='points_balances', to='companies.company', verbose_name='empresa')),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='points_balances', to=settings.AUTH_USER_MODEL, verbose_name='cliente')),
+            ],
+            options={
+                'verbose_name': 'saldo de pontos',
+                'verbose_name_plural': 'saldos de pontos',
+                'constraints': [models.UniqueConstraint(fields=('customer', 'company'), name='loyalty_balance_customer_company'), models.CheckConstraint(condition=models.Q(('points__gte', 0)), name='loyalty_balance_points_gte_0')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PointsTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uuid', models.UUIDField(db_index=True, default=uuid.uuid4, editable=False, unique=True, verbose_name='UUID')),
+                ('kind', models.CharField(choices=[('earn', 'Acúmulo'), ('redeem', 'Resgate'), ('adjust', 'Ajuste'), ('expire', 'Expiração')], max_length=10, verbose_name='tipo')),
+                ('points', models.IntegerField(help_text='Positivo credita, negativo debita. Acúmulo > 0; resgate e expiração < 0.', verbose_name='pontos')),
+                ('purchase_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True, verbose_name='valor da compra')),
+                ('points_per_real', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, verbose_name='pontos por real')),
+                ('reference', models.CharField(blank=True, help_text='Identificador externo (cupom, venda no PDV)', max_length=100, verbose_name='referência')),
+                ('description', models.CharField(blank=True, max_length=255, verbose_name='descrição')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='data')),
+                ('company', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='points_transactions', to='companies.company', verbose_name='empresa')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='lançado por')),
+                ('customer', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='points_transactions', to=settings.AUTH_USER_MODEL, verbose_name='cliente')),
+            ],
+            options={
+                'verbose_name': 'lançamento de pontos',
+                'verbose_name_plural': 'lançamentos de pontos',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['customer', 'company', 'created_at'], name='loyalty_poi_custome_1733c8_idx'), models.Index(fields=['company', 'created_at'], name='loyalty_poi_company_fe35c9_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(models.Q(('kind', 'earn'), ('points__gt', 0)), models.Q(('kind__in', ['redeem', 'expire']), ('points__lt', 0)), models.Q(('kind', 'adjust'), models.Q(('points', 0), _negated=True)), _connector='OR'), name='loyalty_transaction_points_sign')],
+            },
+        ),
+    ]
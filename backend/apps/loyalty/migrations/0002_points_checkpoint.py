@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0004_company_active_members_count'),
+        ('loyalty', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PointsCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField(help_text='Primeiro dia do mês', verbose_name='mês')),
+                ('credits', models.PositiveIntegerField(default=0, verbose_name='créditos')),
+                ('debits', models.PositiveIntegerField(default=0, verbose_name='débitos')),
+                ('closing_balance', models.IntegerField(verbose_name='saldo no fechamento')),
+                ('company', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='companies.company', verbose_name='empresa')),
+                ('customer', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='cliente')),
+            ],
+            options={
+                'verbose_name': 'fechamento de pontos',
+                'verbose_name_plural': 'fechamentos de pontos',
+                'indexes': [models.Index(fields=['period'], name='loyalty_poi_period_091e9c_idx')],
+                'constraints': [models.UniqueConstraint(fields=('customer', 'company', 'period'), name='loyalty_checkpoint_customer_company_period')],
+            },
+        ),
+    ]
@@ -0,0 +1,217 @@
+from django.conf import settings
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from apps.common.models import UUIDMixin
+from apps.companies.models import Company
+
+
+class AppendOnlyQuerySet(models.QuerySet):
+    """
+    QuerySet que não altera nem apaga linhas: o extrato é só de inserção.
+    """
+
+    def update(self, **kwargs):
+        raise TypeError(f'{self.model.__name__} é somente inserção; lance um ajuste.')
+
+    def delete(self):
+        raise TypeError(f'{self.model.__name__} é somente inserção; lance um ajuste.')
+
+
+class PointsTransaction(UUIDMixin):
+    """
+    Lançamento do extrato de pontos de um cliente em uma empresa.
+
+    O extrato só recebe inserções (apps.loyalty.ledger): correções entram como
+    ajuste. O saldo corrente fica em ``PointsBalance``, atualizado na mesma
+    transação; a soma de ``points`` por (cliente, empresa) é sempre o saldo.
+    """
+
+    class Kind(models.TextChoices):
+        EARN = 'earn', _('Acúmulo')
+        REDEEM = 'redeem', _('Resgate')
+        ADJUST = 'adjust', _('Ajuste')
+        EXPIRE = 'expire', _('Expiração')
+
+    # Sem índice próprio nas FKs: os índices compostos abaixo começam por elas
+    customer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.PROTECT,
+        related_name='points_transactions',
+        db_index=False,
+        verbose_name=_('cliente')
+    )
+
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.PROTECT,
+        related_name='points_transactions',
+        db_index=False,
+        verbose_name=_('empresa')
+    )
+
+    kind = models.CharField(_('tipo'), max_length=10, choices=Kind.choices)
+
+    points = models.IntegerField(
+        _('pontos'),
+        help_text=_('Positivo credita, negativo debita. Acúmulo > 0; resgate e expiração < 0.')
+    )
+
+    # Compra que gerou o acúmulo (taxa da empresa no momento do lançamento)
+    purchase_amount = models.DecimalField(
+        _('valor da compra'),
+        max_digits=12,
+        decimal_places=2,
+        null=True,
+        blank=True
+    )
+    points_per_real = models.DecimalField(
+        _('pontos por real'),
+        max_digits=5,
+        decimal_places=2,
+        null=True,
+        blank=True
+    )
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name=_('lançado por')
+    )
+
+    reference = models.CharField(
+        _('referência'),
+        max_length=100,
+        blank=True,
+        help_text=_('Identificador externo (cupom, venda no PDV)')
+    )
+    description = models.CharField(_('descrição'), max_length=255, blank=True)
+
+    created_at = models.DateTimeField(_('data'), default=timezone.now)
+
+    objects = AppendOnlyQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('lançamento de pontos')
+        verbose_name_plural = _('lançamentos de pontos')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['customer', 'company', 'created_at']),
+            models.Index(fields=['company', 'created_at']),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=(
+                    Q(kind='earn', points__gt=0)
+                    | Q(kind__in=['redeem', 'expire'], points__lt=0)
+                    | (Q(kind='adjust') & ~Q(points=0))
+                ),
+                name='loyalty_transaction_points_sign',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.get_kind_display()} {self.points:+d} ({self.customer_id} @ {self.company_id})'
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise TypeError('PointsTransaction é somente inserção; lance um ajuste.')
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise TypeError('PointsTransaction é somente inserção; lance um ajuste.')
+
+
+class PointsBalance(models.Model):
+    """
+    Saldo materializado de um cliente em uma empresa: leitura O(1).
+
+    Alterado só por ``apps.loyalty.ledger`` com ``F()`` na transação do
+    lançamento; débitos usam ``WHERE points >= n``, então o saldo nunca fica
+    negativo e acúmulos concorrentes não perdem atualização.
+    """
+
+    customer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.PROTECT,
+        related_name='points_balances',
+        verbose_name=_('cliente')
+    )
+
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.PROTECT,
+        related_name='points_balances',
+        verbose_name=_('empresa')
+    )
+
+    points = models.IntegerField(_('pontos'), default=0)
+
+    updated_at = models.DateTimeField(_('atualizado em'), default=timezone.now)
+
+    class Meta:
+        verbose_name = _('saldo de pontos')
+        verbose_name_plural = _('saldos de pontos')
+        # Sem índice em points/updated_at: os incrementos continuam HOT updates
+        constraints = [
+            models.UniqueConstraint(fields=['customer', 'company'], name='loyalty_balance_customer_company'),
+            models.CheckConstraint(condition=Q(points__gte=0), name='loyalty_balance_points_gte_0'),
+        ]
+
+    def __str__(self):
+        return f'{self.points} pontos ({self.customer_id} @ {self.company_id})'
+
+
+class PointsCheckpoint(models.Model):
+    """
+    Fechamento mensal do extrato de um cliente em uma empresa
+    (apps.loyalty.checkpoints).
+
+    ``closing_balance`` é a soma do extrato até o fim do mês (no fuso do
+    projeto). Só existe para meses com lançamentos: o saldo em uma data é o
+    último fechamento anterior mais os lançamentos depois dele.
+    """
+
+    customer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.PROTECT,
+        related_name='+',
+        db_index=False,
+        verbose_name=_('cliente')
+    )
+
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.PROTECT,
+        related_name='+',
+        db_index=False,
+        verbose_name=_('empresa')
+    )
+
+    period = models.DateField(_('mês'), help_text=_('Primeiro dia do mês'))
+
+    credits = models.PositiveIntegerField(_('créditos'), default=0)
+    debits = models.PositiveIntegerField(_('débitos'), default=0)
+    closing_balance = models.IntegerField(_('saldo no fechamento'))
+
+    class Meta:
+        verbose_name = _('fechamento de pontos')
+        verbose_name_plural = _('fechamentos de pontos')
+        # O índice da restrição atende "último fechamento antes de X" por par
+        constraints = [
+            models.UniqueConstraint(
+                fields=['customer', 'company', 'period'],
+                name='loyalty_checkpoint_customer_company_period',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['period']),
+        ]
+
+    def __str__(self):
+        return f'{self.period:%m/%Y}: {self.closing_balance} pontos ({self.customer_id} @ {self.company_id})'
@@ -0,0 +1,342 @@
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.companies.models import Company, CompanyMember
+from apps.loyalty import ledger
+from apps.loyalty.api.serializers import EarnRecordSerializer
+from apps.loyalty.batch import CREATED, REJECTED, ingest_purchases
+from apps.loyalty.cache import get_member_role, get_points_company
+from apps.loyalty.checkpoints import (
+    aggregate_checkpoints,
+    balance_at,
+    monthly_statement,
+    rebuild_checkpoints,
+)
+from apps.loyalty.models import PointsBalance, PointsCheckpoint, PointsTransaction
+
+User = get_user_model()
+
+
+def create_company(name, cnpj, points_per_real='1.00'):
+    return Company.objects.create(
+        trade_name=name,
+        legal_name=name,
+        cnpj=cnpj,
+        email=f'{name.lower()}@example.com',
+        points_per_real=Decimal(points_per_real),
+    )
+
+
+class LoyaltyTestMixin:
+    def setUp(self):
+        self.company = create_company('Loja', '00.000.000/0001-00', '2.00')
+        self.customer = User.objects.create_user(email='cliente@example.com', password='x', first_name='Cliente')
+        self.attendant = User.objects.create_user(email='caixa@example.com', password='x', first_name='Caixa')
+        CompanyMember.objects.create(
+            company=self.company, user=self.attendant, role=CompanyMember.Role.ATTENDANT
+        )
+
+    def assert_balance_matches_ledger(self, customer=None, company=None):
+        customer, company = customer or self.customer, company or self.company
+        total = PointsTransaction.objects.filter(customer=customer, company=company).aggregate(
+            total=Sum('points')
+        )['total'] or 0
+        self.assertEqual(ledger.get_balance(customer.pk, company.pk), total)
+        return total
+
+
+class LedgerTests(LoyaltyTestMixin, TestCase):
+    def test_balance_is_ledger_sum(self):
+        ledger.earn(self.customer.pk, self.company.pk, 100)
+        ledger.earn_purchase(self.customer.pk, self.company.pk, self.company.points_per_real, Decimal('10.55'))
+        ledger.redeem(self.customer.pk, self.company.pk, 30)
+        ledger.adjust(self.customer.pk, self.company.pk, -5)
+        ledger.expire(self.customer.pk, self.company.pk, 10)
+        self.assertEqual(self.assert_balance_matches_ledger(), 100 + 21 - 30 - 5 - 10)
+
+    def test_purchase_without_points(self):
+        entry = ledger.earn_purchase(self.customer.pk, self.company.pk, Decimal('0.50'), Decimal('1.00'))
+        self.assertIsNone(entry)
+        self.assertFalse(PointsTransaction.objects.exists())
+
+    def test_insufficient_points_rolls_back_entry(self):
+        ledger.earn(self.customer.pk, self.company.pk, 50)
+        with self.assertRaises(ledger.InsufficientPoints) as raised:
+            ledger.redeem(self.customer.pk, self.company.pk, 80)
+        self.assertEqual((raised.exception.balance, raised.exception.points), (50, 80))
+        self.assertEqual(PointsTransaction.objects.count(), 1)
+        self.assertEqual(self.assert_balance_matches_ledger(), 50)
+
+    def test_debit_without_balance_row(self):
+        with self.assertRaises(ledger.InsufficientPoints):
+            ledger.redeem(self.customer.pk, self.company.pk, 1)
+        self.assertFalse(PointsTransaction.objects.exists())
+        self.assertFalse(PointsBalance.objects.exists())
+
+    def test_ledger_is_append_only(self):
+        entry = ledger.earn(self.customer.pk, self.company.pk, 10)
+        with self.assertRaises(TypeError):
+            PointsTransaction.objects.update(points=20)
+        with self.assertRaises(TypeError):
+            PointsTransaction.objects.filter(pk=entry.pk).delete()
+        with self.assertRaises(TypeError):
+            entry.save()
+        with self.assertRaises(TypeError):
+            entry.delete()
+        self.assertEqual(PointsTransaction.objects.get().points, 10)
+
+
+class BatchTests(LoyaltyTestMixin, TestCase):
+    def ingest(self, records):
+        with transaction.atomic():
+            return ingest_purchases(records, EarnRecordSerializer(), self.attendant.pk)
+
+    def record(self, **fields):
+        return {
+            'company': str(self.company.uuid),
+            'customer': self.customer.email,
+            'amount': '10.00',
+            **fields,
+        }
+
+    def test_results_per_record(self):
+        other = create_company('Outra', '00.000.000/0002-00')
+        results = self.ingest([
+            self.record(reference='\\N'),
+            self.record(amount='abc'),
+            self.record(company=str(other.uuid)),
+            self.record(customer='ninguem@example.com'),
+            self.record(amount='0.40'),
+            self.record(amount='5.00', description='segunda'),
+        ])
+        self.assertEqual(
+            [result['status'] for result in results],
+            [CREATED, REJECTED, REJECTED, REJECTED, REJECTED, CREATED],
+        )
+        self.assertEqual([result['index'] for result in results], list(range(6)))
+        self.assertIn('amount', results[1]['errors'])
+        self.assertIn('company', results[2]['errors'])
+        self.assertIn('customer', results[3]['errors'])
+        self.assertIn('amount', results[4]['errors'])
+        self.assertEqual(PointsTransaction.objects.get(points=20).reference, '\\N')
+        self.assertEqual(self.assert_balance_matches_ledger(), 30)
+
+    def test_balances_per_pair(self):
+        second = User.objects.create_user(email='outro@example.com', password='x', first_name='Outro')
+        ledger.earn(self.customer.pk, self.company.pk, 7)
+        self.ingest([self.record(), self.record(customer=second.email), self.record(amount='1.50')])
+        self.assertEqual(self.assert_balance_matches_ledger(), 7 + 20 + 3)
+        self.assertEqual(self.assert_balance_matches_ledger(second), 20)
+
+
+class CheckpointTests(LoyaltyTestMixin, TestCase):
+    def at(self, year, month, day, hour=12):
+        return timezone.make_aware(datetime(year, month, day, hour))
+
+    def setUp(self):
+        super().setUp()
+        # Jan, Mar (Fev sem lançamentos) e Abr ainda aberto
+        for when, points in [
+            (self.at(2026, 1, 5), 100),
+            (self.at(2026, 1, 31, 23), 50),
+            (self.at(2026, 3, 1, 0), 40),
+            (self.at(2026, 3, 20), -30),
+            (self.at(2026, 4, 2), 10),
+        ]:
+            ledger.adjust(self.customer.pk, self.company.pk, points, created_at=when)
+        self.now = self.at(2026, 4, 10)
+
+    def brute_force(self, when):
+        return PointsTransaction.objects.filter(
+            customer=self.customer, company=self.company, created_at__lt=when
+        ).aggregate(total=Sum('points'))['total'] or 0
+
+    def checkpoints(self):
+        return list(PointsCheckpoint.objects.order_by('period').values_list(
+            'period', 'credits', 'debits', 'closing_balance'
+        ))
+
+    def test_aggregate_closes_finished_months(self):
+        self.assertEqual(
+            aggregate_checkpoints(now=self.now),
+            {date(2026, 1, 1): 1, date(2026, 2, 1): 0, date(2026, 3, 1): 1},
+        )
+        self.assertEqual(self.checkpoints(), [
+            (date(2026, 1, 1), 150, 0, 150),
+            (date(2026, 3, 1), 40, 30, 160),
+        ])
+        # Incremental: nada de novo até o mês seguinte fechar
+        self.assertEqual(aggregate_checkpoints(now=self.now), {})
+
+    def test_rebuild_matches_aggregate(self):
+        aggregate_checkpoints(now=self.now)
+        aggregated = self.checkpoints()
+        rebuild_checkpoints(self.customer.pk, self.customer.pk, now=self.now)
+        self.assertEqual(self.checkpoints(), aggregated)
+
+    def test_balance_at_matches_ledger(self):
+        aggregate_checkpoints(now=self.now)
+        start = self.at(2025, 12, 31)
+        for hours in range(0, 24 * 105, 13):
+            when = start + timedelta(hours=hours)
+            self.assertEqual(balance_at(self.customer.pk, self.company.pk, when), self.brute_force(when), when)
+
+    def test_monthly_statement(self):
+        aggregate_checkpoints(now=self.now)
+        statement = monthly_statement(self.customer.pk, self.company.pk, date(2026, 3, 15))
+        self.assertEqual(statement['period'], date(2026, 3, 1))
+        self.assertEqual(
+            (statement['opening_balance'], statement['credits'], statement['debits'], statement['closing_balance']),
+            (150, 40, 30, 160),
+        )
+        self.assertEqual([entry.points for entry in statement['entries']], [40, -30])
+
+
+class EarnCacheTests(LoyaltyTestMixin, TestCase):
+    """
+    Com LocMem a invalidação ao salvar só limpa o cache do worker que salvou;
+    ``apps.companies.signals.cache`` simulado faz o papel dos outros workers.
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def after_local_cache_ttl(self):
+        return mock.patch('time.time', return_value=time.time() + settings.LOCAL_CACHE_MAX_SECONDS + 1)
+
+    def test_deactivated_member_expires(self):
+        self.assertEqual(get_member_role(self.company.pk, self.attendant.pk), CompanyMember.Role.ATTENDANT)
+        member = CompanyMember.objects.get(user=self.attendant)
+        member.is_active = False
+        with mock.patch('apps.companies.signals.cache'):
+            member.save()
+        self.assertEqual(get_member_role(self.company.pk, self.attendant.pk), CompanyMember.Role.ATTENDANT)
+        with self.after_local_cache_ttl():
+            self.assertIsNone(get_member_role(self.company.pk, self.attendant.pk))
+
+    def test_points_per_real_change_expires(self):
+        self.assertEqual(get_points_company(self.company.uuid), (self.company.pk, Decimal('2.00')))
+        self.company.points_per_real = Decimal('3.00')
+        with mock.patch('apps.companies.signals.cache'):
+            self.company.save()
+        with self.after_local_cache_ttl():
+            self.assertEqual(get_points_company(self.company.uuid), (self.company.pk, Decimal('3.00')))
+
+
+class EarnEndpointTests(LoyaltyTestMixin, TransactionTestCase):
+    """
+    Pelo pipeline completo (orçamento de queries ativo nos testes).
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.client.force_authenticate(self.attendant)
+        self.url = reverse('loyalty-earn', kwargs={'company_uuid': self.company.uuid})
+
+    def earn(self, url=None, **body):
+        body = {'customer': self.customer.email, 'amount': '12.30', **body}
+        return self.client.post(url or self.url, body, format='json')
+
+    def queries(self, response):
+        # Server-Timing: db;dur=...;desc="N queries"
+        return int(response['Server-Timing'].split('desc="', 1)[1].split(' ', 1)[0])
+
+    def test_earn(self):
+        response = self.earn(reference='cupom-1')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['points'], 24)
+        self.assertEqual(response.json()['reference'], 'cupom-1')
+        entry = PointsTransaction.objects.get()
+        self.assertEqual((entry.created_by_id, entry.purchase_amount), (self.attendant.pk, Decimal('12.30')))
+        self.assertEqual(self.assert_balance_matches_ledger(), 24)
+
+    def test_customer_email_is_normalized(self):
+        self.assertEqual(self.earn(customer='cliente@EXAMPLE.com').status_code, 201)
+
+    def test_every_role_earns(self):
+        for role in CompanyMember.Role:
+            CompanyMember.objects.filter(user=self.attendant).update(role=role)
+            cache.clear()
+            self.assertEqual(self.earn().status_code, 201, role)
+
+    def test_role_without_permission(self):
+        with mock.patch.object(CompanyMember, 'has_permission', return_value=False):
+            response = self.earn()
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(PointsTransaction.objects.exists())
+
+    def test_not_a_member(self):
+        other = create_company('Outra', '00.000.000/0002-00')
+        response = self.earn(url=reverse('loyalty-earn', kwargs={'company_uuid': other.uuid}))
+        self.assertEqual(response.status_code, 403)
+
+    def test_inactive_member(self):
+        member = CompanyMember.objects.get(user=self.attendant)
+        member.is_active = False
+        member.save()
+        self.assertEqual(self.earn().status_code, 403)
+
+    def test_unknown_company(self):
+        response = self.earn(url=reverse('loyalty-earn', kwargs={'company_uuid': uuid.uuid4()}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_inactive_company(self):
+        self.company.is_active = False
+        self.company.save()
+        self.assertEqual(self.earn().status_code, 404)
+
+    def test_unknown_customer(self):
+        response = self.earn(customer='ninguem@example.com')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('customer', response.json())
+
+    def test_inactive_customer(self):
+        self.customer.is_active = False
+        self.customer.save()
+        self.assertEqual(self.earn().status_code, 400)
+
+    def test_amount_without_points(self):
+        response = self.earn(amount='0.40')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('amount', response.json())
+        self.assertFalse(PointsTransaction.objects.exists())
+
+    @override_settings(SERVER_TIMING_HEADER=True)
+    def test_cached_lookups(self):
+        self.earn()
+        warm = self.queries(self.earn())
+        cache.clear()
+        cold = self.queries(self.earn())
+        # Empresa e vínculo saem do cache; sobram o cliente e a transação
+        # (INSERT no extrato e UPDATE no saldo, mais o BEGIN onde é query)
+        self.assertEqual(cold, warm + 2)
+        self.assertLessEqual(warm, 4)
+
+    def test_retry_with_idempotency_key_is_not_credited_twice(self):
+        body = {'customer': self.customer.email, 'amount': '12.30', 'reference': 'cupom-1'}
+        first = self.client.post(self.url, body, format='json', HTTP_IDEMPOTENCY_KEY='venda-1')
+        retry = self.client.post(self.url, body, format='json', HTTP_IDEMPOTENCY_KEY='venda-1')
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(self.assert_balance_matches_ledger(), 24)
+        self.assertEqual(PointsTransaction.objects.count(), 1)
@@ -0,0 +1,70 @@
+"""
+Benchmarks do backend.
+
+Executar a partir de ``backend/`` com as mesmas variáveis de ambiente da
+aplicação (banco incluso), por exemplo::
+
+    python -m benchmarks.serializers
+
+Nos microbenchmarks os dados sintéticos são criados dentro de uma transação
+revertida no final. O teste de carga (``benchmarks.load``) usa a massa
+persistente de ``manage.py generate_benchmark_data``.
+"""
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
+
+def setup():
+    """
+    Inicializa o Django para scripts executados fora do ``manage.py``.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def rollback():
+    """
+    Executa o bloco em uma transação que sempre é desfeita.
+    """
+    from django.db import transaction
+
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def measure(func, iterations=100, warmup=5):
+    """
+    Executa ``func`` repetidamente e retorna estatísticas em milissegundos.
+    """
+    for _ in range(warmup):
+        func()
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    return {
+        'iterations': iterations,
+        'mean_ms': statistics.fmean(timings),
+        'p50_ms': timings[len(timings) // 2],
+        'p95_ms': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        'ops_per_sec': 1000 / statistics.fmean(timings),
+    }
+
+
+def print_comparison(title, baseline, candidate, baseline_label='drf', candidate_label='candidate'):
+    print(f'\n{title}')
+    for label, stats in ((baseline_label, baseline), (candidate_label, candidate)):
+        print(
+            f'  {label:<12} mean={stats["mean_ms"]:.3f}ms p50={stats["p50_ms"]:.3f}ms '
+            f'p95={stats["p95_ms"]:.3f}ms ops/s={stats["ops_per_sec"]:.1f}'
+        )
+    print(f'  speedup: {baseline["mean_ms"] / candidate["mean_ms"]:.2f}x')
@@ -0,0 +1,95 @@
+"""
+Changelists do Django Admin em tabelas grandes (empresas, membros e usuários).
+
+Para cada cenário (listagem, busca, filtro por ``created_at`` e combinações)
+renderiza o changelist em processo como superusuário e reporta o tempo, o
+número de queries e a contagem mostrada na página, comparada com o
+``COUNT(*)`` exato (e o tempo dele), que o ``EstimatedCountPaginator`` evita
+no PostgreSQL acima de ``ADMIN_ESTIMATED_COUNT_THRESHOLD`` linhas.
+
+Pré-requisito: ``python manage.py generate_benchmark_data`` (para a meta de
+5M vínculos, por exemplo ``--companies 5000 --members 1000``). Uso::
+
+    python -m benchmarks.admin --iterations 20
+"""
+import argparse
+import time
+
+from benchmarks import measure, setup
+
+SCENARIOS = {
+    'company': [
+        ('lista', {}),
+        ('busca', {'q': '00042'}),
+        ('ativas + UF', {'is_active__exact': '1', 'state': 'SP'}),
+    ],
+    'companymember': [
+        ('lista', {}),
+        ('busca', {'q': 'member-42'}),
+        ('busca empresa', {'q': '00042'}),
+        ('papel + últimos 7 dias', {'role__exact': 'attendant', 'created_at__gte': '{week_ago}'}),
+    ],
+    'customuser': [
+        ('lista', {}),
+        ('busca', {'q': 'member-42'}),
+        ('ativos', {'is_active__exact': '1'}),
+    ],
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Mede os changelists do admin com a massa de benchmark.')
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    setup()
+    from datetime import timedelta
+
+    from django.contrib import admin
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test import RequestFactory
+    from django.test.utils import CaptureQueriesContext
+    from django.utils import timezone
+
+    from apps.companies.models import Company, CompanyMember
+
+    superuser = get_user_model()(email='bench-superuser@example.com', is_active=True, is_staff=True, is_superuser=True)
+    factory = RequestFactory()
+    week_ago = str(timezone.localtime() - timedelta(days=7))
+    models = {'company': Company, 'companymember': CompanyMember, 'customuser': get_user_model()}
+
+    print(f'banco: {connection.vendor}')
+    for name, scenarios in SCENARIOS.items():
+        model = models[name]
+        model_admin = admin.site._registry[model]
+        print(f'\n{model._meta.verbose_name_plural} ({model_admin.__class__.__name__})')
+        for label, params in scenarios:
+            params = {key: value.format(week_ago=week_ago) for key, value in params.items()}
+
+            def render():
+                request = factory.get('/admin/', params)
+                request.user = superuser
+                return model_admin.changelist_view(request).render()
+
+            with CaptureQueriesContext(connection) as queries:
+                render()
+            stats = measure(render, args.iterations, warmup=2)
+
+            # Contagem mostrada × COUNT(*) exato da mesma consulta
+            request = factory.get('/admin/', params)
+            request.user = superuser
+            changelist = model_admin.get_changelist_instance(request)
+            shown = changelist.result_count
+            start = time.perf_counter()
+            exact = changelist.queryset.count()
+            count_ms = (time.perf_counter() - start) * 1000
+
+            print(
+                f'  {label:<24} p50={stats["p50_ms"]:8.1f}ms p95={stats["p95_ms"]:8.1f}ms '
+                f'queries={len(queries):>3}  contagem={shown} (exata {exact}, COUNT(*) {count_ms:.1f}ms)'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""
+Views DRF síncronas × views assíncronas (``ASYNC_READ_VIEWS``) sob muitas
+conexões simultâneas.
+
+Para cada modo sobe o daphne em subprocesso, abre ``--connections`` conexões
+keep-alive ao mesmo tempo (asyncio, padrão 1000) e cada uma faz
+``--requests-per-connection`` GETs nos endpoints quentes (/me, tema e lista de
+membros). Mede vazão, latência, erros e, no processo do servidor, o pico de
+memória (VmHWM) e de threads.
+
+Pré-requisito: ``python manage.py generate_benchmark_data``. Uso::
+
+    python -m benchmarks.async_views --connections 1000 --requests-per-connection 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import time
+from urllib.parse import urlsplit
+
+from benchmarks.load import percentile, prepare_state, start_server
+
+MODES = {
+    'sync': {'ASYNC_READ_VIEWS': 'False'},
+    'async': {'ASYNC_READ_VIEWS': 'True'},
+}
+
+
+def process_status(pid):
+    """
+    ``(rss_mb, pico_rss_mb, threads)`` lidos de /proc/<pid>/status (Linux).
+    """
+    values = {}
+    try:
+        with open(f'/proc/{pid}/status', encoding='ascii') as fp:
+            for line in fp:
+                key, _, value = line.partition(':')
+                values[key] = value.split()[0] if value.split() else '0'
+    except OSError:
+        return None, None, None
+    return int(values.get('VmRSS', 0)) / 1024, int(values.get('VmHWM', 0)) / 1024, int(values.get('Threads', 0))
+
+
+async def fetch(reader, writer, host, path, token):
+    writer.write(
+        f'GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept: application/json\r\n'
+        f'Authorization: Bearer {token}\r\n\r\n'.encode()
+    )
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    length = 0
+    for line in head.split(b'\r\n')[1:]:
+        name, _, value = line.partition(b':')
+        if name.strip().lower() == b'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def run_connections(url, state, connections, per_connection, server_pid):
+    parts = urlsplit(url)
+    paths = [
+        '/api/auth/me/',
+        f'/api/companies/themes/{state["company"]}/',
+        f'/api/companies/{state["company"]}/members/?page=1',
+    ]
+    latencies, errors = [], {}
+    peak = {'threads': 0, 'rss_mb': 0.0}
+    running = True
+
+    async def sample():
+        while running:
+            rss, _, threads = process_status(server_pid)
+            if threads is not None:
+                peak['threads'] = max(peak['threads'], threads)
+                peak['rss_mb'] = max(peak['rss_mb'], rss)
+            await asyncio.sleep(0.05)
+
+    async def connection(index):
+        try:
+            reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+        except OSError as exc:
+            errors[type(exc).__name__] = errors.get(type(exc).__name__, 0) + per_connection
+            return
+        try:
+            for iteration in range(per_connection):
+                start = time.perf_counter()
+                try:
+                    status = await fetch(reader, writer, parts.netloc, paths[(index + iteration) % len(paths)],
+                                         state['token'])
+                except (OSError, asyncio.IncompleteReadError) as exc:
+                    errors[type(exc).__name__] = errors.get(type(exc).__name__, 0) + per_connection - iteration
+                    return
+                if status == 200:
+                    latencies.append((time.perf_counter() - start) * 1000)
+                else:
+                    errors[str(status)] = errors.get(str(status), 0) + 1
+        finally:
+            writer.close()
+
+    sampler = asyncio.create_task(sample())
+    started = time.perf_counter()
+    await asyncio.gather(*(connection(index) for index in range(connections)))
+    wall = time.perf_counter() - started
+    running = False
+    await sampler
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'duration_s': round(wall, 3),
+        'throughput_rps': round(len(latencies) / wall, 2) if wall else 0,
+        'p50_ms': percentile(latencies, 50),
+        'p99_ms': percentile(latencies, 99),
+        'max_ms': latencies[-1] if latencies else None,
+        'server_peak_threads': peak['threads'],
+        'server_peak_rss_mb': round(peak['rss_mb'], 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compara views síncronas e assíncronas sob muitas conexões.')
+    parser.add_argument('--url', default='http://127.0.0.1:8766')
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--connections', type=int, default=1000)
+    parser.add_argument('--requests-per-connection', type=int, default=5)
+    parser.add_argument('--email', default='admin@bench.example.com')
+    parser.add_argument('--password', default='bench-password')
+    parser.add_argument('--output', help='Salva os resultados em JSON.')
+    args = parser.parse_args(argv)
+
+    # Uma conexão por descritor: sobe o limite até o máximo permitido
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = args.connections + 256
+    if soft < wanted:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(wanted, hard), hard))
+
+    results = []
+    for mode in args.modes.split(','):
+        server = start_server(args.url, {**os.environ, **MODES[mode]})
+        try:
+            state = prepare_state(args.url, args.email, args.password)
+            _, idle_rss, _ = process_status(server.pid)
+            stats = asyncio.run(run_connections(
+                args.url, state, args.connections, args.requests_per_connection, server.pid,
+            ))
+            _, peak_rss, _ = process_status(server.pid)
+        finally:
+            server.terminate()
+            server.wait()
+        results.append({'mode': mode, 'idle_rss_mb': round(idle_rss or 0, 1),
+                        'peak_hwm_mb': round(peak_rss or 0, 1), **stats})
+
+    print(f'\n{"modo":<8}{"req/s":>9}{"p50":>9}{"p99":>10}{"erros":>7}{"threads":>9}{"RSS pico":>10}')
+    for stats in results:
+        print(
+            f'{stats["mode"]:<8}{stats["throughput_rps"]:>9.1f}{stats["p50_ms"] or 0:>9.1f}'
+            f'{stats["p99_ms"] or 0:>10.1f}{sum(stats["errors"].values()):>7}'
+            f'{stats["server_peak_threads"]:>9}{stats["peak_hwm_mb"]:>9.1f}M'
+        )
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fp:
+            json.dump(results, fp, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Tempo de boot: entrypoint (migrate/collectstatic) e importações de um worker.
+
+- ``entrypoint``: tempo de parede de ``migrate`` + ``collectstatic`` em dois
+  processos (entrypoint antigo), de ``manage.py boot --force`` e de
+  ``manage.py boot`` sem nada a fazer (caminho rápido);
+- ``imports``: ``python -X importtime`` do que um worker do ``manage.py serve``
+  carrega antes de ficar pronto (daphne, ``django.setup()``, aplicação ASGI e
+  URLconf), agrupado por pacote de topo, mais os módulos de maior tempo
+  acumulado.
+
+O banco e o ``STATIC_ROOT`` configurados são usados de verdade (a primeira
+execução aplica migrações e coleta os estáticos). Uso::
+
+    python -m benchmarks.boot --repeat 3 --top 15
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from benchmarks.load import BACKEND_DIR
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+WORKER_IMPORTS = (
+    'import daphne.server; import django; django.setup(); import core.asgi; '
+    'from django.urls import get_resolver; get_resolver().url_patterns'
+)
+ENTRYPOINTS = {
+    'legado (migrate + collectstatic)': [
+        ['manage.py', 'migrate', '--noinput', '-v', '0'],
+        ['manage.py', 'collectstatic', '--noinput', '-v', '0'],
+    ],
+    'boot --force': [['manage.py', 'boot', '--force', '-v', '0']],
+    'boot (caminho rápido)': [['manage.py', 'boot', '-v', '0']],
+}
+
+
+def wall_time(commands):
+    start = time.perf_counter()
+    for command in commands:
+        subprocess.run([sys.executable, *command], cwd=BACKEND_DIR, check=True, stdout=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+
+def import_times():
+    """
+    ``(total_ms, {pacote: ms próprios}, [(ms acumulados, módulo)])``.
+    """
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'core.settings')}
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', WORKER_IMPORTS],
+        cwd=BACKEND_DIR, env=env, check=True, capture_output=True, text=True,
+    )
+    packages, modules = Counter(), []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            packages[match[4].split('.')[0]] += int(match[1]) / 1000
+            modules.append((int(match[2]) / 1000, match[4]))
+    return sum(packages.values()), packages, sorted(modules, reverse=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Mede o boot do container e as importações dos workers.')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--skip-entrypoint', action='store_true')
+    args = parser.parse_args(argv)
+
+    if not args.skip_entrypoint:
+        # Primeira execução só garante banco migrado e estáticos coletados
+        wall_time(ENTRYPOINTS['boot --force'])
+        print(f'\n{"entrypoint":<34}{"p50":>10}{"min":>10}')
+        for label, commands in ENTRYPOINTS.items():
+            timings = [wall_time(commands) for _ in range(args.repeat)]
+            print(f'{label:<34}{statistics.median(timings):>8.0f}ms{min(timings):>8.0f}ms')
+
+    total, packages, modules = import_times()
+    print(f'\nImportações do worker: {total:.0f} ms')
+    for package, ms in packages.most_common(args.top):
+        print(f'  {ms:8.1f} ms  {100 * ms / total:5.1f}%  {package}')
+    print('\nMaior tempo acumulado (módulo + dependências)')
+    for ms, module in modules[:args.top]:
+        print(f'  {ms:8.1f} ms  {module}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""
+Conexões abertas e latência sob concorrência: CONN_MAX_AGE × pool × pool com
+prepared statements (requer PostgreSQL e psycopg 3).
+
+Cada modo roda em um subprocesso (as opções de banco são lidas no boot) e
+dispara requisições concorrentes pelo ``ASGIHandler`` — cada requisição roda a
+view síncrona em uma thread nova, como no daphne — nos endpoints que executam
+as queries quentes (membership da empresa e tema por empresa).
+
+Pré-requisito: ``python manage.py generate_benchmark_data``. Uso::
+
+    python -m benchmarks.connections --requests 2000 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks import setup
+from benchmarks.load import percentile
+
+MODES = {
+    'persistent': {'DB_POOL': 'False', 'DB_PREPARED_STATEMENTS': 'False'},
+    'pool': {'DB_POOL': 'True', 'DB_PREPARED_STATEMENTS': 'False'},
+    'pool_prepared': {'DB_POOL': 'True', 'DB_PREPARED_STATEMENTS': 'True'},
+}
+
+
+def physical_connections():
+    from django.db import connection
+
+    from apps.common.metrics import DB_CONNECTIONS
+
+    opened = int(DB_CONNECTIONS.labels(connection.alias)._value.get())
+    pool = getattr(connection, 'pool', None)
+    if pool is not None:
+        return opened, pool.get_stats().get('connections_num', 0)
+    return opened, opened
+
+
+async def asgi_get(application, path, token):
+    """
+    GET direto no ``ASGIHandler`` (o ``AsyncClient`` do Django executa as views
+    síncronas sempre na mesma thread, o que esconderia o custo de reconexão).
+    """
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'query_string': query.encode(), 'root_path': '',
+        'headers': [(b'host', b'testserver'), (b'authorization', f'Bearer {token}'.encode())],
+        'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+    }
+    body_sent = False
+    status = None
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await asyncio.Event().wait()  # cliente nunca desconecta
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await application(scope, receive, send)
+    return status
+
+
+async def run_requests(paths, token, requests, concurrency):
+    from django.core.asgi import get_asgi_application
+
+    application = get_asgi_application()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one(index):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            status = await asgi_get(application, paths[index % len(paths)], token)
+            if status == 200:
+                latencies.append((time.perf_counter() - start) * 1000)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(requests)))
+    return sorted(latencies), errors, time.perf_counter() - started
+
+
+def child(mode, email, requests, concurrency):
+    setup()
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from apps.companies.models import CompanyMember
+
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+    user = get_user_model().objects.get(email=email)
+    company = CompanyMember.objects.filter(user=user, role=CompanyMember.Role.OWNER).values_list(
+        'company__uuid', flat=True,
+    ).first()
+    paths = [f'/api/companies/themes/{company}/', f'/api/companies/{company}/members/?page=1']
+    token = str(AccessToken.for_user(user))
+
+    asyncio.run(run_requests(paths, token, concurrency * 2, concurrency))  # aquecimento
+    opened_before, physical_before = physical_connections()
+    latencies, errors, wall = asyncio.run(run_requests(paths, token, requests, concurrency))
+    opened_after, physical_after = physical_connections()
+
+    print(json.dumps({
+        'mode': mode,
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / wall, 2),
+        'p50_ms': percentile(latencies, 50),
+        'p99_ms': percentile(latencies, 99),
+        'django_connects': opened_after - opened_before,
+        'physical_connections': physical_after - physical_before,
+    }))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compara CONN_MAX_AGE, pool e prepared statements.')
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--email', default='admin@bench.example.com')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--output', help='Salva os resultados em JSON.')
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.child, args.email, args.requests, args.concurrency)
+        return
+
+    results = []
+    for mode in args.modes.split(','):
+        process = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.connections', '--child', mode,
+             '--requests', str(args.requests), '--concurrency', str(args.concurrency),
+             '--email', args.email],
+            env={**os.environ, **MODES[mode]},
+            capture_output=True, text=True,
+        )
+        if process.returncode != 0:
+            sys.stderr.write(process.stderr)
+            raise SystemExit(f'Modo {mode} falhou.')
+        results.append(json.loads(process.stdout.strip().splitlines()[-1]))
+
+    print(f'\n{"modo":<15}{"req/s":>9}{"p50":>9}{"p99":>9}{"connects":>10}{"físicas":>9}{"erros":>7}')
+    for stats in results:
+        print(
+            f'{stats["mode"]:<15}{stats["throughput_rps"]:>9.1f}{stats["p50_ms"] or 0:>9.1f}'
+            f'{stats["p99_ms"] or 0:>9.1f}{stats["django_connects"]:>10}'
+            f'{stats["physical_connections"]:>9}{stats["errors"]:>7}'
+        )
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fp:
+            json.dump(results, fp, indent=2)
+
+
+if __name__ == '__main__':
+    main()
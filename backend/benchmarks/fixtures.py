@@ -0,0 +1,205 @@
+"""
+Criação rápida de dados sintéticos para os benchmarks.
+
+- ``create_member_fixture``: conjunto pequeno para microbenchmarks (em transação).
+- ``generate_dataset``: massa persistente N empresas × M membros para os testes
+  de carga (``manage.py generate_benchmark_data``). No PostgreSQL usuários e
+  vínculos entram via ``COPY``; nos demais bancos via ``bulk_create``.
+"""
+from decimal import Decimal
+
+
+def create_member_fixture(members=500, companies=10, password='bench-password'):
+    """
+    Cria um usuário "admin" membro de ``companies`` empresas (com tema) e
+    ``members`` atendentes na primeira empresa. Retorna (admin, primeira empresa).
+    """
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+
+    from apps.companies.counters import recount_active_members
+    from apps.companies.models import Company, CompanyMember, CompanyTheme
+
+    User = get_user_model()
+    hashed = make_password(password)
+
+    company_list = Company.objects.bulk_create([
+        Company(
+            trade_name=f'Bench {index:04d}',
+            legal_name=f'Bench {index:04d} LTDA',
+            cnpj=f'99.{index:03d}.000/0001-{index % 100:02d}',
+            email=f'bench{index}@example.com',
+            phone='(11) 3333-4444',
+            city='São Paulo',
+            state='SP',
+            logo=f'companies/logos/bench-{index}.png' if index % 2 else None,
+            points_per_real=Decimal('1.50'),
+        )
+        for index in range(companies)
+    ])
+    CompanyTheme.objects.bulk_create([
+        CompanyTheme(company=company, logo_light=f'companies/themes/logos/{company.pk}.png')
+        for company in company_list[1:]  # a primeira empresa fica sem tema
+    ])
+
+    admin = User.objects.create(
+        email='bench-admin@example.com',
+        first_name='Bench',
+        last_name='Admin',
+        password=hashed,
+    )
+    users = User.objects.bulk_create([
+        User(
+            email=f'bench-member-{index}@example.com',
+            first_name=f'Membro {index:05d}',
+            last_name='' if index % 3 else 'Silva',
+            phone=None if index % 2 else '(11) 99999-0000',
+            password=hashed,
+        )
+        for index in range(members)
+    ])
+
+    memberships = [
+        CompanyMember(user=admin, company=company, role=CompanyMember.Role.OWNER)
+        for company in company_list
+    ]
+    memberships += [
+        CompanyMember(user=user, company=company_list[0], role=CompanyMember.Role.ATTENDANT)
+        for user in users
+    ]
+    CompanyMember.objects.bulk_create(memberships)
+    recount_active_members([company.pk for company in company_list])
+    return admin, company_list[0]
+
+
+def _insert(model, objs, use_copy):
+    from apps.common.pgcopy import copy_instances
+
+    if use_copy:
+        copy_instances(model, objs)
+    else:
+        model.objects.bulk_create(objs, batch_size=2000)
+
+
+def clear_dataset(prefix='bench'):
+    """
+    Apaga (de fato, sem soft delete) os dados criados por ``generate_dataset``.
+    """
+    from django.contrib.auth import get_user_model
+
+    from django.db.models import Q
+
+    from apps.companies.models import Company
+    from apps.loyalty.models import PointsBalance, PointsCheckpoint, PointsTransaction
+
+    # Pontos lançados pelo teste de carga: as FKs são PROTECT e o extrato é só
+    # inserção, então sai pelo _base_manager antes das empresas e usuários
+    domain = f'@{prefix}.example.com'
+    for model in (PointsTransaction, PointsBalance, PointsCheckpoint):
+        model._base_manager.filter(Q(company__email__endswith=domain) | Q(customer__email__endswith=domain)).delete()
+    companies, _ = Company.all_objects.filter(email__endswith=f'@{prefix}.example.com').delete()
+    users, _ = get_user_model().objects.filter(email__endswith=f'@{prefix}.example.com').delete()
+    return companies, users
+
+
+def generate_dataset(
+    companies=10,
+    members=100,
+    themes=1.0,
+    admin_companies=5,
+    prefix='bench',
+    password='bench-password',
+    use_copy=None,
+):
+    """
+    Cria ``companies`` empresas (fração ``themes`` com tema), ``members`` atendentes
+    por empresa e o usuário ``admin@<prefix>.example.com``, dono das primeiras
+    ``admin_companies`` empresas. Todos os usuários usam a mesma senha.
+
+    Retorna um resumo com as quantidades criadas e as credenciais do admin.
+    """
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from django.db import connection, transaction
+
+    from apps.companies.counters import recount_active_members
+    from apps.companies.models import Company, CompanyMember, CompanyTheme
+
+    User = get_user_model()
+    domain = f'{prefix}.example.com'
+    if use_copy is None:
+        use_copy = connection.vendor == 'postgresql'
+    hashed = make_password(password)
+
+    with transaction.atomic():
+        # Empresas e temas precisam dos ids de volta: bulk_create
+        company_list = Company.objects.bulk_create([
+            Company(
+                trade_name=f'{prefix.title()} {index:05d}',
+                legal_name=f'{prefix.title()} {index:05d} LTDA',
+                cnpj=f'{90 + index // 10 ** 9 % 10:02d}.{index // 10 ** 6 % 1000:03d}.'
+                     f'{index // 1000 % 1000:03d}/{index % 1000:04d}-{index % 97:02d}',
+                email=f'company-{index}@{domain}',
+                phone='(11) 3333-4444',
+                city='São Paulo',
+                state='SP',
+                points_per_real=Decimal('1.00'),
+            )
+            for index in range(companies)
+        ], batch_size=2000)
+        themed = company_list[:round(len(company_list) * themes)]
+        CompanyTheme.objects.bulk_create([
+            CompanyTheme(company=company, extra_config={'border_radius': '8px'})
+            for company in themed
+        ], batch_size=2000)
+
+        admin = User(
+            email=f'admin@{domain}',
+            first_name='Admin',
+            last_name=prefix.title(),
+            password=hashed,
+        )
+        admin.save()
+
+        _insert(User, [
+            User(
+                email=f'member-{company_index}-{index}@{domain}',
+                first_name=f'Membro {index:05d}',
+                last_name='Silva' if index % 3 == 0 else 'Souza',
+                phone=None if index % 2 else '(11) 99999-0000',
+                password=hashed,
+            )
+            for company_index in range(companies)
+            for index in range(members)
+        ], use_copy)
+
+        user_ids = dict(
+            User.objects.filter(email__startswith='member-', email__endswith=f'@{domain}')
+            .values_list('email', 'id')
+        )
+        memberships = [
+            CompanyMember(user=admin, company=company, role=CompanyMember.Role.OWNER)
+            for company in company_list[:admin_companies]
+        ]
+        memberships += [
+            CompanyMember(
+                user_id=user_ids[f'member-{company_index}-{index}@{domain}'],
+                company=company,
+                role=CompanyMember.Role.ADMIN if index == 0 else CompanyMember.Role.ATTENDANT,
+            )
+            for company_index, company in enumerate(company_list)
+            for index in range(members)
+        ]
+        _insert(CompanyMember, memberships, use_copy)
+        # bulk_create/COPY não passam pelo save(): contadores recalculados
+        recount_active_members([company.pk for company in company_list])
+
+    return {
+        'companies': len(company_list),
+        'themes': len(themed),
+        'users': len(user_ids) + 1,
+        'memberships': len(memberships),
+        'admin_email': admin.email,
+        'admin_password': password,
+        'method': 'copy' if use_copy else 'bulk_create',
+    }
@@ -0,0 +1,145 @@
+"""
+Contenção no motor de pontos (apps.loyalty.ledger).
+
+Threads (uma conexão cada) lançam acúmulos ao mesmo tempo:
+
+- ``hot``: todas no mesmo par (cliente, empresa), disputando a linha do saldo;
+- ``spread``: cada thread com o seu cliente;
+- ``naive``: o ``hot`` com leitura-modificação-gravação no Python
+  (``balance.points += n; save()``), para comparação.
+
+Para cada cenário: vazão, latência p50/p99 por lançamento, saldo esperado ×
+gravado (atualizações perdidas) e saldo × soma do extrato. Cria uma empresa e
+clientes próprios e os remove no final. Use o PostgreSQL (no SQLite as
+escritas são serializadas pelo lock do arquivo). Uso::
+
+    python -m benchmarks.ledger --threads 16 --operations 500
+"""
+import argparse
+import threading
+import time
+
+from benchmarks import setup
+
+PREFIX = 'ledger-bench'
+CNPJ = '00.000.000/9999-99'
+
+
+def percentile(timings, fraction):
+    return timings[min(len(timings) - 1, int(len(timings) * fraction))]
+
+
+def run_threads(threads, operations, work):
+    """
+    Roda ``work(thread_index, operation_index)`` em ``threads`` threads
+    liberadas juntas. Retorna (segundos, latências em ms ordenadas, erros).
+    """
+    from django.db import connection
+
+    barrier = threading.Barrier(threads + 1)
+    timings, errors = [], []
+    lock = threading.Lock()
+
+    def worker(index):
+        local, failures = [], 0
+        try:
+            barrier.wait()
+            for operation in range(operations):
+                start = time.perf_counter()
+                try:
+                    work(index, operation)
+                except Exception:
+                    failures += 1
+                local.append((time.perf_counter() - start) * 1000)
+        finally:
+            connection.close()
+            with lock:
+                timings.extend(local)
+                errors.append(failures)
+
+    pool = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    for thread in pool:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in pool:
+        thread.join()
+    return time.perf_counter() - start, sorted(timings), sum(errors)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Mede a contenção de acúmulos concorrentes no saldo de pontos.')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--operations', type=int, default=200, help='Lançamentos por thread.')
+    parser.add_argument('--points', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.db import connection, transaction
+    from django.db.models import Sum
+
+    from apps.companies.models import Company
+    from apps.loyalty import ledger
+    from apps.loyalty.models import PointsBalance, PointsCheckpoint, PointsTransaction
+
+    User = get_user_model()
+
+    def cleanup():
+        # O extrato é só inserção: a limpeza do benchmark vai direto no SQL
+        company_ids = list(Company.all_objects.filter(cnpj=CNPJ).values_list('pk', flat=True))
+        with connection.cursor() as cursor:
+            for model in (PointsTransaction, PointsBalance, PointsCheckpoint):
+                for company_id in company_ids:
+                    cursor.execute(f'DELETE FROM {model._meta.db_table} WHERE company_id = %s', [company_id])
+        User.objects.filter(email__startswith=f'{PREFIX}-').delete()
+        Company.all_objects.filter(pk__in=company_ids).delete()
+
+    cleanup()  # sobras de uma execução interrompida
+    company = Company.objects.create(trade_name=PREFIX, legal_name=PREFIX, cnpj=CNPJ, email=f'{PREFIX}@example.com')
+    customers = User.objects.bulk_create([
+        User(email=f'{PREFIX}-{index}@example.com', first_name='Cliente', password='!')
+        for index in range(args.threads + 1)
+    ])
+    hot = customers[-1]
+
+    def naive_earn(customer_id):
+        with transaction.atomic():
+            PointsTransaction.objects.create(
+                kind=PointsTransaction.Kind.EARN, customer_id=customer_id, company=company, points=args.points,
+            )
+            balance, _ = PointsBalance.objects.get_or_create(customer_id=customer_id, company=company)
+            balance.points += args.points
+            balance.save(update_fields=['points'])
+
+    # O naive usa um cliente só dele, para comparar o saldo a partir do zero
+    naive = User.objects.create(email=f'{PREFIX}-naive@example.com', first_name='Cliente', password='!')
+    scenarios = {
+        'hot': ([hot.pk], lambda index, operation: ledger.earn(hot.pk, company.pk, args.points)),
+        'spread': (
+            [customer.pk for customer in customers[:-1]],
+            lambda index, operation: ledger.earn(customers[index].pk, company.pk, args.points),
+        ),
+        'naive': ([naive.pk], lambda index, operation: naive_earn(naive.pk)),
+    }
+
+    print(f'banco: {connection.vendor}, {args.threads} threads × {args.operations} lançamentos')
+    try:
+        for name, (customer_ids, work) in scenarios.items():
+            seconds, timings, errors = run_threads(args.threads, args.operations, work)
+            done = len(timings) - errors
+            stored = PointsBalance.objects.filter(customer_id__in=customer_ids, company=company).aggregate(
+                total=Sum('points'))['total'] or 0
+            ledger_sum = PointsTransaction.objects.filter(customer_id__in=customer_ids, company=company).aggregate(
+                total=Sum('points'))['total'] or 0
+            print(
+                f'  {name:<7} {done / seconds:8.0f} lanç/s  p50={percentile(timings, 0.5):7.2f}ms '
+                f'p99={percentile(timings, 0.99):7.2f}ms  erros={errors}  saldo={stored} '
+                f'(esperado {done * args.points}, extrato {ledger_sum}, perdidos {ledger_sum - stored})'
+            )
+    finally:
+        cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,358 @@
+"""
+Teste de carga com cenários roteirizados contra um servidor ASGI local.
+
+Pré-requisito: massa sintética (``python manage.py generate_benchmark_data``).
+Exemplos (a partir de ``backend/``)::
+
+    # sobe o daphne com as configurações do ambiente e roda todos os cenários
+    python -m benchmarks.load --serve --duration 15 --concurrency 8
+
+    # servidor já em execução; compara com uma execução anterior
+    python -m benchmarks.load --url http://127.0.0.1:8000 --scenarios me,member_list \\
+        --compare benchmarks/results/20261019-120000-abc1234.json
+
+Para cada cenário são medidos p50/p95/p99, vazão e queries por requisição (lidas
+do header ``Server-Timing`` do ``QueryBudgetMiddleware``; um servidor já em
+execução precisa de ``SERVER_TIMING_HEADER=True``). O resultado é salvo
+em JSON em ``benchmarks/results/`` com o commit atual, para comparação.
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import platform
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlsplit
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+
+class Client:
+    """
+    Cliente HTTP com conexão keep-alive (um por worker).
+    """
+
+    def __init__(self, url, token=None):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.token = token
+        self.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+
+    def request(self, method, path, payload=None):
+        headers = {'Accept': 'application/json'}
+        body = None
+        if payload is not None:
+            body = json.dumps(payload)
+            headers['Content-Type'] = 'application/json'
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+
+        try:
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+        except (http.client.HTTPException, OSError):
+            # Conexão derrubada pelo servidor: reconecta uma vez
+            self.connection.close()
+            self.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+
+        data = response.read()
+        match = QUERIES_RE.search(response.getheader('Server-Timing') or '')
+        return response.status, data, int(match.group(1)) if match else None
+
+    def close(self):
+        self.connection.close()
+
+
+# =============================================================================
+# Cenários: função (client, state, worker, iteration) -> (status, body, queries)
+# =============================================================================
+
+def scenario_login(client, state, worker, iteration):
+    client.token = None
+    return client.request('POST', '/api/auth/login/', {
+        'email': state['email'], 'password': state['password'],
+    })
+
+
+def scenario_me(client, state, worker, iteration):
+    return client.request('GET', '/api/auth/me/')
+
+
+def scenario_theme(client, state, worker, iteration):
+    return client.request('GET', f'/api/companies/themes/{state["company"]}/')
+
+
+def scenario_member_list(client, state, worker, iteration):
+    page = iteration % state['member_pages'] + 1
+    return client.request('GET', f'/api/companies/{state["company"]}/members/?page={page}')
+
+
+def scenario_member_search(client, state, worker, iteration):
+    term = ('Silva', 'Souza', f'{iteration % 100:05d}')[iteration % 3]
+    return client.request('GET', f'/api/companies/{state["company"]}/members/?search={term}')
+
+
+def scenario_member_create(client, state, worker, iteration):
+    return client.request('POST', f'/api/companies/{state["company"]}/members/', {
+        'email': f'load-{state["run_id"]}-{worker}-{iteration}@{state["domain"]}',
+        'first_name': 'Carga',
+        'role': 'attendant',
+    })
+
+
+def scenario_points_earn(client, state, worker, iteration):
+    # Acúmulo no PDV (o próprio usuário da massa como cliente): extrato + saldo
+    return client.request('POST', f'/api/loyalty/{state["company"]}/earn/', {
+        'customer': state['email'],
+        'amount': f'{10 + iteration % 90}.{worker % 100:02d}',
+        'reference': f'load-{state["run_id"]}-{worker}-{iteration}',
+    })
+
+
+SCENARIOS = {
+    'login': (scenario_login, False),
+    'me': (scenario_me, True),
+    'theme': (scenario_theme, True),
+    'member_list': (scenario_member_list, True),
+    'member_search': (scenario_member_search, True),
+    'member_create': (scenario_member_create, True),
+    'points_earn': (scenario_points_earn, True),
+}
+
+
+# =============================================================================
+# Execução
+# =============================================================================
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def prepare_state(url, email, password):
+    client = Client(url)
+    status, body, _ = client.request('POST', '/api/auth/login/', {'email': email, 'password': password})
+    if status != 200:
+        raise SystemExit(f'Login falhou ({status}). Rode "manage.py generate_benchmark_data" antes.')
+    client.token = json.loads(body)['access']
+
+    _, body, _ = client.request('GET', '/api/auth/me/')
+    companies = json.loads(body)['companies']
+    if not companies:
+        raise SystemExit(f'{email} não é membro de nenhuma empresa.')
+    company = companies[0]['company']['uuid']
+
+    _, body, _ = client.request('GET', f'/api/companies/{company}/members/')
+    data = json.loads(body)
+    page_size = len(data['results']) or 1
+    client.close()
+
+    return {
+        'token': client.token,
+        'email': email,
+        'password': password,
+        'domain': email.split('@', 1)[1],
+        'company': company,
+        'member_pages': max(1, math.ceil(data['count'] / page_size)),
+        'run_id': uuid.uuid4().hex[:8],
+    }
+
+
+def run_scenario(url, state, name, concurrency, duration, max_requests=None):
+    func, authenticated = SCENARIOS[name]
+    latencies = []
+    queries = []
+    errors = {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    counter = iter(range(max_requests)) if max_requests else None
+
+    def worker(index):
+        client = Client(url, state['token'] if authenticated else None)
+        local_latencies, local_queries, local_errors = [], [], {}
+        iteration = 0
+        while time.perf_counter() < deadline:
+            if counter is not None:
+                with lock:
+                    if next(counter, None) is None:
+                        break
+            start = time.perf_counter()
+            try:
+                status, _, query_count = func(client, state, index, iteration)
+            except OSError as exc:
+                status, query_count = type(exc).__name__, None
+            elapsed = (time.perf_counter() - start) * 1000
+            iteration += 1
+            if isinstance(status, int) and status < 400:
+                local_latencies.append(elapsed)
+                if query_count is not None:
+                    local_queries.append(query_count)
+            else:
+                local_errors[str(status)] = local_errors.get(str(status), 0) + 1
+        client.close()
+        with lock:
+            latencies.extend(local_latencies)
+            queries.extend(local_queries)
+            for key, value in local_errors.items():
+                errors[key] = errors.get(key, 0) + value
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'duration_s': round(wall, 3),
+        'throughput_rps': round(len(latencies) / wall, 2) if wall else 0,
+        'mean_ms': round(sum(latencies) / len(latencies), 3) if latencies else None,
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'max_ms': latencies[-1] if latencies else None,
+        'queries_per_request': {
+            'mean': round(sum(queries) / len(queries), 2) if queries else None,
+            'max': max(queries) if queries else None,
+        },
+    }
+
+
+def git_metadata():
+    def git(*args):
+        try:
+            return subprocess.run(
+                ['git', *args], cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    return {
+        'commit': git('rev-parse', '--short', 'HEAD'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+    }
+
+
+def start_server(url, env=None):
+    """
+    Sobe o daphne em subprocesso (mesmas variáveis de ambiente, ou ``env``) e
+    aguarda a porta. O ``Server-Timing`` fica ligado para contar as queries.
+    """
+    env = {**(env or os.environ), 'SERVER_TIMING_HEADER': 'True'}
+    parts = urlsplit(url)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'daphne', '-b', parts.hostname, '-p', str(parts.port or 80),
+         'core.asgi:application'],
+        cwd=BACKEND_DIR, env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit('O servidor encerrou durante a inicialização.')
+        try:
+            socket.create_connection((parts.hostname, parts.port or 80), timeout=0.5).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit('Servidor não respondeu em 30s.')
+
+
+def print_report(results, baseline=None):
+    header = f'{"cenário":<15}{"req":>7}{"err":>6}{"req/s":>10}{"p50":>9}{"p95":>9}{"p99":>9}{"queries":>9}'
+    print(header)
+    for name, stats in results['scenarios'].items():
+        def fmt(value):
+            return '-' if value is None else f'{value:.1f}'
+        print(
+            f'{name:<15}{stats["requests"]:>7}{sum(stats["errors"].values()):>6}'
+            f'{stats["throughput_rps"]:>10.1f}{fmt(stats["p50_ms"]):>9}{fmt(stats["p95_ms"]):>9}'
+            f'{fmt(stats["p99_ms"]):>9}{fmt(stats["queries_per_request"]["mean"]):>9}'
+        )
+        previous = (baseline or {}).get('scenarios', {}).get(name)
+        if previous:
+            deltas = []
+            for key in ('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms'):
+                if previous.get(key) and stats.get(key) is not None:
+                    deltas.append(f'{key}={(stats[key] / previous[key] - 1) * 100:+.1f}%')
+            print(f'{"":<15}vs {baseline["meta"].get("commit")}: {" ".join(deltas)}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8765')
+    parser.add_argument('--serve', action='store_true', help='Sobe o daphne em --url durante o teste.')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10, help='Segundos por cenário.')
+    parser.add_argument('--requests', type=int, help='Limite de requisições por cenário.')
+    parser.add_argument('--email', default='admin@bench.example.com')
+    parser.add_argument('--password', default='bench-password')
+    parser.add_argument('--output', help='Arquivo JSON (padrão: benchmarks/results/<data>-<commit>.json).')
+    parser.add_argument('--compare', help='JSON de uma execução anterior.')
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f'Cenários desconhecidos: {", ".join(sorted(unknown))}')
+
+    server = start_server(args.url) if args.serve else None
+    try:
+        state = prepare_state(args.url, args.email, args.password)
+        results = {
+            'meta': {
+                **git_metadata(),
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'url': args.url,
+                'concurrency': args.concurrency,
+                'duration_s': args.duration,
+                'python': platform.python_version(),
+                'settings': os.environ.get('DJANGO_SETTINGS_MODULE', 'core.settings'),
+            },
+            'scenarios': {},
+        }
+        for name in names:
+            results['scenarios'][name] = run_scenario(
+                args.url, state, name, args.concurrency, args.duration, args.requests,
+            )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as fp:
+            baseline = json.load(fp)
+    print_report(results, baseline)
+
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f'{datetime.now():%Y%m%d-%H%M%S}-{results["meta"]["commit"] or "local"}.json'
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2), encoding='utf-8')
+    print(f'\nResultados salvos em {output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Custo por requisição do pipeline de middlewares na API: completo × enxuto
+(``PathMiddlewareStack`` com ``LEAN_MIDDLEWARE_PATHS``).
+
+Chama os handlers WSGI e ASGI do Django em processo, com
+``LEAN_MIDDLEWARE_PATHS`` vazio (pipeline completo em /api/) e com ``/api/``:
+
+- ``jwt``: GET /api/auth/me/ com JWT;
+- ``anon_cookie``: GET /api/auth/me/ sem token e com um cookie de sessão
+  expirado (no pipeline completo o ``SessionAuthentication`` consulta a sessão);
+- ``stack``: só o ``PathMiddlewareStack``, com uma resposta vazia no lugar da view.
+
+Pré-requisito: ``python manage.py generate_benchmark_data``. Uso::
+
+    python -m benchmarks.middleware --iterations 2000
+"""
+import argparse
+import asyncio
+import re
+
+from benchmarks import measure, print_comparison, setup
+
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+MODES = {'full': [], 'lean': ['/api/']}
+
+
+def query_count(server_timing):
+    match = QUERIES_RE.search(server_timing or '')
+    return int(match.group(1)) if match else None
+
+
+async def asgi_get(application, path, headers):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'query_string': b'', 'root_path': '',
+        'headers': [(b'host', b'testserver')] + [
+            (name.lower().encode(), value.encode()) for name, value in headers.items()
+        ],
+        'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+    }
+    body_sent = False
+    result = {}
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            result['status'] = message['status']
+            headers = {name.lower(): value for name, value in message['headers']}
+            result['server_timing'] = headers.get(b'server-timing', b'').decode()
+
+    await application(scope, receive, send)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compara o pipeline de middlewares completo e o enxuto.')
+    parser.add_argument('--iterations', type=int, default=1000)
+    parser.add_argument('--email', default='admin@bench.example.com')
+    args = parser.parse_args(argv)
+
+    setup()
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.core.handlers.asgi import ASGIHandler
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.http import HttpResponse
+    from django.test import RequestFactory, override_settings
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from apps.common.middleware import PathMiddlewareStack
+
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+    settings.SERVER_TIMING_HEADER = True
+    user = get_user_model().objects.get(email=args.email)
+    scenarios = {
+        'jwt': {'Authorization': f'Bearer {AccessToken.for_user(user)}'},
+        'anon_cookie': {'Cookie': f'{settings.SESSION_COOKIE_NAME}=expirada0000000000000000000000000'},
+    }
+    factory = RequestFactory()
+    loop = asyncio.new_event_loop()
+
+    handlers = {}
+    for mode, paths in MODES.items():
+        with override_settings(LEAN_MIDDLEWARE_PATHS=paths):
+            handlers[mode] = {
+                'wsgi': WSGIHandler(),
+                'asgi': ASGIHandler(),
+                'stack': PathMiddlewareStack(lambda request: HttpResponse()),
+            }
+
+    for name, headers in scenarios.items():
+        results, queries = {}, {}
+        for mode in MODES:
+            handler = handlers[mode]['wsgi']
+            response = handler.get_response(factory.get('/api/auth/me/', headers=headers))
+            queries[mode] = (response.status_code, query_count(response.get('Server-Timing')))
+            results[mode] = measure(
+                lambda: handler.get_response(factory.get('/api/auth/me/', headers=headers)),
+                args.iterations,
+            )
+        print_comparison(
+            f'WSGI {name}: status/queries full={queries["full"]} lean={queries["lean"]}',
+            results['full'], results['lean'], 'full', 'lean',
+        )
+
+        for mode in MODES:
+            application = handlers[mode]['asgi']
+            result = loop.run_until_complete(asgi_get(application, '/api/auth/me/', headers))
+            queries[mode] = (result['status'], query_count(result['server_timing']))
+            results[mode] = measure(
+                lambda: loop.run_until_complete(asgi_get(application, '/api/auth/me/', headers)),
+                args.iterations,
+            )
+        print_comparison(
+            f'ASGI {name}: status/queries full={queries["full"]} lean={queries["lean"]}',
+            results['full'], results['lean'], 'full', 'lean',
+        )
+
+    results = {}
+    for mode in MODES:
+        stack = handlers[mode]['stack']
+        results[mode] = measure(
+            lambda: stack(factory.get('/api/auth/me/', headers=scenarios['anon_cookie'])),
+            args.iterations,
+        )
+    print_comparison('Somente PathMiddlewareStack (view vazia)', results['full'], results['lean'], 'full', 'lean')
+    loop.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Compara o JSONRenderer/JSONParser do DRF com ORJSONRenderer/ORJSONParser
+(apps.common) usando payloads reais do UserSerializer (login e /me).
+
+    python -m benchmarks.renderers --companies 50
+"""
+import argparse
+import io
+import sys
+
+from benchmarks import measure, print_comparison, rollback, setup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--companies', type=int, default=20)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    setup()
+
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from apps.accounts.api.serializers import UserSerializer
+    from apps.common.parsers import ORJSONParser
+    from apps.common.renderers import ORJSONRenderer
+    from benchmarks.fixtures import create_member_fixture
+
+    request = Request(APIRequestFactory().get('/api/auth/me/'))
+
+    with rollback():
+        admin, _company = create_member_fixture(members=0, companies=args.companies)
+        payload = UserSerializer(admin, context={'request': request}).data
+
+    drf_renderer, orjson_renderer = JSONRenderer(), ORJSONRenderer()
+    drf_bytes = drf_renderer.render(payload)
+    orjson_bytes = orjson_renderer.render(payload)
+    identical = drf_bytes == orjson_bytes
+
+    print(f'Payload: {len(drf_bytes)} bytes, saída idêntica: {"sim" if identical else "NÃO"}')
+    print_comparison(
+        'Render',
+        measure(lambda: drf_renderer.render(payload), args.iterations),
+        measure(lambda: orjson_renderer.render(payload), args.iterations),
+        candidate_label='orjson',
+    )
+
+    drf_parser, orjson_parser = JSONParser(), ORJSONParser()
+    print_comparison(
+        'Parse',
+        measure(lambda: drf_parser.parse(io.BytesIO(drf_bytes)), args.iterations),
+        measure(lambda: orjson_parser.parse(io.BytesIO(drf_bytes)), args.iterations),
+        candidate_label='orjson',
+    )
+
+    sys.exit(0 if identical else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Compara os serializers DRF com os leitores compilados (apps.common.compiled).
+
+Verifica que o JSON gerado é idêntico byte a byte e mede o ganho de throughput.
+
+    python -m benchmarks.serializers --members 1000 --companies 20
+"""
+import argparse
+import sys
+
+from benchmarks import measure, print_comparison, rollback, setup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--members', type=int, default=500)
+    parser.add_argument('--companies', type=int, default=20)
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    setup()
+
+    from django.test import override_settings
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from apps.accounts.api.serializers import UserSerializer
+    from apps.companies.api.serializers import CompanyMemberSerializer
+    from apps.companies.models import CompanyMember
+    from benchmarks.fixtures import create_member_fixture
+
+    renderer = JSONRenderer()
+    request = Request(APIRequestFactory().get('/api/'))
+    context = {'request': request}
+    failed = False
+
+    with rollback():
+        admin, company = create_member_fixture(args.members, args.companies)
+        queryset = CompanyMember.objects.filter(
+            company=company,
+            is_active=True,
+        ).select_related('user').order_by('user__first_name', 'user__email')
+
+        # Lista de membros
+        def drf_members():
+            return renderer.render(CompanyMemberSerializer(queryset, many=True, context=context).data)
+
+        def compiled_members():
+            return renderer.render(CompanyMemberSerializer.compiled_reader.serialize(queryset, context))
+
+        # Payload do usuário (login e /me)
+        def drf_user():
+            with override_settings(COMPILED_READ_SERIALIZERS=False):
+                return renderer.render(UserSerializer(admin, context=context).data)
+
+        def compiled_user():
+            with override_settings(COMPILED_READ_SERIALIZERS=True):
+                return renderer.render(UserSerializer(admin, context=context).data)
+
+        for title, baseline, candidate in (
+            (f'CompanyMemberSerializer ({args.members} membros)', drf_members, compiled_members),
+            (f'UserSerializer ({args.companies} empresas)', drf_user, compiled_user),
+        ):
+            identical = baseline() == candidate()
+            failed = failed or not identical
+            print_comparison(
+                f'{title} - saída idêntica: {"sim" if identical else "NÃO"}',
+                measure(baseline, args.iterations),
+                measure(candidate, args.iterations),
+                candidate_label='compiled',
+            )
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -10,8 +10,10 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import sys
 from pathlib import Path
 import environ
+from corsheaders.defaults import default_headers as default_cors_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -40,7 +42,8 @@ ALLOWED_HOSTS = env.list('ALLOWED_HOSTS', default=[])
 # Application definition
 
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    # django.contrib.admin com as verificações de middleware do PathMiddlewareStack
+    'apps.common.apps.AdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -50,6 +53,7 @@ INSTALLED_APPS = [
     'apps.accounts',
     'apps.common',
     'apps.companies',
+    'apps.loyalty',
 
     # third party apps
     'rest_framework',
@@ -61,9 +65,24 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Tracing (sem TRACING_ENABLED fica inativo) e instrumentação
+    # (Server-Timing / orçamento de queries) vêm primeiro
+    'apps.common.middleware.TracingMiddleware',
+    'apps.common.middleware.QueryBudgetMiddleware',
+    'apps.common.middleware.MetricsMiddleware',
+    # Leituras em réplicas para métodos seguros (sem DB_REPLICAS fica inativo)
+    'apps.common.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     # CORS deve vir antes do CommonMiddleware
     "corsheaders.middleware.CorsMiddleware",
+    # FULL_MIDDLEWARE ou LEAN_MIDDLEWARE, conforme o caminho
+    'apps.common.middleware.PathMiddlewareStack',
+    # Profiling sob demanda (staff) / amostragem aleatória
+    'apps.common.middleware.ProfilerMiddleware',
+]
+
+# Pipeline completo (admin e demais páginas com sessão)
+FULL_MIDDLEWARE = [
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -71,6 +90,13 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
+# Pipeline da API com JWT: sem sessão, CSRF, autenticação por sessão e mensagens
+# (login na API navegável por sessão só com LEAN_MIDDLEWARE_PATHS vazio)
+LEAN_MIDDLEWARE = [
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+LEAN_MIDDLEWARE_PATHS = env.list("LEAN_MIDDLEWARE_PATHS", default=["/api/"])
 
 ROOT_URLCONF = 'core.urls'
 
@@ -96,6 +122,33 @@ ASGI_APPLICATION = "core.asgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Com DB_POOL=True as conexões vêm do pool do psycopg 3 (compartilhado entre as
+# threads do daphne) em vez de uma conexão persistente por thread (CONN_MAX_AGE).
+# O pool é por processo: com o serve são até SERVER_WORKERS × DB_POOL_MAX_SIZE
+# conexões em cada banco (primário e cada réplica), mais os comandos de manage.py.
+# O total precisa caber no max_connections do PostgreSQL (padrão 100).
+DB_POOL = env.bool("DB_POOL", default=False)
+DATABASE_OPTIONS = {}
+if DB_POOL:
+    DATABASE_OPTIONS["pool"] = {
+        "min_size": env.int("DB_POOL_MIN_SIZE", default=2),
+        "max_size": env.int("DB_POOL_MAX_SIZE", default=10),
+        # Espera máxima por uma conexão livre antes de erro (segundos)
+        "timeout": env.float("DB_POOL_TIMEOUT", default=10.0),
+        "max_idle": env.float("DB_POOL_MAX_IDLE", default=300.0),
+        "max_lifetime": env.float("DB_POOL_MAX_LIFETIME", default=1800.0),
+        "name": "default",
+    }
+
+# Prepared statements no servidor: com server-side binding o psycopg 3 prepara
+# automaticamente as queries repetidas DB_PREPARE_THRESHOLD vezes na mesma conexão
+# (lookup de membership, tema por empresa...). Combina com DB_POOL, que mantém as
+# conexões vivas. Incompatível com PgBouncer em modo transaction (< 1.21).
+DB_PREPARED_STATEMENTS = env.bool("DB_PREPARED_STATEMENTS", default=False)
+if DB_PREPARED_STATEMENTS:
+    DATABASE_OPTIONS["server_side_binding"] = True
+    DATABASE_OPTIONS["prepare_threshold"] = env.int("DB_PREPARE_THRESHOLD", default=2)
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -104,10 +157,65 @@ DATABASES = {
         "PASSWORD": env("DB_PASSWORD"),
         "HOST": env("DB_HOST", default="127.0.0.1"),
         "PORT": env("DB_PORT", default="5432"),
-        "CONN_MAX_AGE": env.int("DB_CONN_MAX_AGE", default=60),
+        # O pool exige CONN_MAX_AGE=0 (a conexão volta ao pool no fim da requisição)
+        "CONN_MAX_AGE": 0 if DB_POOL else env.int("DB_CONN_MAX_AGE", default=60),
+        # Valida a conexão antes do uso (no pool: ConnectionPool.check_connection)
+        "CONN_HEALTH_CHECKS": env.bool("DB_CONN_HEALTH_CHECKS", default=DB_POOL),
+        "OPTIONS": DATABASE_OPTIONS,
     }
 }
 
+# Réplicas de leitura (apps.common.db_router): DB_REPLICAS=host[:porta],...
+# Mesmas credenciais do primário; viram os aliases replica_1, replica_2...
+# Timeouts curtos: uma réplica que some da rede não segura requisições
+REPLICA_CONNECT_TIMEOUT = env.int("REPLICA_CONNECT_TIMEOUT", default=2)
+REPLICA_STATEMENT_TIMEOUT_MS = env.int("REPLICA_STATEMENT_TIMEOUT_MS", default=30000)
+DATABASE_REPLICAS = []
+for _index, _address in enumerate(env.list("DB_REPLICAS", default=[]), start=1):
+    _host, _, _port = _address.partition(":")
+    _alias = f"replica_{_index}"
+    _options = {
+        **DATABASE_OPTIONS,
+        "connect_timeout": REPLICA_CONNECT_TIMEOUT,
+        "options": f"-c statement_timeout={REPLICA_STATEMENT_TIMEOUT_MS}",
+    }
+    if "pool" in _options:
+        _options["pool"] = {**_options["pool"], "name": _alias}
+    DATABASES[_alias] = {
+        **DATABASES["default"],
+        "HOST": _host,
+        "PORT": _port or DATABASES["default"]["PORT"],
+        "OPTIONS": _options,
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(_alias)
+
+DATABASE_ROUTERS = ["apps.common.db_router.ReplicaRouter"] if DATABASE_REPLICAS else []
+# Réplica com atraso maior que isso deixa de receber leituras
+REPLICA_MAX_LAG_SECONDS = env.float("REPLICA_MAX_LAG_SECONDS", default=5.0)
+# Intervalo da verificação de atraso (thread em segundo plano em cada worker)
+REPLICA_LAG_CHECK_INTERVAL = env.float("REPLICA_LAG_CHECK_INTERVAL", default=5.0)
+# Read-your-writes: leituras no primário por N segundos após uma escrita
+# (o marcador por usuário exige cache compartilhado entre os workers)
+REPLICA_PIN_SECONDS = env.int("REPLICA_PIN_SECONDS", default=10)
+REPLICA_PIN_COOKIE = "db_primary_pin"
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Backends instrumentados contabilizam hits/misses no header Server-Timing.
+# Em produção use apps.common.cache.InstrumentedRedisCache com CACHE_LOCATION=redis://...
+
+CACHES = {
+    "default": {
+        "BACKEND": env("CACHE_BACKEND", default="apps.common.cache.InstrumentedLocMemCache"),
+        "LOCATION": env("CACHE_LOCATION", default="fidelidade"),
+    }
+}
+# Com cache local ao processo (LocMem) a invalidação ao salvar não chega aos
+# outros workers: caches invalidados ao salvar duram no máximo isso
+LOCAL_CACHE_MAX_SECONDS = env.int("LOCAL_CACHE_MAX_SECONDS", default=5)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -128,6 +236,16 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# PBKDF2 com medição do tempo de verificação (métricas); demais hashers padrão
+PASSWORD_HASHERS = [
+    'apps.accounts.hashers.TimedPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -168,12 +286,128 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    # JSON via orjson (apps.common); mesma saída do JSONRenderer/JSONParser do DRF
+    "DEFAULT_RENDERER_CLASSES": (
+        "apps.common.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "apps.common.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 20,
     # Documentação com drf-spectacular
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
+# Serialização compilada (apps.common.compiled) nas listagens de leitura mais
+# acessadas: membros da empresa e empresas do usuário (login e /me).
+COMPILED_READ_SERIALIZERS = env.bool("COMPILED_READ_SERIALIZERS", default=False)
+
+# Views assíncronas (apps.common.async_views) para o GET de /api/auth/me/, do tema
+# e da lista de membros sob ASGI; demais métodos seguem nas views DRF.
+ASYNC_READ_VIEWS = env.bool("ASYNC_READ_VIEWS", default=False)
+# Cache das colunas do tema lidas pela view assíncrona (invalidado ao salvar;
+# com cache local ao processo, limitado a LOCAL_CACHE_MAX_SECONDS)
+ASYNC_THEME_CACHE_SECONDS = env.int("ASYNC_THEME_CACHE_SECONDS", default=300)
+
+# -----------------------------------------------------------------------------
+# Servidor de produção (python manage.py serve, apps.common.server)
+# -----------------------------------------------------------------------------
+SERVER_BIND = env("SERVER_BIND", default="0.0.0.0:8000")
+# 0 = CPUs disponíveis ao processo (afinidade e cota do cgroup, não as do host).
+# Cada worker tem as próprias conexões com o banco (ver DB_POOL)
+SERVER_WORKERS = env.int("SERVER_WORKERS", default=0)
+SERVER_BACKLOG = env.int("SERVER_BACKLOG", default=2048)
+# Reciclagem de workers (0 desativa); o jitter evita reciclar todos juntos
+SERVER_MAX_REQUESTS = env.int("SERVER_MAX_REQUESTS", default=0)
+SERVER_MAX_REQUESTS_JITTER = env.int("SERVER_MAX_REQUESTS_JITTER", default=0)
+SERVER_MAX_MEMORY_MB = env.int("SERVER_MAX_MEMORY_MB", default=0)
+# Tempo para terminar as requisições em andamento antes do SIGKILL
+SERVER_GRACEFUL_TIMEOUT = env.int("SERVER_GRACEFUL_TIMEOUT", default=30)
+# entrypoint.sh (manage.py boot): pula migrate/collectstatic quando nada mudou
+BOOT_FAST_PATH = env.bool("BOOT_FAST_PATH", default=True)
+
+# -----------------------------------------------------------------------------
+# Django Admin (apps.common.admin)
+# -----------------------------------------------------------------------------
+# Acima deste número de linhas os changelists usam a contagem estimada do
+# PostgreSQL em vez de COUNT(*); 0 sempre conta
+ADMIN_ESTIMATED_COUNT_THRESHOLD = env.int("ADMIN_ESTIMATED_COUNT_THRESHOLD", default=100000)
+
+# -----------------------------------------------------------------------------
+# Fidelidade (apps.loyalty)
+# -----------------------------------------------------------------------------
+# Empresa (taxa) e vínculo do atendente em cache no acúmulo do PDV; invalidados
+# ao salvar, o TTL cobre o resto (ex.: usuário desativado). Com cache local ao
+# processo, limitado a LOCAL_CACHE_MAX_SECONDS
+POINTS_EARN_CACHE_SECONDS = env.int("POINTS_EARN_CACHE_SECONDS", default=60)
+# Compras por chamada na sincronização em lote do PDV
+POINTS_BATCH_MAX_RECORDS = env.int("POINTS_BATCH_MAX_RECORDS", default=5000)
+# Fechamento mensal do extrato (apps.loyalty.checkpoints): espera após a virada
+# do mês para incluir transações ainda em andamento
+POINTS_CHECKPOINT_GRACE_SECONDS = env.int("POINTS_CHECKPOINT_GRACE_SECONDS", default=3600)
+
+# -----------------------------------------------------------------------------
+# Idempotency-Key nas escritas da API (apps.common.idempotency)
+# -----------------------------------------------------------------------------
+# "cache" (padrão; banco como reserva se o cache falhar) ou "db"
+IDEMPOTENCY_STORE = env("IDEMPOTENCY_STORE", default="cache")
+# Tempo em que retentativas recebem a resposta guardada
+IDEMPOTENCY_TTL_SECONDS = env.int("IDEMPOTENCY_TTL_SECONDS", default=86400)
+# Validade da trava da requisição original (retentativas nesse meio recebem 409)
+IDEMPOTENCY_LOCK_SECONDS = env.int("IDEMPOTENCY_LOCK_SECONDS", default=60)
+
+# -----------------------------------------------------------------------------
+# Instrumentação por requisição (apps.common.middleware.QueryBudgetMiddleware)
+# -----------------------------------------------------------------------------
+# manage.py test ou pytest; TESTING=True/False no ambiente decide nos demais casos
+TESTING = env.bool("TESTING", default=sys.argv[1:2] == ["test"] or "pytest" in sys.modules)
+
+# Máximo de queries por requisição quando a view não declara query_budget
+QUERY_BUDGET_DEFAULT = env.int("QUERY_BUDGET_DEFAULT", default=30)
+# Estourar o orçamento gera exceção nos testes e apenas log em produção
+QUERY_BUDGET_RAISE = env.bool("QUERY_BUDGET_RAISE", default=TESTING)
+# Server-Timing expõe queries, tempo de banco e cache: para todos só com DEBUG
+# (ou SERVER_TIMING_HEADER=True); senão apenas para usuários staff
+SERVER_TIMING_HEADER = env.bool("SERVER_TIMING_HEADER", default=DEBUG)
+
+# Endpoint /metrics (Prometheus): "Authorization: Bearer <token>" ou cliente nas
+# redes permitidas (padrão: só o próprio container). Sem token nem rede, 403.
+# Para vários workers, defina PROMETHEUS_MULTIPROC_DIR no ambiente.
+METRICS_TOKEN = env("METRICS_TOKEN", default="")
+METRICS_ALLOWED_NETWORKS = env.list("METRICS_ALLOWED_NETWORKS", default=["127.0.0.1/32", "::1/128"])
+
+# Profiling de requisições (apps.common.middleware.ProfilerMiddleware)
+PROFILER_ENABLED = env.bool("PROFILER_ENABLED", default=False)
+PROFILER_DIR = env("PROFILER_DIR", default=str(MEDIA_ROOT / "profiles"))
+PROFILER_INTERVAL = env.float("PROFILER_INTERVAL", default=0.005)
+# Fração de requisições amostradas aleatoriamente (ex.: 0.001 = 0,1%)
+PROFILER_SAMPLE_RATE = env.float("PROFILER_SAMPLE_RATE", default=0.0)
+PROFILER_KEEP_SLOWEST = env.int("PROFILER_KEEP_SLOWEST", default=20)
+
+# Log de queries lentas (apps.common.slow_queries); 0 desativa
+SLOW_QUERY_THRESHOLD_MS = env.int("SLOW_QUERY_THRESHOLD_MS", default=200)
+SLOW_QUERY_LOG_FILE = env("SLOW_QUERY_LOG_FILE", default=str(DATA_DIR / "logs" / "slow_queries.jsonl"))
+# EXPLAIN (ANALYZE, BUFFERS) reexecuta o SELECT: use com amostragem baixa
+# (SELECTs com FOR UPDATE/FOR SHARE ou funções voláteis só recebem EXPLAIN)
+SLOW_QUERY_EXPLAIN = env.bool("SLOW_QUERY_EXPLAIN", default=False)
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = env.float("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", default=0.1)
+
+# Tracing (apps.common.tracing): spans de view, ORM, cache, serializers e channels
+TRACING_ENABLED = env.bool("TRACING_ENABLED", default=False)
+TRACING_SAMPLE_RATE = env.float("TRACING_SAMPLE_RATE", default=0.01)
+# Segue a decisão do traceparent recebido (flag "sampled") quando presente
+TRACING_RESPECT_PARENT = env.bool("TRACING_RESPECT_PARENT", default=True)
+# "file" (OTLP/JSON em JSONL) ou "otlp" (HTTP para um coletor, ex.: http://otel:4318/v1/traces)
+TRACING_EXPORTER = env("TRACING_EXPORTER", default="file")
+TRACING_FILE = env("TRACING_FILE", default=str(DATA_DIR / "logs" / "traces.jsonl"))
+TRACING_OTLP_ENDPOINT = env("TRACING_OTLP_ENDPOINT", default="http://127.0.0.1:4318/v1/traces")
+TRACING_SERVICE_NAME = env("TRACING_SERVICE_NAME", default="backend")
+TRACING_MAX_SPANS = env.int("TRACING_MAX_SPANS", default=1000)
+
 # -----------------------------------------------------------------------------
 # Simple JWT
 # -----------------------------------------------------------------------------
@@ -215,7 +449,7 @@ REDIS_URL = env("REDIS_URL", default="redis://127.0.0.1:6379/0")
 
 CHANNEL_LAYERS = {
     "default": {
-        "BACKEND": "channels_redis.core.RedisChannelLayer",
+        "BACKEND": "apps.common.channel_layers.InstrumentedRedisChannelLayer",
         "CONFIG": {"hosts": [REDIS_URL]},
     }
 }
@@ -225,6 +459,8 @@ CHANNEL_LAYERS = {
 # -----------------------------------------------------------------------------
 CORS_ALLOWED_ORIGINS = env.list("CORS_ALLOWED_ORIGINS", default=[])
 CORS_ALLOW_CREDENTIALS = env.bool("CORS_ALLOW_CREDENTIALS", default=True)
+# Header das escritas idempotentes (apps.common.idempotency)
+CORS_ALLOW_HEADERS = (*default_cors_headers, "idempotency-key")
 
 CSRF_TRUSTED_ORIGINS = env.list("CSRF_TRUSTED_ORIGINS", default=[])
 
@@ -273,3 +509,6 @@ SPECTACULAR_SETTINGS = {
     "SCHEMA_PATH_PREFIX": r"/api/",
     "SORT_OPERATIONS": True,
 }
+
+# Schema pré-gerado servido em /api/schema/ (apps.common.openapi)
+OPENAPI_SCHEMA_DIR = env("OPENAPI_SCHEMA_DIR", default=str(DATA_DIR / "openapi"))
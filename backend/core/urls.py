@@ -5,26 +5,28 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularRedocView,
-    SpectacularSwaggerView,
-)
+from apps.common.views import lazy_view, metrics_view
 
 urlpatterns = [
     # Admin
     path('admin/', admin.site.urls),
 
+    # Métricas Prometheus
+    path('metrics', metrics_view, name='metrics'),
+
     # API - Autenticação
     path('api/auth/', include('apps.accounts.api.urls')),
 
     # API - Companies
     path('api/companies/', include('apps.companies.api.urls')),
 
-    # Documentação da API
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-    path('api/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    # API - Fidelidade (pontos)
+    path('api/loyalty/', include('apps.loyalty.api.urls')),
+
+    # Documentação da API: schema pré-gerado (apps.common.openapi), importado no primeiro acesso
+    path('api/schema/', lazy_view('apps.common.openapi.PrecomputedSchemaView'), name='schema'),
+    path('api/docs/', lazy_view('apps.common.openapi.PrecomputedSwaggerView', url_name='schema'), name='swagger-ui'),
+    path('api/redoc/', lazy_view('apps.common.openapi.PrecomputedRedocView', url_name='schema'), name='redoc'),
 ]
 
 # Serve arquivos de media em desenvolvimento
@@ -3,7 +3,13 @@ set -e
 
 mkdir -p /data/media /data/staticfiles
 
-python manage.py migrate --noinput
-python manage.py collectstatic --noinput
+# Métricas Prometheus em modo multiprocesso: diretório limpo a cada boot
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
+# migrate e collectstatic em um só processo, pulados quando nada mudou
+python manage.py boot
 
 exec "$@"